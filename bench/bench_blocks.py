@@ -0,0 +1,90 @@
+# Benchmark for block classification on a mix of block types.
+#
+# Compares lines_to_block_type (first-character fast path, compiled patterns)
+# against the per-line scan it replaced, block type by block type.
+#
+# Run from the repository root:
+#   python3 -m bench.bench_blocks
+#   python3 -m bench.bench_blocks --blocks 20000 --mix paragraph=6,code=1
+import argparse
+import re
+import time
+
+from bench.corpus import CorpusGenerator, parse_mix
+from src.block_markdown import BlockType, lines_to_block_type
+
+
+# lines_to_block_type as it was before the fast path
+def per_line_block_type(lines):
+    headings = re.findall(r"^(#{1,6})\s[\S]+", lines[0])
+    if len(headings) > 0:
+        return BlockType.HEADING
+    if len(lines) >= 2:
+        if lines[0].startswith("```") and lines[-1] == "```":
+            return BlockType.CODE
+    is_quote = True
+    is_unordered = True
+    is_ordered = True
+    expected = 1
+    for line in lines:
+        is_quote &= line.startswith(">")
+        is_unordered &= line.startswith("- ")
+        if is_ordered:
+            if line.startswith(f"{expected}. "):
+                expected += 1
+            else:
+                is_ordered = False
+    if is_quote:
+        return BlockType.QUOTE
+    elif is_unordered:
+        return BlockType.UNORDERED_LIST
+    elif is_ordered:
+        return BlockType.ORDERED_LIST
+    else:
+        return BlockType.PARAGRAPH
+
+
+# Time classifying every block repeat times over and keep the fastest run.
+# Returns nanoseconds per block.
+def ns_per_block(classify, blocks, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for lines in blocks:
+            classify(lines)
+        elapsed = time.perf_counter_ns() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / len(blocks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark block classification")
+    parser.add_argument("--blocks", type=int, default=10000, help="blocks per block type")
+    parser.add_argument("--mix", default="", help="block type weights for the 'mixed' row, e.g. paragraph=6,code=1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    generator = CorpusGenerator(seed=args.seed, mix=mix)
+    by_kind = {}
+    for kind in mix:
+        by_kind[kind] = [generator.block(kind).split("\n") for _ in range(args.blocks)]
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    by_kind["mixed"] = [generator.block(kind).split("\n")
+                        for kind in generator.random.choices(kinds, weights, k=args.blocks)]
+
+    print(f"{'blocks':<15} {'per-line ns':>12} {'fast path ns':>13} {'speedup':>8}")
+    for kind, blocks in by_kind.items():
+        for lines in blocks:
+            if per_line_block_type(lines) != lines_to_block_type(lines):
+                raise AssertionError(f"classifiers disagree on {lines!r}")
+        old = ns_per_block(per_line_block_type, blocks, args.repeat)
+        new = ns_per_block(lines_to_block_type, blocks, args.repeat)
+        print(f"{kind:<15} {old:>12.0f} {new:>13.0f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# Build benchmark: times each stage of a site build on a synthetic corpus.
+#
+# Stages, each timed on its own over every page:
+#   copy_static   copy_all_contents(static, public)
+#   read          read every markdown source
+#   parse_blocks  split into blocks and classify them
+#   parse_inline  build each block's node tree (inline parsing included)
+#   render_html   ParentNode.to_html on every page
+#   template      the Document (title, headings, words) of each tree, and fill in the template
+#   write         write every page to public/
+#   full_build    copy_all_contents + generate_pages_recursive, end to end
+#
+# Results can be saved as JSON and compared against an earlier run; the run
+# fails if any stage got slower than the threshold allows.
+#
+# Run from the repository root:
+#   python3 -m bench.bench_build --pages 1000 --output bench.json
+#   python3 -m bench.bench_build --pages 1000 --compare bench.json --threshold 0.15
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from bench.corpus import add_corpus_arguments, generate_from_args
+from src.block_markdown import block_to_html_node, iter_block_lines, lines_to_block_type
+from src.document import document_from_blocks
+from src.main import copy_all_contents
+from src.parentnode import ParentNode
+from src.render import collect_pages, generate_pages_recursive
+from src.template import load_template
+
+STAGES = [
+    "copy_static",
+    "read",
+    "parse_blocks",
+    "parse_inline",
+    "render_html",
+    "template",
+    "write",
+    "full_build",
+]
+
+
+def _tree_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+
+# Time func() repeat times and keep the fastest run. func returns the number of
+# bytes it processed, used for the MB/s figure.
+def time_stage(func, repeat):
+    best = None
+    nbytes = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        nbytes = func()
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, nbytes
+
+
+def run_stages(root, repeat):
+    static_dir = os.path.join(root, "static")
+    content_dir = os.path.join(root, "content")
+    public_dir = os.path.join(root, "public")
+    template_path = os.path.join(root, "template.html")
+    os.makedirs(public_dir, exist_ok=True)
+
+    pages = collect_pages(content_dir, public_dir)
+    state = {}
+    results = {}
+
+    def copy_static():
+        copy_all_contents(static_dir, public_dir)
+        return _tree_size(static_dir)
+
+    def read():
+        state["sources"] = []
+        for path, _ in pages:
+            with open(path) as f:
+                state["sources"].append(f.read())
+        return sum(len(s) for s in state["sources"])
+
+    def parse_blocks():
+        state["blocks"] = [
+            [(lines_to_block_type(lines), lines) for lines in iter_block_lines(source)]
+            for source in state["sources"]
+        ]
+        return sum(len(s) for s in state["sources"])
+
+    def parse_inline():
+        state["trees"] = [
+            ParentNode("div", [block_to_html_node(block_type, lines) for block_type, lines in blocks])
+            for blocks in state["blocks"]
+        ]
+        return sum(len(s) for s in state["sources"])
+
+    def render_html():
+        state["bodies"] = [tree.to_html() for tree in state["trees"]]
+        return sum(len(b) for b in state["bodies"])
+
+    def template():
+        tmpl = load_template(template_path)
+        state["pages"] = []
+        for blocks, tree, body in zip(state["blocks"], state["trees"], state["bodies"]):
+            document = document_from_blocks(zip((block_type for block_type, _ in blocks), tree.children))
+            state["pages"].append(tmpl.render({"Title": document.title, "Content": body}))
+        return sum(len(p) for p in state["pages"])
+
+    def write():
+        for (_, dest), html in zip(pages, state["pages"]):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with open(dest, "w") as f:
+                f.write(html)
+        return sum(len(p) for p in state["pages"])
+
+    def full_build():
+        copy_all_contents(static_dir, public_dir)
+        generate_pages_recursive(content_dir, template_path, public_dir)
+        return sum(len(s) for s in state["sources"])
+
+    stage_funcs = {
+        "copy_static": copy_static,
+        "read": read,
+        "parse_blocks": parse_blocks,
+        "parse_inline": parse_inline,
+        "render_html": render_html,
+        "template": template,
+        "write": write,
+        "full_build": full_build,
+    }
+    for name in STAGES:
+        # The stages only make sense in order: each one uses the previous one's output
+        seconds, nbytes = time_stage(stage_funcs[name], repeat)
+        results[name] = {
+            "seconds": seconds,
+            "bytes": nbytes,
+            "pages_per_second": len(pages) / seconds if seconds else None,
+            "mb_per_second": nbytes / 1e6 / seconds if seconds else None,
+        }
+    return len(pages), results
+
+
+def print_results(page_count, results):
+    print(f"{'stage':<14} {'seconds':>9} {'pages/s':>10} {'MB/s':>9}")
+    for name in STAGES:
+        r = results[name]
+        print(f"{name:<14} {r['seconds']:>9.4f} {r['pages_per_second']:>10.0f} {r['mb_per_second']:>9.1f}")
+    print(f"{page_count} pages")
+
+
+# Returns a list of (stage, baseline seconds, current seconds) for every stage
+# that is more than threshold (a fraction) slower than in the baseline
+def find_regressions(baseline, current, threshold):
+    regressions = []
+    for name, result in current["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            continue
+        if result["seconds"] > before["seconds"] * (1 + threshold):
+            regressions.append((name, before["seconds"], result["seconds"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each stage of a site build")
+    add_corpus_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is kept")
+    parser.add_argument("--output", help="save the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="fail if a stage is this fraction slower than in --compare")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_from_args(root, args)
+        page_count, stages = run_stages(root, args.repeat)
+
+    current = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {
+            "pages": args.pages,
+            "seed": args.seed,
+            "mix": args.mix,
+            "blocks_per_page": args.blocks_per_page,
+            "links_per_paragraph": args.links_per_paragraph,
+            "images_per_page": args.images_per_page,
+            "depth": args.depth,
+        },
+        "stages": stages,
+    }
+    print_results(page_count, stages)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=1)
+        print(f"Saved results to '{args.output}'")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("corpus") != current["corpus"]:
+            print("warning: the baseline was run on a different corpus")
+        regressions = find_regressions(baseline, current, args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.4f}s -> {after:.4f}s (+{after / before - 1:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No stage slower than {args.threshold:.0%} over '{args.compare}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Benchmark for inline parsing on link-heavy paragraphs.
+#
+# Compares text_to_textnodes (single pass) against the five-pass pipeline it
+# replaced, built from the split_nodes_* functions.
+#
+# Run from the repository root:
+#   python3 -m bench.bench_inline
+#   python3 -m bench.bench_inline --links 100 500 2000 --repeat 5
+import argparse
+import timeit
+
+from src.inline_markdown import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+from src.textnode import TextNode, TextType
+
+
+def multi_pass_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    return nodes
+
+
+# A paragraph with n links, plus an image, some bold, italic and code every few links
+def link_paragraph(n):
+    parts = []
+    for i in range(n):
+        parts.append(f"see [post number {i}](/blog/post-{i})")
+        if i % 5 == 0:
+            parts.append(f"![thumb {i}](/images/{i}.png) with **bold {i}**, _italic_ and `code`")
+    return ", ".join(parts)
+
+
+def best_time(func, text, repeat):
+    number = 1
+    # Run enough times for each sample to take a measurable amount of time
+    while timeit.timeit(lambda: func(text), number=number) < 0.05:
+        number *= 2
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=repeat)) / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark inline markdown parsing")
+    parser.add_argument("--links", type=int, nargs="+", default=[10, 100, 500, 2000],
+                        help="number of links per paragraph")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'links':>7} {'KB':>8} {'multi-pass ms':>14} {'single-pass ms':>15} {'speedup':>8}")
+    for n in args.links:
+        text = link_paragraph(n)
+        if multi_pass_textnodes(text) != text_to_textnodes(text):
+            raise AssertionError(f"parsers disagree on a paragraph with {n} links")
+        old = best_time(multi_pass_textnodes, text, args.repeat)
+        new = best_time(text_to_textnodes, text, args.repeat)
+        print(f"{n:>7} {len(text) / 1024:>8.1f} {old * 1000:>14.3f} {new * 1000:>15.3f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Benchmark for overlapping file I/O during a full build.
+#
+# Builds a synthetic site with different --io-jobs settings. To stand in for a
+# network mount, --latency-ms adds a delay to every file open, the way a round
+# trip to a remote server would; the delay releases the GIL like real I/O does.
+#
+# Run from the repository root:
+#   python3 -m bench.bench_io --pages 300 --latency-ms 2
+#   python3 -m bench.bench_io --pages 300 --latency-ms 0 --io-jobs 1 4 16
+import argparse
+import builtins
+import os
+import shutil
+import tempfile
+import time
+
+from bench.corpus import add_corpus_arguments, generate_from_args
+from src.main import copy_all_contents, generate_pages_recursive
+
+
+class SlowOpen():
+    def __init__(self, latency):
+        self.latency = latency
+        self.open = builtins.open
+
+    def __call__(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return self.open(*args, **kwargs)
+
+    def __enter__(self):
+        builtins.open = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        builtins.open = self.open
+        return False
+
+
+# A full build into an empty public/, so every run writes every file
+def build(root, io_jobs):
+    public_dir = os.path.join(root, "public")
+    shutil.rmtree(public_dir, ignore_errors=True)
+    os.makedirs(public_dir)
+    copy_all_contents(os.path.join(root, "static"), public_dir, io_jobs=io_jobs)
+    generate_pages_recursive(os.path.join(root, "content"), os.path.join(root, "template.html"),
+                             public_dir, io_jobs=io_jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark a full build with overlapping file I/O")
+    add_corpus_arguments(parser)
+    parser.add_argument("--io-jobs", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="delay added to every file open")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_from_args(root, args)
+        print(f"{args.pages} pages, {args.latency_ms} ms per open")
+        print(f"{'io jobs':>8} {'seconds':>9} {'speedup':>8}")
+        baseline = None
+        for io_jobs in args.io_jobs:
+            with SlowOpen(args.latency_ms / 1000):
+                started = time.perf_counter()
+                build(root, io_jobs)
+                elapsed = time.perf_counter() - started
+            if baseline is None:
+                baseline = elapsed
+            print(f"{io_jobs:>8} {elapsed:>9.3f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Memory benchmark for the node classes, using tracemalloc.
+#
+# Parses a large generated document, then measures the memory taken by copies of
+# its TextNodes and HTML node tree made with:
+# - the real node classes (__slots__, one shared newline leaf)
+# - equivalent classes that keep a __dict__ and give every list item its own
+#   newline leaf, which is how the node classes used to work
+# Both copies share the same strings, so the difference is the node overhead.
+#
+# Run from the repository root:
+#   python3 -m bench.bench_memory
+#   python3 -m bench.bench_memory --sections 5000
+import argparse
+import gc
+import tracemalloc
+
+from src.block_markdown import NEWLINE_LEAF, markdown_to_html_node
+from src.inline_markdown import text_to_textnodes
+from src.leafnode import LeafNode
+from src.parentnode import ParentNode
+from src.textnode import TextNode
+
+
+# A document mixing every block type, with plenty of inline markup and lists
+def fixture_document(sections):
+    blocks = []
+    for i in range(sections):
+        blocks.append(f"## Section {i}")
+        blocks.append(
+            f"Paragraph {i} with **bold**, _italic_, `code`, a [link](/page/{i}) "
+            f"and an ![image](/images/{i}.png) in it."
+        )
+        blocks.append("\n".join(f"- item {j} with [a link](/item/{j})" for j in range(5)))
+        blocks.append("\n".join(f"{j + 1}. step _{j}_" for j in range(3)))
+        blocks.append(f"> quoted line {i}\n> and **another**")
+        blocks.append(f"```\ncode line {i}\n```")
+    return "\n\n".join(blocks)
+
+
+class DictNode():
+    def __init__(self, tag, value, children, props):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictTextNode():
+    def __init__(self, text, text_type, url):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+# Copy a tree into DictNodes, giving every newline leaf its own object as before
+def to_dict_nodes(node):
+    if isinstance(node, ParentNode):
+        children = [to_dict_nodes(c) for c in node.children]
+        return DictNode(node.tag, None, children, node.props)
+    return DictNode(node.tag, node.value, None, node.props)
+
+
+def to_slotted_nodes(node):
+    if isinstance(node, ParentNode):
+        return ParentNode(node.tag, [to_slotted_nodes(c) for c in node.children], node.props)
+    if node is NEWLINE_LEAF:
+        return node
+    return LeafNode(node.tag, node.value, node.props)
+
+
+def count_nodes(node):
+    count = 1
+    for child in node.children or []:
+        count += count_nodes(child)
+    return count
+
+
+# Memory allocated by build() that is still alive once it returns
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure node memory use with tracemalloc")
+    parser.add_argument("--sections", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    markdown = fixture_document(args.sections)
+    paragraphs = [b for b in markdown.split("\n\n") if not b.startswith(("#", "-", ">", "`", "1."))]
+    print(f"document: {len(markdown) / 1024:.0f} KB, {args.sections} sections")
+
+    tree = markdown_to_html_node(markdown)
+    nodes = count_nodes(tree)
+    _, slotted_bytes = measure(lambda: to_slotted_nodes(tree))
+    _, dict_bytes = measure(lambda: to_dict_nodes(tree))
+    report("html nodes", nodes, slotted_bytes, dict_bytes)
+
+    textnodes = [n for p in paragraphs for n in text_to_textnodes(p)]
+    _, slotted_bytes = measure(lambda: [TextNode(n.text, n.text_type, n.url) for n in textnodes])
+    _, dict_bytes = measure(lambda: [DictTextNode(n.text, n.text_type, n.url) for n in textnodes])
+    report("text nodes", len(textnodes), slotted_bytes, dict_bytes)
+
+
+def report(label, count, slotted_bytes, dict_bytes):
+    print(f"{label}: {count}")
+    print(f"  __slots__: {slotted_bytes / 1024:>8.0f} KB {slotted_bytes / count:>6.1f} bytes/node")
+    print(f"  __dict__:  {dict_bytes / 1024:>8.0f} KB {dict_bytes / count:>6.1f} bytes/node")
+    print(f"  saved:     {(dict_bytes - slotted_bytes) / 1024:>8.0f} KB ({1 - slotted_bytes / dict_bytes:.0%})")
+
+if __name__ == "__main__":
+    main()
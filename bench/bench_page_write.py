@@ -0,0 +1,73 @@
+# Memory benchmark for writing one very large page, using tracemalloc.
+#
+# Parses a large generated document once, then measures the extra memory taken
+# while writing it out:
+# - whole strings: to_html() for the body, the template filled in as one
+#   string, then a single write, which is how pages used to be written
+# - streaming: write_page with the body's iter_html() fragments
+# The node tree exists in both cases and isn't counted.
+#
+# Run from the repository root:
+#   python3 -m bench.bench_page_write
+#   python3 -m bench.bench_page_write --sections 100000
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from bench.bench_memory import fixture_document
+from bench.corpus import TEMPLATE
+from src.block_markdown import markdown_to_html_node
+from src.page_writer import write_page
+from src.template import Template
+
+
+def write_whole_strings(root, template, dest_path):
+    html = root.to_html()
+    page = template.render({"Title": "Large page", "Content": html})
+    with open(dest_path, "w") as f:
+        f.write(page)
+
+
+def write_streaming(root, template, dest_path):
+    write_page(dest_path, template, {"Title": "Large page", "Content": root.iter_html()})
+
+
+# Returns (peak bytes allocated above what was already in use, seconds)
+def measure(func, *args):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - baseline, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the memory used to write one large page")
+    parser.add_argument("--sections", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    root = markdown_to_html_node(fixture_document(args.sections))
+    template = Template(TEMPLATE)
+    with tempfile.TemporaryDirectory() as tmp:
+        dest_path = os.path.join(tmp, "index.html")
+        results = []
+        for name, func in (("whole strings", write_whole_strings), ("streaming", write_streaming)):
+            peak, seconds = measure(func, root, template, dest_path)
+            results.append((name, peak, seconds))
+        page_size = os.path.getsize(dest_path)
+
+    print(f"page size: {page_size / 1e6:.1f} MB")
+    print(f"{'writer':<14} {'peak MB':>9} {'seconds':>9}")
+    for name, peak, seconds in results:
+        print(f"{name:<14} {peak / 1e6:>9.2f} {seconds:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Search index benchmark: how long SearchIndex takes to index a synthetic corpus
+# from scratch, to find nothing changed, and to bring itself up to date after a few
+# pages are edited, and how big the shards it writes are.
+#
+# As in a build, the pages are rendered first (untimed) so their Documents are in
+# the parse cache when the index wants them; with --no-parse-cache, SearchIndex
+# parses every page itself and the cold time is mostly parsing.
+#
+# Run from the repository root:
+#   python3 -m bench.bench_search --pages 10000
+#   python3 -m bench.bench_search --pages 10000 --edits 20
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from bench.corpus import add_corpus_arguments, generate_from_args
+from src import parse_cache
+from src.main import generate_pages_recursive
+from src.search_index import SearchIndex
+from src.tree_index import scan_tree
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+# Appends a word no other page has to each of the first count pages, bumping the
+# mtime so the change is seen even on coarse clocks
+def edit_pages(content_dir, count):
+    paths = sorted(entry.path for entry in scan_tree(content_dir).files() if entry.path.endswith(".md"))
+    for number, path in enumerate(paths[:count]):
+        with open(path, "a") as f:
+            f.write(f"\n\nEdited zq{number}x\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def print_report(label, seconds, report):
+    print(f"{label:<14}{seconds * 1000:>10.1f} ms   {len(report.written):>5} written"
+          f"  {len(report.unchanged):>5} unchanged  {len(report.deleted):>3} deleted")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark building and updating the search index")
+    add_corpus_arguments(parser)
+    parser.set_defaults(pages=10000, static_files=0)
+    parser.add_argument("--edits", type=int, default=10, help="pages to edit before the incremental update")
+    parser.add_argument("--no-parse-cache", action="store_true", help="don't render the pages first")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_from_args(root, args)
+        content_dir = os.path.join(root, "content")
+        out_dir = os.path.join(root, "public", "search")
+        if not args.no_parse_cache:
+            parse_cache.configure(os.path.join(root, "cache", "parse"))
+            generate_pages_recursive(content_dir, os.path.join(root, "template.html"), os.path.join(root, "public"))
+        index = SearchIndex(os.path.join(root, "cache", "search.sqlite"), out_dir)
+
+        print(f"{args.pages} pages, {args.edits} edited for the incremental update")
+        print_report("cold", *timed(lambda: index.update(content_dir)))
+        print_report("no changes", *timed(lambda: index.update(content_dir)))
+        edit_pages(content_dir, args.edits)
+        if not args.no_parse_cache:
+            generate_pages_recursive(content_dir, os.path.join(root, "template.html"), os.path.join(root, "public"))
+        print_report("incremental", *timed(lambda: index.update(content_dir)))
+
+        sizes = [os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir)
+                 if name != "index.json"]
+        manifest_size = os.path.getsize(os.path.join(out_dir, "index.json"))
+        print(f"\n{len(sizes)} shards, {sum(sizes) / 1024:.0f} KiB in all"
+              f" (median {statistics.median(sizes) / 1024:.1f} KiB, largest {max(sizes) / 1024:.1f} KiB)")
+        print(f"index.json: {manifest_size / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Benchmark for cold start: how long a fresh interpreter takes to import src.main
+# and to render one page with "render-one", and which imports that time goes to.
+#
+# Each command runs in a new process, so nothing is shared between runs. Bytecode
+# caching follows the environment (PYTHONDONTWRITEBYTECODE), and the fastest run of
+# each is kept. The import breakdown comes from python3 -X importtime.
+#
+# Run from the repository root:
+#   python3 -m bench.bench_startup
+#   python3 -m bench.bench_startup --source content/blog/tom/index.md --runs 20 --top 25
+import argparse
+import subprocess
+import sys
+import time
+
+
+def fastest_ms(command, runs):
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1000
+
+
+# Returns (cumulative microseconds, module) for every import in the command's
+# -X importtime report, slowest first
+def import_times(command):
+    result = subprocess.run(command[:1] + ["-X", "importtime"] + command[1:], check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times.append((int(cumulative), name.rstrip()))
+    times.sort(reverse=True)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cold start of the site generator")
+    parser.add_argument("--source", default="content/index.md", help="page to render with render-one")
+    parser.add_argument("--runs", type=int, default=10, help="keep the fastest of this many runs")
+    parser.add_argument("--top", type=int, default=15, help="show the slowest N imports of render-one")
+    args = parser.parse_args(argv)
+
+    python = sys.executable
+    commands = [
+        ("interpreter", [python, "-c", "pass"]),
+        ("import src.main", [python, "-c", "import src.main"]),
+        ("render-one", [python, "-m", "src.main", "render-one", args.source]),
+    ]
+    print(f"{'command':<16} {'ms':>8}")
+    for name, command in commands:
+        print(f"{name:<16} {fastest_ms(command, args.runs):>8.1f}")
+
+    print()
+    print("slowest imports of render-one (cumulative, including what they import):")
+    for cumulative, name in import_times(commands[-1][1])[:args.top]:
+        print(f"{cumulative / 1000:>8.1f} ms {name}")
+
+
+if __name__ == "__main__":
+    main()
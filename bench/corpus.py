@@ -0,0 +1,176 @@
+# Deterministic synthetic site generator for benchmarks.
+#
+# Writes a content/ tree of markdown pages (spread over nested directories),
+# a static/ tree of assets and a template.html, all derived from a seed so
+# the same arguments always give byte-identical files.
+#
+# Run from the repository root:
+#   python3 -m bench.corpus /tmp/site --pages 1000
+import argparse
+import os
+import random
+
+# How often each block type is picked, relative to the others
+DEFAULT_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "unordered_list": 2,
+    "ordered_list": 1,
+    "quote": 1,
+    "code": 1,
+}
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+WORDS = (
+    "the of and a to in is you that it he was for on are as with his they at be this "
+    "have from or one had by word but not what all were we when your can said there use "
+    "an each which she do how their if will up other about out many then them these so "
+    "ring elf hobbit wizard mountain river shire council sword journey shadow fellowship"
+).split()
+
+
+class CorpusGenerator():
+    def __init__(self, seed=0, mix=None, blocks_per_page=20, links_per_paragraph=1.0,
+                 images_per_page=1, depth=3, fanout=10):
+        self.random = random.Random(seed)
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.blocks_per_page = blocks_per_page
+        self.links_per_paragraph = links_per_paragraph
+        self.images_per_page = images_per_page
+        self.depth = depth
+        self.fanout = fanout
+
+    def words(self, n):
+        return " ".join(self.random.choice(WORDS) for _ in range(n))
+
+    # A run of text with some bold, italic, code and links mixed in
+    def inline(self, n_words):
+        parts = []
+        for _ in range(max(1, n_words // 8)):
+            parts.append(self.words(6))
+            r = self.random.random()
+            if r < 0.15:
+                parts.append(f"**{self.words(2)}**")
+            elif r < 0.30:
+                parts.append(f"_{self.words(2)}_")
+            elif r < 0.40:
+                parts.append(f"`{self.random.choice(WORDS)}()`")
+            if self.random.random() < self.links_per_paragraph / max(1, n_words // 8):
+                parts.append(f"[{self.words(2)}](/{self.random.choice(WORDS)}/{self.random.randrange(1000)})")
+        return " ".join(parts)
+
+    def block(self, kind):
+        if kind == "heading":
+            return "#" * self.random.randint(2, 4) + " " + self.words(4)
+        if kind == "unordered_list":
+            return "\n".join("- " + self.inline(10) for _ in range(self.random.randint(2, 6)))
+        if kind == "ordered_list":
+            return "\n".join(f"{i + 1}. " + self.inline(8) for i in range(self.random.randint(2, 5)))
+        if kind == "quote":
+            return "\n".join("> " + self.inline(12) for _ in range(self.random.randint(1, 3)))
+        if kind == "code":
+            lines = [f"    {self.random.choice(WORDS)} = {self.random.randrange(100)}"
+                     for _ in range(self.random.randint(2, 8))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        return self.inline(self.random.randint(30, 90))
+
+    def page(self, index):
+        kinds = list(self.mix)
+        weights = [self.mix[k] for k in kinds]
+        blocks = [f"# Page {index} {self.words(3)}"]
+        for _ in range(self.images_per_page):
+            blocks.append(f"![{self.words(2)}](/images/img{self.random.randrange(20)}.png)")
+        for kind in self.random.choices(kinds, weights, k=self.blocks_per_page):
+            blocks.append(self.block(kind))
+        return "\n\n".join(blocks) + "\n"
+
+    # Directory (relative to content/) for page number index, e.g. "s3/s1/p42"
+    def page_dir(self, index):
+        parts = []
+        n = index
+        for _ in range(self.depth):
+            parts.append(f"s{n % self.fanout}")
+            n //= self.fanout
+        return os.path.join(*parts, f"p{index}")
+
+    def write(self, root, pages, static_files=20, static_size=64 * 1024):
+        content_dir = os.path.join(root, "content")
+        for i in range(pages):
+            # The first page is the home page
+            page_dir = content_dir if i == 0 else os.path.join(content_dir, self.page_dir(i))
+            _write(os.path.join(page_dir, "index.md"), self.page(i).encode())
+        static_dir = os.path.join(root, "static")
+        _write(os.path.join(static_dir, "index.css"), b"body { font-family: serif; }\n")
+        for i in range(static_files):
+            _write(os.path.join(static_dir, "images", f"img{i}.png"), self.random.randbytes(static_size))
+        _write(os.path.join(root, "template.html"), TEMPLATE.encode())
+        return root
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+# Parses "paragraph=6,code=1" into a mix dict, starting from DEFAULT_MIX
+def parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    if not text:
+        return mix
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"unknown block type '{name}', expected one of {sorted(DEFAULT_MIX)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", default="", help="block type weights, e.g. paragraph=6,code=1")
+    parser.add_argument("--blocks-per-page", type=int, default=20)
+    parser.add_argument("--links-per-paragraph", type=float, default=1.0)
+    parser.add_argument("--images-per-page", type=int, default=1)
+    parser.add_argument("--depth", type=int, default=3, help="directory nesting depth")
+    parser.add_argument("--static-files", type=int, default=20)
+    parser.add_argument("--static-size", type=int, default=64 * 1024, help="bytes per static file")
+
+
+def generate_from_args(root, args):
+    generator = CorpusGenerator(
+        seed=args.seed,
+        mix=parse_mix(args.mix),
+        blocks_per_page=args.blocks_per_page,
+        links_per_paragraph=args.links_per_paragraph,
+        images_per_page=args.images_per_page,
+        depth=args.depth,
+    )
+    return generator.write(root, args.pages, args.static_files, args.static_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic site for benchmarking")
+    parser.add_argument("root", help="directory to write content/, static/ and template.html into")
+    add_corpus_arguments(parser)
+    args = parser.parse_args(argv)
+    generate_from_args(args.root, args)
+    print(f"Wrote {args.pages} pages to '{args.root}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+# asyncio itself is imported where it's used: it takes longer to import than the
+# rest of the generator, and only builds that overlap I/O need it
+
+DEFAULT_IO_JOBS = 16
+
+
+# Runs blocking file I/O from asyncio code on a bounded pool of threads, so reads,
+# writes and copies of many files overlap instead of each waiting its turn:
+#   with IOPool(8) as pool:
+#       text = await pool.run(read, path)
+# At most max_workers calls run at once. The event loop's own thread stays free for
+# CPU-bound work such as parsing.
+class IOPool():
+    def __init__(self, max_workers=DEFAULT_IO_JOBS):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="io")
+
+    async def run(self, func, *args):
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+# Awaits handle(item) for every item, with at most limit of them in progress at once,
+# which also bounds how many files' contents are held in memory.
+# Returns a result for every item, in order; an item that failed gets its exception
+# instead, so one failure doesn't stop the others.
+async def map_limited(handle, items, limit):
+    import asyncio
+    semaphore = asyncio.Semaphore(limit)
+
+    async def one(item):
+        async with semaphore:
+            return await handle(item)
+
+    return await asyncio.gather(*(one(item) for item in items), return_exceptions=True)
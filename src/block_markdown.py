@@ -5,127 +5,198 @@ from src.inline_markdown import text_to_textnodes
 from src.textnode import text_node_to_html_node, TextNode
 from src.parentnode import ParentNode
 from src.leafnode import LeafNode
-import inspect
+from src.inline_cache import inline_cache
+
+# Every list item is followed by a newline. Leaf nodes are never changed once
+# built, so all lists share this one instead of each creating their own.
+NEWLINE_LEAF = LeafNode(tag=None, value="\n")
 
 
 def text_to_children(text):
     if not isinstance(text, str):
         raise TypeError(f"text_to_children expected str, got {type(text)}: {text}")
-    
+
+    # Text seen before (on this page or an earlier one) doesn't need parsing again
+    cached = inline_cache.get(text)
+    if cached is not None:
+        return cached
+
     # 1) parse inline markdown into TextNodes
     textnodes = text_to_textnodes(text)
     
     # 2) convert each TextNode into an HTMLNode
     children = []
     for tn in textnodes:
-        #print("DEBUG tn type:", type(tn))  # <-- add
-        #print("DEBUG TextNode id:", id(TextNode), "module:", inspect.getmodule(TextNode))
-        #print("DEBUG tn class id:", id(tn.__class__), "module:", inspect.getmodule(tn.__class__))
         if not isinstance(tn, TextNode):
             raise TypeError(f"Expected TextNode, got {type(tn)}")       
         child = text_node_to_html_node(tn)
         children.append(child)
+    inline_cache.put(text, children)
     # 3) return the list [HTMLNode]
     return children
 
 # Converts a full markdown document into a single parent HTMLNode
 # The one parent HTMLNode should contain many child HTMLNode objects representing
 # the nested elements.
+# markdown can be a string, or anything that yields lines, e.g. an open file,
+# in which case the document is read one block at a time.
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
     children = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        # CODE
-        if block_type == BlockType.CODE:
-            lines = block.splitlines()
-            inner = "\n".join(lines[1:-1]) + "\n"
-            codeleaf = LeafNode(tag="code", value=inner)
-            node = ParentNode(tag="pre", children=[codeleaf])
-            children.append(node)
-        # ORDERED
-        if block_type == BlockType.ORDERED_LIST:
-            rawlines = block.splitlines()
-            li_nodes = []
-            for line in rawlines:
-                s = line.lstrip()
-                if ". " in s:
-                    num, rest = s.split(". ", 1)
-                    if num.isdigit():
-                        s = rest
-                else:
-                    s = line
-                if not s:
-                    continue
-                li = ParentNode("li", children=text_to_children(s))
-                li_nodes.append(li)
-                li_nodes.append(LeafNode(tag=None,value="\n"))
-            node = ParentNode(tag="ol", children=li_nodes)
-            children.append(node)            
-        # UNORDERED
-        if block_type == BlockType.UNORDERED_LIST:
-            rawlines = block.splitlines()
-            li_nodes = []
-            for line in rawlines:
-                if line.startswith("-"):
-                    line = line[1:]
-                    if line.startswith(" "):
-                        line = line[1:]
-                if not line:
-                    continue
-                li = ParentNode("li", children=text_to_children(line))
-                li_nodes.append(li)
-                li_nodes.append(LeafNode(tag=None,value="\n"))
-            node = ParentNode(tag="ul", children=li_nodes)
-            children.append(node)
-        # QUOTE
-        if block_type == BlockType.QUOTE:
-            rawlines = block.splitlines()
-            cleaned = []
-            for line in rawlines:
-                if line.startswith(">"):
-                    line = line[1:]
-                    if line.startswith(" "):
-                        line = line[1:]
-                cleaned.append(line)
-            inner = "\n".join(cleaned)
-            node = ParentNode(tag="blockquote", children=text_to_children(inner))
-            children.append(node)
-        # HEADING
-        elif block_type == BlockType.HEADING:
-            leading_pounds = 0
-            for c in block:
-                if c == "#":
-                    leading_pounds += 1
-                else:
-                    break
-            level = min(leading_pounds, 6)
-            text = block[leading_pounds:]
-            if text.startswith(" "): text = text[1:]
-            tag = f"h{level}"
-            node = ParentNode(tag=tag, children=text_to_children(text))
-            children.append(node)
-        # PARAGRAPH
-        elif block_type == BlockType.PARAGRAPH:
-            node = ParentNode(tag="p",
-                            children=text_to_children(block))
-            children.append(node)
+    for lines in iter_block_lines(markdown):
+        # Each block is split into lines and classified exactly once
+        block_type = lines_to_block_type(lines)
+        children.append(block_to_html_node(block_type, lines))
 
     parent = ParentNode(tag="div", children=children)
     return parent
+
+
+# Builds the HTMLNode for one block, given its type and its lines
+def block_to_html_node(block_type, lines):
+    # CODE
+    if block_type == BlockType.CODE:
+        inner = "\n".join(lines[1:-1]) + "\n"
+        codeleaf = LeafNode(tag="code", value=inner)
+        return ParentNode(tag="pre", children=[codeleaf])
+    # ORDERED
+    if block_type == BlockType.ORDERED_LIST:
+        li_nodes = []
+        for line in lines:
+            s = line.lstrip()
+            if ". " in s:
+                num, rest = s.split(". ", 1)
+                if num.isdigit():
+                    s = rest
+            else:
+                s = line
+            if not s:
+                continue
+            li = ParentNode("li", children=text_to_children(s))
+            li_nodes.append(li)
+            li_nodes.append(NEWLINE_LEAF)
+        return ParentNode(tag="ol", children=li_nodes)
+    # UNORDERED
+    if block_type == BlockType.UNORDERED_LIST:
+        li_nodes = []
+        for line in lines:
+            if line.startswith("-"):
+                line = line[1:]
+                if line.startswith(" "):
+                    line = line[1:]
+            if not line:
+                continue
+            li = ParentNode("li", children=text_to_children(line))
+            li_nodes.append(li)
+            li_nodes.append(NEWLINE_LEAF)
+        return ParentNode(tag="ul", children=li_nodes)
+    # QUOTE
+    if block_type == BlockType.QUOTE:
+        cleaned = []
+        for line in lines:
+            if line.startswith(">"):
+                line = line[1:]
+                if line.startswith(" "):
+                    line = line[1:]
+            cleaned.append(line)
+        inner = "\n".join(cleaned)
+        return ParentNode(tag="blockquote", children=text_to_children(inner))
+    # HEADING
+    if block_type == BlockType.HEADING:
+        first = lines[0]
+        leading_pounds = len(first) - len(first.lstrip("#"))
+        level = min(leading_pounds, 6)
+        text = "\n".join(lines)[leading_pounds:]
+        if text.startswith(" "): text = text[1:]
+        tag = f"h{level}"
+        return ParentNode(tag=tag, children=text_to_children(text))
+    # PARAGRAPH
+    return ParentNode(tag="p", children=text_to_children("\n".join(lines)))
     
 
 # Block markdown is just the separation of different sections of an entire document
 # In well-written markdown, blocks are separated by a single blank line
 def markdown_to_blocks(markdown):
-    blocks = markdown.split('\n\n')
-    new_blocks = []
-    for block in blocks:
-        b = block.strip()
-        if len(b) == 0:
+    return ["\n".join(lines) for lines in iter_block_lines(markdown)]
+
+
+# Reads markdown line by line and yields each block as a list of its lines.
+#
+# Blocks are separated by blank (or whitespace only) lines. A block is stripped
+# like a string would be: leading whitespace of its first line and trailing
+# whitespace of its last line are removed.
+# A fenced code block runs until its closing fence, blank lines included. If the
+# fence is never closed, its lines are split into blocks as usual.
+#
+# markdown can be a string or any iterable of lines, such as an open file.
+# With fences=False, code fences get no special treatment.
+# If starts is a list, the number of the line each block starts on (counting from
+# first_line) is appended to it just before the block is yielded.
+def iter_block_lines(markdown, fences=True, starts=None, first_line=1):
+    if isinstance(markdown, str):
+        lines = _iter_lines(markdown)
+    else:
+        lines = (line.rstrip("\r\n") for line in markdown)
+
+    block = []
+    start = first_line
+    in_fence = False
+    for number, line in enumerate(lines, first_line):
+        if in_fence:
+            block.append(line)
+            if line.rstrip() == "```":
+                in_fence = False
             continue
-        new_blocks.append(b)
-    return new_blocks
+        if line.strip() == "":
+            if block:
+                if starts is not None:
+                    starts.append(start)
+                yield _strip_block(block)
+                block = []
+            continue
+        if not block:
+            start = number
+        block.append(line)
+        if fences and len(block) == 1 and _is_fence_opener(line):
+            in_fence = True
+
+    if in_fence:
+        # Unclosed fence: fall back to splitting on blank lines
+        yield from iter_block_lines(block, fences=False, starts=starts, first_line=start)
+    elif block:
+        if starts is not None:
+            starts.append(start)
+        yield _strip_block(block)
+
+
+# Yields the lines of a string without building a list of all of them first
+def _iter_lines(text):
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:].rstrip("\r")
+            return
+        yield text[start:end].rstrip("\r")
+        start = end + 1
+
+
+# ``` with an optional info string, e.g. ```python; a line that closes its own
+# backticks (```inline``` text) is a paragraph, not a fence
+def _is_fence_opener(line):
+    stripped = line.lstrip()
+    return stripped.startswith("```") and "```" not in stripped[3:]
+
+
+def _strip_block(block):
+    block[0] = block[0].lstrip()
+    block[-1] = block[-1].rstrip()
+    return block
+
+# One to six #s, a space, then the heading text
+_HEADING_RE = re.compile(r"#{1,6}\s\S")
+
+# "1. ", "2. ", ... for the first items of ordered lists, built once
+_ORDERED_NUMBERS = [f"{n}. " for n in range(100)]
 
 class BlockType(Enum):
     PARAGRAPH="paragraph"
@@ -140,37 +211,39 @@ def block_to_block_type(markdown_block):
     if markdown_block is None or markdown_block == "":
         raise ValueError("markdown block is None or a blank string")
 
-    lines = markdown_block.splitlines()
+    return lines_to_block_type(markdown_block.splitlines())
 
-    # Check for headings
-    headings = re.findall(r"^(#{1,6})\s[\S]+", lines[0])
 
-    if len(headings) > 0:
-        return BlockType.HEADING
-    
-    if len(lines) >= 2:
-        if lines[0].startswith("```") and lines[-1] == "```":
+# Same as block_to_block_type, for a block that has already been split into lines.
+#
+# Every block type but a paragraph is recognised by its first character, so only
+# blocks that start with one of them need any further checks.
+def lines_to_block_type(lines):
+    first = lines[0]
+    marker = first[:1]
+    if marker == "#":
+        if _HEADING_RE.match(first):
+            return BlockType.HEADING
+        return BlockType.PARAGRAPH
+    if marker == "`":
+        if len(lines) >= 2 and first.startswith("```") and lines[-1] == "```":
             return BlockType.CODE
-    
-    is_quote = True
-    is_unordered = True
-    is_ordered = True
-    expected = 1
-
-    for line in lines:
-        is_quote &= line.startswith(">")
-        is_unordered &= line.startswith("- ")
-        if is_ordered:
-            if line.startswith(f"{expected}. "):
-                expected += 1
-            else:
-                is_ordered = False
-
-    if is_quote:
+        return BlockType.PARAGRAPH
+    if marker == ">":
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH
         return BlockType.QUOTE
-    elif is_unordered:
+    if marker == "-":
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
         return BlockType.UNORDERED_LIST
-    elif is_ordered:
+    if marker == "1":
+        # Items have to be numbered 1, 2, 3, ...
+        for expected, line in enumerate(lines, 1):
+            number = _ORDERED_NUMBERS[expected] if expected < len(_ORDERED_NUMBERS) else f"{expected}. "
+            if not line.startswith(number):
+                return BlockType.PARAGRAPH
         return BlockType.ORDERED_LIST
-    else:
-        return BlockType.PARAGRAPH
+    return BlockType.PARAGRAPH
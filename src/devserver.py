@@ -0,0 +1,392 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from src.manifest import remove_empty_parents
+from src.render import generate_page, generate_pages_recursive
+from src.static_sync import copy_file, sync_directory
+from src.tree_index import scan_tree
+
+logger = logging.getLogger(__name__)
+
+# Served to the browser to listen for rebuilds when live reload is on
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + LIVE_RELOAD_PATH + "\")"
+    ".onmessage = function () { location.reload(); };</script>"
+)
+
+# Changes that arrive within this many seconds of each other are rebuilt together
+DEBOUNCE_SECONDS = 0.02
+
+
+# Keeps the generated site in public/ up to date with content/, static/ and the template,
+# rebuilding only what a change affects
+# With a metadata_index_path, the listing pages are kept up to date as well, and with a
+# search_index_path, the search index in public/search/.
+class SiteBuilder():
+    def __init__(self, content_dir, static_dir, template_path, public_dir, static_state_path,
+                 metadata_index_path=None, search_index_path=None):
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.template_path = os.path.abspath(template_path)
+        self.public_dir = os.path.abspath(public_dir)
+        self.static_state_path = static_state_path
+        self.metadata = None
+        if metadata_index_path is not None:
+            from src.metadata_index import MetadataIndex
+            self.metadata = MetadataIndex(metadata_index_path)
+        self.search = None
+        if search_index_path is not None:
+            from src.search_index import SearchIndex
+            self.search = SearchIndex(search_index_path, os.path.join(self.public_dir, "search"))
+
+    def build_all(self):
+        os.makedirs(self.public_dir, exist_ok=True)
+        sync_directory(self.static_dir, self.public_dir, self.static_state_path)
+        generate_pages_recursive(self.content_dir, self.template_path, self.public_dir)
+        self._rebuild_listings()
+        self._rebuild_search()
+
+    # Rebuild whatever depends on the changed paths. Returns the list of public
+    # files that were written or removed.
+    def rebuild(self, changed_paths):
+        if self.template_path in changed_paths:
+            self.build_all()
+            return [self.public_dir]
+        touched = []
+        pages_changed = False
+        for path in sorted(changed_paths):
+            if _is_within(path, self.content_dir):
+                touched.extend(self._rebuild_page(path))
+                # Front matter such as tags can change without the page itself changing
+                pages_changed = pages_changed or path.endswith(".md")
+            elif _is_within(path, self.static_dir):
+                touched.extend(self._rebuild_asset(path))
+        if pages_changed:
+            touched.extend(self._rebuild_listings())
+            touched.extend(self._rebuild_search())
+        return touched
+
+    # Returns the listing pages that were written or removed
+    def _rebuild_listings(self):
+        if self.metadata is None:
+            return []
+        from src.listings import generate_listings
+        self.metadata.update(self.content_dir)
+        report = generate_listings(self.metadata, self.content_dir, self.template_path, self.public_dir)
+        return report.written + report.deleted
+
+    # Returns the search index files that were written or removed
+    def _rebuild_search(self):
+        if self.search is None:
+            return []
+        report = self.search.update(self.content_dir)
+        return report.written + report.deleted
+
+    # The page a markdown file is generated to
+    def page_dest(self, source_path):
+        rel_dir = os.path.relpath(os.path.dirname(source_path), self.content_dir)
+        return os.path.normpath(os.path.join(self.public_dir, rel_dir, "index.html"))
+
+    def _rebuild_page(self, source_path):
+        if not source_path.endswith(".md"):
+            return []
+        dest = self.page_dest(source_path)
+        if os.path.isfile(source_path):
+            # Saving a file without changing it gives nothing to reload
+            if not generate_page(source_path, self.template_path, dest, self.public_dir):
+                return []
+        elif os.path.isfile(dest):
+            os.remove(dest)
+            remove_empty_parents(os.path.dirname(dest), self.public_dir)
+        else:
+            return []
+        return [dest]
+
+    def _rebuild_asset(self, source_path):
+        dest = os.path.join(self.public_dir, os.path.relpath(source_path, self.static_dir))
+        if os.path.isfile(source_path):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            copy_file(source_path, dest)
+        elif os.path.isfile(dest):
+            os.remove(dest)
+            remove_empty_parents(os.path.dirname(dest), self.public_dir)
+        else:
+            return []
+        return [dest]
+
+
+def _is_within(path, directory):
+    return path == directory or path.startswith(directory + os.sep)
+
+
+# Watches files and directories by comparing mtimes and sizes every interval seconds.
+# Works everywhere; InotifyWatcher is used instead where it's available.
+class PollingWatcher():
+    def __init__(self, paths, interval=0.05):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for root in self.paths:
+            if os.path.isfile(root):
+                st = os.stat(root)
+                snapshot[root] = (st.st_mtime_ns, st.st_size)
+                continue
+            if not os.path.isdir(root):
+                continue
+            for entry in scan_tree(root).files():
+                snapshot[entry.path] = (entry.mtime_ns, entry.size)
+        return snapshot
+
+    # Block until something changes (or timeout seconds pass), then return the set
+    # of changed paths: added, modified or removed
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval if deadline is None else max(0, min(self.interval, deadline - time.monotonic())))
+            snapshot = self._scan()
+            changed = set(
+                path for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            )
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+# Linux inotify through ctypes, so changes are seen as soon as they're written.
+# Raises OSError from the constructor if inotify isn't available.
+class InotifyWatcher():
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    _EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, paths):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._libc = libc
+        self._fd = libc.inotify_init1(self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor -> directory it watches
+        self._dirs = {}
+        # Directories watched with everything in them
+        self._tree_dirs = set()
+        # Files watched on their own, by watching the directory they're in
+        self._files = set()
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                self._watch_tree(path)
+            else:
+                self._files.add(path)
+                self._add_watch(os.path.dirname(path))
+
+    def _add_watch(self, dir_path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), self.WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for '{dir_path}'")
+        self._dirs[wd] = dir_path
+
+    def _watch_tree(self, root):
+        for dirpath, _, _ in os.walk(root):
+            self._tree_dirs.add(dirpath)
+            self._add_watch(dirpath)
+
+    def _read_events(self):
+        changed = set()
+        data = os.read(self._fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            dir_path = self._dirs.get(wd)
+            if dir_path is None or not name:
+                continue
+            path = os.path.join(dir_path, os.fsdecode(name))
+            if dir_path not in self._tree_dirs and path not in self._files:
+                continue
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # Watch the new directory, and pick up anything already written into it
+                    self._watch_tree(path)
+                    for dirpath, _, filenames in os.walk(path):
+                        changed.update(os.path.join(dirpath, f) for f in filenames)
+                continue
+            changed.add(path)
+        return changed
+
+    # Block until something changes (or timeout seconds pass), then return the set
+    # of changed paths
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            changed = self._read_events() if ready else set()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_watcher(paths, polling=False):
+    if not polling:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+
+# Tells every browser listening on LIVE_RELOAD_PATH to reload
+class LiveReload():
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, seen_version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != seen_version, timeout)
+            return self.version
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    live_reload = None
+
+    def do_GET(self):
+        if self.live_reload is not None:
+            if self.path == LIVE_RELOAD_PATH:
+                self._stream_reload_events()
+                return
+            html_path = self._html_file()
+            if html_path is not None:
+                self._send_html_with_reload_script(html_path)
+                return
+        super().do_GET()
+
+    # The html file a request maps to, if it maps to one
+    def _html_file(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                # Let the base handler send its redirect to the trailing-slash URL
+                return None
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            return path
+        return None
+
+    def _send_html_with_reload_script(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        script = LIVE_RELOAD_SCRIPT.encode()
+        index = body.rfind(b"</body>")
+        body = body + script if index == -1 else body[:index] + script + body[index:]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_reload_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        version = self.live_reload.version
+        try:
+            while True:
+                new_version = self.live_reload.wait(version, timeout=15)
+                if new_version != version:
+                    self.wfile.write(b"data: reload\n\n")
+                    version = new_version
+                else:
+                    # Comment line to keep the connection alive
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+# Start serving public_dir in a background thread. Returns the server.
+def start_server(public_dir, port, live_reload=None, host=""):
+    handler = partial(type("Handler", (DevRequestHandler,), {"live_reload": live_reload}),
+                      directory=os.path.abspath(public_dir))
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# Build the site once, serve it, and (with watch=True) keep it rebuilt as files change
+def serve(builder, port, watch=True, live_reload=True, polling=False):
+    builder.build_all()
+    reload = LiveReload() if live_reload else None
+    server = start_server(builder.public_dir, port, reload)
+    logger.info("Serving '%s' at http://localhost:%d/", builder.public_dir, server.server_address[1])
+    try:
+        if not watch:
+            threading.Event().wait()
+        watcher = make_watcher([builder.content_dir, builder.static_dir, builder.template_path], polling)
+        logger.info("Watching for changes with %s", type(watcher).__name__)
+        while True:
+            changed = watcher.wait()
+            # Editors often write a file in several steps; gather those into one rebuild
+            while True:
+                more = watcher.wait(DEBOUNCE_SECONDS)
+                if not more:
+                    break
+                changed |= more
+            started = time.perf_counter()
+            try:
+                touched = builder.rebuild(changed)
+            except Exception as e:
+                logger.error("Rebuild failed: %s: %s", type(e).__name__, e)
+                continue
+            if touched:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                for path in touched:
+                    logger.info("Rebuilt '%s'", os.path.relpath(path))
+                logger.info("Rebuild took %.1f ms", elapsed_ms)
+                if reload is not None:
+                    reload.notify()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
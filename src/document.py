@@ -0,0 +1,247 @@
+import re
+
+from src.block_markdown import BlockType, block_to_html_node, iter_block_lines, lines_to_block_type
+from src.front_matter import split_front_matter
+from src.parentnode import ParentNode
+
+# Runs of anything but letters, digits, _ and - become a single - in anchors
+_ANCHOR_STRIP_RE = re.compile(r"[^\w\- ]+")
+_ANCHOR_SPACE_RE = re.compile(r"[\s\-]+")
+# Search terms: runs of two or more letters, digits or _
+_TERM_RE = re.compile(r"\w\w+")
+# A term in a heading counts this many times over
+HEADING_TERM_WEIGHT = 3
+
+
+# One heading of a document. anchor is the id it's given in the page, so it can be
+# linked to as #anchor.
+class Heading():
+    __slots__ = ("level", "text", "anchor")
+
+    def __init__(self, level, text, anchor):
+        self.level = level
+        self.text = text
+        self.anchor = anchor
+
+    def __eq__(self, other):
+        return (self.level, self.text, self.anchor) == (other.level, other.text, other.anchor)
+
+    def __repr__(self):
+        return f"Heading({self.level}, {self.text!r}, {self.anchor!r})"
+
+
+# A parsed markdown document: the body tree along with what was learned about the
+# page while it was being built, so nothing needs to scan the source again.
+# - root: the body, as a <div> of block nodes, with an id on every heading
+# - meta: the page's front matter, as a dict
+# - title: the front matter's title, or else the text of the first h1, or None
+# - headings: every heading in order, as Headings
+# - word_count: words of text in the body, code included
+# - links: (url, text, line) of every link, in order, where line is the line of the
+#   source file it's on (front matter included)
+# - images: (src, alt, line) of every image, in order
+# - text: the plain text of the body, a line per block
+# - terms: {term: weight} of the lowercased words in the text, for searching;
+#   a word's weight is how often it appears, with headings counting extra.
+#   Worked out from text the first time it's asked for, so parsing doesn't pay
+#   for it unless something needs it.
+#
+# A Document read back from the parse cache has everything but root and text.
+class Document():
+    def __init__(self, root=None, title=None, headings=None, word_count=0, links=None, images=None, meta=None,
+                 text="", terms=None):
+        self.root = root
+        self.meta = meta if meta is not None else {}
+        self.text = text
+        self._terms = terms
+        self.title = title
+        self.headings = headings if headings is not None else []
+        self.word_count = word_count
+        self.links = links if links is not None else []
+        self.images = images if images is not None else []
+
+    @property
+    def terms(self):
+        if self._terms is None:
+            terms = {}
+            for term in _TERM_RE.findall(self.text.lower()):
+                terms[term] = terms.get(term, 0) + 1
+            for heading in self.headings:
+                for term in _TERM_RE.findall(heading.text.lower()):
+                    terms[term] = terms.get(term, 0) + HEADING_TERM_WEIGHT - 1
+            self._terms = terms
+        return self._terms
+
+    # Minutes it takes to read the page, at words_per_minute, rounded up
+    def reading_time(self, words_per_minute=200):
+        return max(1, -(-self.word_count // words_per_minute))
+
+    # A nested <ul> linking to every heading below the title, e.g.
+    #   <ul><li><a href="#intro">Intro</a><ul><li>...</li></ul></li></ul>
+    # or "" if there are none
+    def toc_html(self):
+        headings = [h for h in self.headings if h.level > 1]
+        if not headings:
+            return ""
+        parts = []
+        # Levels of the lists that are open, innermost last
+        levels = []
+        for heading in headings:
+            if not levels or heading.level > levels[-1]:
+                parts.append("<ul>")
+                levels.append(heading.level)
+            else:
+                parts.append("</li>")
+                # Close lists deeper than this heading, but never the outermost one
+                while len(levels) > 1 and heading.level < levels[-1]:
+                    levels.pop()
+                    parts.append("</ul></li>")
+            parts.append(f'<li><a href="#{heading.anchor}">{heading.text}</a>')
+        parts.append("</li></ul>" * len(levels))
+        return "".join(parts)
+
+    # Everything but root, as JSON-compatible values
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "headings": [[h.level, h.text, h.anchor] for h in self.headings],
+            "word_count": self.word_count,
+            "links": [list(link) for link in self.links],
+            "images": [list(image) for image in self.images],
+            "meta": self.meta,
+            "terms": self.terms,
+        }
+
+    @classmethod
+    def from_dict(cls, data, root=None):
+        return cls(
+            root=root,
+            title=data["title"],
+            headings=[Heading(*h) for h in data["headings"]],
+            word_count=data["word_count"],
+            links=[tuple(link) for link in data["links"]],
+            images=[tuple(image) for image in data["images"]],
+            meta=data["meta"],
+            terms=data["terms"],
+        )
+
+    def __repr__(self):
+        return (f"Document(title={self.title!r}, headings={len(self.headings)}, words={self.word_count}, "
+                f"links={len(self.links)}, images={len(self.images)})")
+
+
+# GitHub style: lowercase, punctuation dropped and spaces turned into -, e.g.
+# "My favorite characters (in order)" -> "my-favorite-characters-in-order"
+def slugify(text):
+    return _ANCHOR_SPACE_RE.sub("-", _ANCHOR_STRIP_RE.sub("", text.lower())).strip("-")
+
+
+# Parses markdown (a string, or anything that yields lines) into a Document in one
+# pass: each block's node is built and then looked over for headings, words, links
+# and images straight away, while it's still the only part of the page at hand.
+#
+# Front matter is split off first. The body is the same tree markdown_to_html_node
+# builds from the rest, except that headings get an id to link to.
+def parse_document(markdown):
+    meta, markdown, front_matter_lines = split_front_matter(markdown)
+    collector = _Collector()
+    children = []
+    starts = []
+    for lines in iter_block_lines(markdown, starts=starts, first_line=front_matter_lines + 1):
+        block_type = lines_to_block_type(lines)
+        node = block_to_html_node(block_type, lines)
+        collector.add(block_type, node, lines, starts[-1])
+        children.append(node)
+    document = collector.document(ParentNode(tag="div", children=children))
+    document.meta = meta
+    if "title" in meta:
+        document.title = str(meta["title"])
+    return document
+
+
+# A Document for a page built from nodes instead of markdown, such as a listing page.
+# blocks are (BlockType, node) pairs, looked over the way parse_document looks over
+# the blocks it parses, so headings get their ids and the first h1 is the title.
+def document_from_blocks(blocks):
+    collector = _Collector()
+    children = []
+    for block_type, node in blocks:
+        collector.add(block_type, node)
+        children.append(node)
+    return collector.document(ParentNode(tag="div", children=children))
+
+
+class _Collector():
+    def __init__(self):
+        self.title = None
+        self.headings = []
+        self.word_count = 0
+        self.links = []
+        self.images = []
+        # (links or images, target, text) found in the block being added
+        self.pending = []
+        self.anchors = set()
+        self.texts = []
+
+    # lines are the block's source lines, the first of them being line first_line
+    def add(self, block_type, node, lines=(), first_line=1):
+        text = self._walk(node)
+        if self.pending:
+            self._add_references(lines, first_line)
+        self.texts.append(text)
+        # Counted the way wc -w does
+        self.word_count += len(text.split())
+        if block_type == BlockType.HEADING:
+            level = int(node.tag[1])
+            heading_text = " ".join(text.split())
+            anchor = self._anchor(heading_text)
+            # A fresh node for every block, though its children may be shared
+            node.props = {"id": anchor}
+            self.headings.append(Heading(level, heading_text, anchor))
+            if level == 1 and self.title is None:
+                self.title = heading_text
+
+    # Returns the text under a block's node, recording its links and images on the way.
+    # Inline content is all leaves, so a block is never more than two levels deep:
+    # leaves directly under it, or under its list items (or <pre>'s <code>).
+    def _walk(self, node):
+        parts = []
+        for child in node.children:
+            leaves = child.children if child.children is not None else (child,)
+            for leaf in leaves:
+                tag = leaf.tag
+                if tag == "a":
+                    self.pending.append((self.links, leaf.props["href"], leaf.value))
+                elif tag == "img":
+                    self.pending.append((self.images, leaf.props["src"], leaf.props["alt"]))
+                parts.append(leaf.value)
+        # Text nodes carry their own spacing, and list items are separated by newlines
+        return "".join(parts)
+
+    # Adds the links and images _walk found to links and images, with the line each
+    # is on, found by looking for their targets in the block's lines in order
+    def _add_references(self, lines, first_line):
+        index, column = 0, 0
+        for references, target, text in self.pending:
+            for i in range(index, len(lines)):
+                found = lines[i].find(target, column if i == index else 0)
+                if found != -1:
+                    index, column = i, found + len(target)
+                    break
+            references.append((target, text, first_line + index))
+        self.pending.clear()
+
+    # Repeated headings get -1, -2, ... added to their anchors
+    def _anchor(self, text):
+        base = slugify(text) or "section"
+        anchor = base
+        n = 1
+        while anchor in self.anchors:
+            anchor = f"{base}-{n}"
+            n += 1
+        self.anchors.add(anchor)
+        return anchor
+
+    def document(self, root):
+        return Document(root, self.title, self.headings, self.word_count, self.links, self.images,
+                        text="\n".join(self.texts))
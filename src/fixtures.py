@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+
+# For tests that work on files. setUp makes an empty directory, self.root, which is
+# removed again after the test. write(), read() and path() take paths relative to
+# base_dir under it, which is self.root itself unless a test class sets base_dir
+# (e.g. to "content").
+#
+# Mix it in ahead of unittest.TestCase, and call super().setUp() first thing in setUp.
+class TempTreeMixin():
+    base_dir = ""
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+
+    def path(self, rel_path):
+        return os.path.join(self.root, self.base_dir, rel_path)
+
+    # Returns the file's full path. With an mtime (in nanoseconds), the file gets it.
+    def write(self, rel_path, text, mtime=None):
+        path = self.path(rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+        return path
+
+    def read(self, rel_path):
+        with open(self.path(rel_path)) as f:
+            return f.read()
@@ -0,0 +1,102 @@
+import itertools
+import json
+
+FENCE = "---"
+
+
+# Front matter is a YAML-style block at the very top of a page, between two --- lines:
+#   ---
+#   title: Why Tom Bombadil Was a Mistake
+#   date: 2024-03-01
+#   tags: [tolkien, opinion]
+#   draft: false
+#   ---
+# Only the part of YAML pages need is understood: one key: value per line, where a
+# value is a string (quoted or not), a number, true/false, a [a, b] list, or empty
+# with "- item" lines under it forming a list. Lines starting with # are comments.
+# Dates are kept as the strings they're written as, so they sort as text.
+#
+# Returns the values as a dict. Raises ValueError naming the line for anything else.
+def parse_front_matter(lines, first_line=2):
+    meta = {}
+    list_key = None
+    for number, line in enumerate(lines, first_line):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") or stripped == "-":
+            if list_key is None:
+                raise ValueError(f"front matter line {number}: list item without a key: {line!r}")
+            meta[list_key].append(_scalar(stripped[1:].strip()))
+            continue
+        key, sep, value = line.partition(":")
+        key = key.strip()
+        if not sep or not key or key != line[:len(key)]:
+            raise ValueError(f"front matter line {number}: expected 'key: value', got {line!r}")
+        value = value.strip()
+        if value:
+            meta[key] = _value(value)
+            list_key = None
+        else:
+            meta[key] = []
+            list_key = key
+    return meta
+
+
+def _value(text):
+    if text.startswith("[") and text.endswith("]"):
+        inner = text[1:-1].strip()
+        return [_scalar(item.strip()) for item in inner.split(",")] if inner else []
+    return _scalar(text)
+
+
+def _scalar(text):
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        if text[0] == '"':
+            return json.loads(text)
+        return text[1:-1].replace("''", "'")
+    lowered = text.lower()
+    if lowered in ("true", "yes"):
+        return True
+    if lowered in ("false", "no"):
+        return False
+    for number in (int, float):
+        try:
+            return number(text)
+        except ValueError:
+            pass
+    return text
+
+
+# Splits the front matter off the top of markdown. Returns (meta, body, lines), where
+# lines is how many lines the front matter took up (0 if there was none), so line
+# numbers in body can be mapped back to the file.
+# markdown can be a string, or anything that yields lines, in which case body is an
+# iterator over the rest of them.
+# A --- on the first line that's never closed isn't front matter; the markdown is
+# returned as it was.
+def split_front_matter(markdown):
+    if isinstance(markdown, str):
+        if not markdown.startswith(FENCE):
+            return {}, markdown, 0
+        lines = markdown.split("\n")
+        if lines[0].rstrip() != FENCE:
+            return {}, markdown, 0
+        for end in range(1, len(lines)):
+            if lines[end].rstrip() == FENCE:
+                meta = parse_front_matter(lines[1:end])
+                return meta, "\n".join(lines[end + 1:]), end + 1
+        return {}, markdown, 0
+
+    lines = iter(markdown)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(()), 0
+    if first.rstrip() != FENCE:
+        return {}, itertools.chain([first], lines), 0
+    head = []
+    for line in lines:
+        if line.rstrip() == FENCE:
+            return parse_front_matter(head), lines, len(head) + 2
+        head.append(line)
+    return {}, itertools.chain([first], head), 0
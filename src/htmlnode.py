@@ -1,4 +1,8 @@
 class HTMLNode():
+    # Documents are made of a very large number of nodes, so they don't get a __dict__.
+    # Subclasses must declare their own (empty) __slots__ to keep it that way.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag = None, value = None, children = None, props = None):
         self.tag = tag
         self.value = value
@@ -8,6 +12,11 @@ class HTMLNode():
     def to_html(self):
         raise NotImplementedError("Child classes will override this method to render themselves as HTML")
 
+    # Yields the rendered HTML in fragments, so it can be written out piece by piece.
+    # Child classes that can stream override this; by default it's the whole to_html() at once.
+    def iter_html(self):
+        yield self.to_html()
+
     def props_to_html(self):
         ret_str = ""
         if not self.props:
@@ -0,0 +1,112 @@
+import json
+import os
+from collections import OrderedDict
+
+from src.leafnode import LeafNode
+from src.manifest import code_version
+from src.page_writer import atomic_open
+
+# Bump this whenever the on-disk layout changes in an incompatible way
+INLINE_CACHE_FORMAT = 1
+
+DEFAULT_MAXSIZE = 4096
+
+
+# Least recently used cache of inline markdown already turned into nodes, keyed by the
+# raw text, so boilerplate repeated across pages (footers, disclaimers, list items) is
+# only parsed once.
+#
+# The cached nodes are LeafNodes, which are never changed once built, so every hit
+# hands out the same node objects (in a new list) instead of copies.
+# A maxsize of 0 turns the cache off.
+class InlineCache():
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Where entries were loaded from, if anywhere
+        self.path = None
+
+    # The cached nodes for text as a new list, or None
+    def get(self, text):
+        if self.maxsize <= 0:
+            return None
+        nodes = self.entries.get(text)
+        if nodes is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(text)
+        self.hits += 1
+        return list(nodes)
+
+    def put(self, text, nodes):
+        if self.maxsize <= 0:
+            return
+        self.entries[text] = tuple(nodes)
+        self.entries.move_to_end(text)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self.entries) > max(maxsize, 0):
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+        }
+
+    # Load entries saved by an earlier build. Entries saved by a different version of
+    # the generator are ignored, since they may no longer render the same.
+    def load(self, path):
+        self.path = path
+        if not os.path.exists(path):
+            return self
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get("format") != INLINE_CACHE_FORMAT or data.get("code_version") != code_version():
+            return self
+        for text, nodes in data.get("entries", []):
+            self.put(text, [LeafNode(tag, value, props) for tag, value, props in nodes])
+        return self
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            "format": INLINE_CACHE_FORMAT,
+            "code_version": code_version(),
+            # Least recently used first, so loading keeps the same order
+            "entries": [
+                [text, [[node.tag, node.value, node.props] for node in nodes]]
+                for text, nodes in self.entries.items()
+            ],
+        }
+        with atomic_open(path) as f:
+            json.dump(data, f)
+
+
+# The cache used by text_to_children
+inline_cache = InlineCache()
+
+
+# Set the size of the shared cache and, if path is given, load what an earlier build
+# saved there. Also used as the initializer of build worker processes.
+def configure(maxsize=DEFAULT_MAXSIZE, path=None):
+    inline_cache.resize(maxsize)
+    if path is not None and maxsize > 0:
+        inline_cache.load(path)
@@ -19,38 +19,32 @@ def split_nodes_image(old_nodes):
             continue
         # Grab the original text
         original_text = old_node.text
-        # Use the extractor to return any markdown images
-        images = extract_markdown_images(original_text)
-        # If images returns 0, there are no images, so it's a plain text node.
+        # If there are no images, it's a plain text node.
         # Just append it
-        if len(images) == 0:
+        if "![" not in original_text:
             new_nodes.append(old_node)
             continue
-        # extract_markdown_images returns a list of tuples
-        # e.g. [("rick roll", "https://i.imgur.com/aKaOqIh.gif"), ("obi wan", "https://i.imgur.com/fJRm4Vk.jpeg")]
-        for image in images:
-            # Split the original text with the image as the delimiter, at most once
-            # e.g. This string is before the image ![rick roll](https://i.imgur.com/aKaOqIh.gif) this string is after the image
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
-            # If 
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
+        # Walk the image matches in order, slicing out the text between them.
+        # Slicing by match position (rather than re-splitting the remaining text
+        # on every image) keeps this linear in the length of the text.
+        # e.g. This string is before the image ![rick roll](https://i.imgur.com/aKaOqIh.gif) this string is after the image
+        pos = 0
+        for match in _IMAGE_RE.finditer(original_text):
             # If there is any text before, emit it as a plain text node
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
+            if match.start() > pos:
+                new_nodes.append(TextNode(original_text[pos:match.start()], TextType.TEXT))
             # Emit the image node using the alt and url
             new_nodes.append(
                 TextNode(
-                    image[0],
+                    match.group(1),
                     TextType.IMAGE,
-                    image[1],
+                    match.group(2),
                 )
             )
-            # Set the original_text to everything after the delimiter
-            original_text = sections[1]
+            pos = match.end()
         # If there is more original text, emit it as a text node
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        if pos < len(original_text):
+            new_nodes.append(TextNode(original_text[pos:], TextType.TEXT))
     return new_nodes
 
 
@@ -61,20 +55,17 @@ def split_nodes_link(old_nodes):
             new_nodes.append(old_node)
             continue
         original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
+        if "[" not in original_text:
             new_nodes.append(old_node)
             continue
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        pos = 0
+        for match in _LINK_RE.finditer(original_text):
+            if match.start() > pos:
+                new_nodes.append(TextNode(original_text[pos:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+            pos = match.end()
+        if pos < len(original_text):
+            new_nodes.append(TextNode(original_text[pos:], TextType.TEXT))
     return new_nodes
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
@@ -102,38 +93,85 @@ def _assert_all_textnodes(stage, nodes):
         if not isinstance(n, TextNode):
             raise TypeError(f"{stage} produced non-TextNode: {type(n)}: {n}")
 
+# Every inline token, in one pattern, so a paragraph is tokenized in a single scan.
+# Code spans are split out before anything else, so images and links can't contain
+# a backtick. A backtick that isn't part of a pair is caught by "tick".
+_INLINE_TOKEN_RE = re.compile(
+    r"`(?P<code>[^`]*)`"
+    r"|!\[(?P<alt>[^\[\]`]*)\]\((?P<src>[^\(\)`]*)\)"
+    r"|(?<!!)\[(?P<anchor>[^\[\]`]*)\]\((?P<href>[^\(\)`]*)\)"
+    r"|(?P<bold>\*\*)"
+    r"|(?P<italic>_)"
+    r"|(?P<tick>`)"
+)
+
+# Converts a paragraph of inline markdown into TextNodes in a single pass.
+#
+# Gives the same result as running split_nodes_delimiter for code,
+# split_nodes_image, split_nodes_link, then split_nodes_delimiter for bold and
+# for italic: code spans, images and links are taken as they are, and the text
+# between them is split on ** and then _. Inside a bold section _ is plain text.
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    #_assert_all_textnodes("after CODE", nodes)
-
-    nodes = split_nodes_image(nodes)
-    #_assert_all_textnodes("after IMAGE", nodes)
-
-    nodes = split_nodes_link(nodes)
-    #_assert_all_textnodes("after LINK", nodes)
-
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    #_assert_all_textnodes("after BOLD", nodes)
+    nodes = []
+    # TEXT, or BOLD/ITALIC while inside a delimited section
+    state = TextType.TEXT
+    # Start of the text that hasn't been emitted yet
+    pos = 0
+    for match in _INLINE_TOKEN_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == "italic" and state == TextType.BOLD:
+            continue
+        if kind == "bold" or kind == "italic":
+            # A ** inside an italic section always leaves the _ unbalanced
+            if state == TextType.ITALIC and kind == "bold":
+                raise ValueError("invalid markdown, formatted section not closed")
+            if match.start() > pos:
+                nodes.append(TextNode(text[pos:match.start()], state))
+            if state == TextType.TEXT:
+                state = TextType.BOLD if kind == "bold" else TextType.ITALIC
+            else:
+                state = TextType.TEXT
+            pos = match.end()
+            continue
 
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    #_assert_all_textnodes("after ITALIC", nodes)
-    return nodes    
+        # Code, images and links can't sit inside a bold or italic section
+        if state != TextType.TEXT or kind == "tick":
+            raise ValueError("invalid markdown, formatted section not closed")
+        if match.start() > pos:
+            nodes.append(TextNode(text[pos:match.start()], TextType.TEXT))
+        if kind == "code":
+            if match.group("code"):
+                nodes.append(TextNode(match.group("code"), TextType.CODE))
+        elif kind == "src":
+            nodes.append(TextNode(match.group("alt"), TextType.IMAGE, match.group("src")))
+        else:
+            nodes.append(TextNode(match.group("anchor"), TextType.LINK, match.group("href")))
+        pos = match.end()
+
+    if state != TextType.TEXT:
+        raise ValueError("invalid markdown, formatted section not closed")
+    if pos < len(text):
+        nodes.append(TextNode(text[pos:], TextType.TEXT))
+    return nodes
 
 # Create a function extract_markdown_images(text) that takes raw markdown text and returns a list of tuples.
 # Each tuple should contain the alt text and the URL of any markdown images.
 # text = "This is text with a ![rick roll](https://i.imgur.com/aKaOqIh.gif) and ![obi wan](https://i.imgur.com/fJRm4Vk.jpeg)"
 # print(extract_markdown_images(text))
 # # [("rick roll", "https://i.imgur.com/aKaOqIh.gif"), ("obi wan", "https://i.imgur.com/fJRm4Vk.jpeg")]
+_IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return _IMAGE_RE.findall(text)
 
 
 # text = "This is text with a link [to boot dev](https://www.boot.dev) and [to youtube](https://www.youtube.com/@bootdotdev)"
 # print(extract_markdown_links(text))
 # [("to boot dev", "https://www.boot.dev"), ("to youtube", "https://www.youtube.com/@bootdotdev")]
+_LINK_RE = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return _LINK_RE.findall(text)
 
 
 # node = TextNode("This is text with a `code block` word", TextType.TEXT)
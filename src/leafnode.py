@@ -1,5 +1,7 @@
 from src.htmlnode import HTMLNode
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         # Need to pass children = None. It's a leaf node.
         super().__init__(tag=tag, value=value, children=None, props=props)
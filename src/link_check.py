@@ -0,0 +1,166 @@
+import json
+import os
+import posixpath
+import re
+from urllib.parse import unquote
+
+from src.page_writer import atomic_open
+
+# Bump this whenever the saved references change in an incompatible way
+LINKS_FORMAT = 2
+
+# "https:", "mailto:", "data:", ... anything with a scheme isn't a path on this site
+_SCHEME_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9+.\-]*:")
+
+# {source path: references} recorded by this process while rendering, if enabled
+_collected = None
+
+
+# Start recording the references of every page this process renders. Returns the dict
+# they're recorded in.
+def enable():
+    global _collected
+    _collected = {}
+    return _collected
+
+
+def disable():
+    global _collected
+    _collected = None
+
+
+def active():
+    return _collected
+
+
+# Called with every page's Document as it's rendered, parsed or from the parse cache
+def record(source_path, document):
+    if _collected is not None:
+        _collected[source_path] = page_references(document)
+
+
+# [kind, target, line] of every link and image of a page, in the order they appear
+def page_references(document):
+    references = [["link", url, line] for url, _, line in document.links]
+    references.extend(["image", src, line] for src, _, line in document.images)
+    references.sort(key=lambda reference: reference[2])
+    return references
+
+
+# The path on the site a reference from the page at page_path points to, with its
+# query and fragment dropped and any ./ and ../ worked out; "" for a link within
+# the page (just a #fragment), or None for anything on another site (or not a
+# page at all, such as mailto:).
+def resolve(page_path, target):
+    target = target.strip()
+    if target.startswith("//") or _SCHEME_RE.match(target):
+        return None
+    path = target.split("#", 1)[0].split("?", 1)[0]
+    if not path:
+        return ""
+    path = unquote(path)
+    if not path.startswith("/"):
+        path = posixpath.join(page_path, path)
+    directory = path.endswith("/")
+    path = posixpath.normpath(path)
+    # normpath keeps a leading // (it could be a network share)
+    path = "/" + path.lstrip("/")
+    if directory and path != "/":
+        path += "/"
+    return path
+
+
+# The paths a site serves, from the files in its output directory: every file is
+# served at its own path, and an index.html at its directory's too
+def site_paths(output_files, output_dir):
+    output_dir = os.path.abspath(output_dir)
+    paths = set()
+    for file_path in output_files:
+        path = "/" + os.path.relpath(file_path, output_dir).replace(os.sep, "/")
+        paths.add(path)
+        if path.endswith("/index.html"):
+            paths.add(path[:-len("index.html")])
+    return paths
+
+
+class LinkReport():
+    def __init__(self):
+        # (source, line, kind, target) of every reference that points nowhere on the site
+        self.broken = []
+        # (source, line, kind, target) of every reference to another site; never fetched
+        self.external = []
+        self.checked = 0
+
+
+# Checks every reference against the paths the site serves. references maps the
+# path of each page's source, relative to content_dir (with / separators), to its
+# page_references. A directory link without its trailing / (e.g. /blog/tom) counts,
+# since servers redirect it.
+def check_references(references, paths, content_dir="content"):
+    # Not imported at the top: rendering imports this module, and it doesn't need sqlite3
+    from src.metadata_index import page_url
+    report = LinkReport()
+    for source, page_references in sorted(references.items()):
+        page_path = page_url(source)
+        display = posixpath.join(content_dir.replace(os.sep, "/"), source)
+        for kind, target, line in page_references:
+            resolved = resolve(page_path, target)
+            if resolved is None:
+                report.external.append((display, line, kind, target))
+                continue
+            if resolved == "":
+                continue
+            report.checked += 1
+            if resolved not in paths and resolved + "/" not in paths:
+                report.broken.append((display, line, kind, target))
+    return report
+
+
+# The references of every page, kept between builds in a JSON file, so an
+# incremental build can check the links of pages it didn't render again.
+# Each page's references are kept with the [size, mtime_ns] its source had then,
+# so a page changed by a build that didn't record them (e.g. with --no-link-check)
+# shows up in stale() instead of keeping the references it used to have.
+class LinkIndex():
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.pages = {}
+        self.stamps = {}
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get("format") == LINKS_FORMAT:
+            self.pages = data.get("pages", {})
+            self.stamps = data.get("stamps", {})
+        return self
+
+    # collected maps source paths to their references, as recorded while rendering;
+    # sources maps the path of every page there is now, relative to content_dir, to
+    # the [size, mtime_ns] of its source. Pages that are gone are dropped.
+    def update(self, collected, sources, content_dir):
+        content_dir = os.path.abspath(content_dir)
+        for source_path, page_references in collected.items():
+            source = os.path.relpath(source_path, content_dir).replace(os.sep, "/")
+            self.set(source, page_references, sources.get(source))
+        for source in [source for source in self.pages if source not in sources]:
+            del self.pages[source]
+            self.stamps.pop(source, None)
+
+    def set(self, source, page_references, stamp):
+        self.pages[source] = page_references
+        self.stamps[source] = list(stamp) if stamp is not None else None
+
+    # The sources whose references are missing, or were recorded from another
+    # version of the source than the one there is now
+    def stale(self, sources):
+        return [source for source, stamp in sources.items()
+                if source not in self.pages or self.stamps.get(source) != list(stamp)]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with atomic_open(self.path) as f:
+            json.dump({"format": LINKS_FORMAT, "pages": self.pages, "stamps": self.stamps}, f,
+                      separators=(",", ":"), sort_keys=True)
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import os
+
+from src import profiling
+from src.block_markdown import NEWLINE_LEAF, BlockType
+from src.document import document_from_blocks, slugify
+from src.leafnode import LeafNode
+from src.manifest import CODE_INPUT, code_version, hash_modules, remove_empty_parents
+from src.page_writer import OutputReport, write_page
+from src.parentnode import ParentNode
+from src.render import page_context
+from src.template import load_template
+
+logger = logging.getLogger(__name__)
+
+# Directories of content/ that get listing pages
+LISTING_SECTIONS = ["blog"]
+
+_code_version = None
+
+
+# The rendering code and the code that decides what's listed
+def listings_code_version():
+    global _code_version
+    if _code_version is None:
+        _code_version = f"{code_version()}:{hash_modules(['listings.py', 'metadata_index.py'])}"
+    return _code_version
+
+
+# The listing pages for a section of the site, built from MetadataIndex queries:
+# - /blog/: every post, newest first
+# - /blog/tags/: every tag, with how many posts have it
+# - /blog/tags/<tag>/: the posts with that tag, newest first
+# Returns (directory relative to the site root, Document, mtime, posts) for each,
+# where mtime is that of the newest page listed, and posts are the pages the
+# listing was made from.
+#
+# The pages are built as nodes rather than markdown, so titles and tags show up
+# as they are, whatever markdown they happen to contain.
+def listing_pages(metadata, section):
+    posts = metadata.pages(section)
+    if not posts:
+        return []
+    pages = [(section, _list_document(section.capitalize(), _post_items(posts)), _newest(posts), posts)]
+
+    tags = metadata.tags(section)
+    if tags:
+        slugs = tag_slugs(tag for tag, _ in tags)
+        items = [[_link(tag, f"/{section}/tags/{slugs[tag]}/"), LeafNode(None, f" ({count})")] for tag, count in tags]
+        pages.append((f"{section}/tags", _list_document("Tags", items), _newest(posts), posts))
+        for tag, _ in tags:
+            tagged = metadata.pages(section, tag=tag)
+            pages.append((f"{section}/tags/{slugs[tag]}",
+                          _list_document(f"Posts tagged {tag}", _post_items(tagged)), _newest(tagged), tagged))
+    return pages
+
+
+# The directory name of each tag's page. Tags that slugify the same (e.g. "C#" and
+# "C++") get -1, -2, ... added in the order given, the way repeated headings do.
+def tag_slugs(tags):
+    slugs = {}
+    taken = set()
+    for tag in tags:
+        base = slugify(tag) or "tag"
+        slug = base
+        n = 1
+        while slug in taken:
+            slug = f"{base}-{n}"
+            n += 1
+        taken.add(slug)
+        slugs[tag] = slug
+    return slugs
+
+
+# A heading, then a list with an item of the given inline nodes each
+def _list_document(title, items):
+    list_items = []
+    for children in items:
+        list_items.append(ParentNode("li", children=children))
+        list_items.append(NEWLINE_LEAF)
+    return document_from_blocks([
+        (BlockType.HEADING, ParentNode("h1", children=[LeafNode(None, title)])),
+        (BlockType.UNORDERED_LIST, ParentNode("ul", children=list_items)),
+    ])
+
+
+def _post_items(posts):
+    items = []
+    for post in posts:
+        children = [_link(post.title or post.url, post.url)]
+        if post.date:
+            children.append(LeafNode(None, f" ({post.date})"))
+        items.append(children)
+    return items
+
+
+def _link(text, url):
+    return LeafNode("a", text, {"href": url})
+
+
+def _newest(posts):
+    return max(post.mtime_ns for post in posts) / 1e9
+
+
+# The inputs of a listing page, for a BuildManifest: the template, the code, and
+# an entry for each page listed, covering everything about it the listing shows
+def listing_inputs(manifest, content_dir, posts):
+    inputs = {manifest.template_path: manifest.template_hash, CODE_INPUT: listings_code_version()}
+    for post in posts:
+        entry = json.dumps([post.url, post.title, post.date, post.tags, post.mtime_ns])
+        name = os.path.relpath(os.path.join(content_dir, post.path))
+        inputs[f"listing entry of {name}"] = hashlib.sha256(entry.encode()).hexdigest()
+    return inputs
+
+
+# Writes the listing pages of every section into dest_dir, except where content_dir
+# has a page of its own, and deletes listing pages written by an earlier build that
+# aren't generated anymore (e.g. for a tag no post uses now).
+# With a BuildManifest, listing pages none of whose inputs changed are left as they
+# are, and why each of the others is rendered is logged (at INFO with explain).
+# Returns an OutputReport of the pages written, left unchanged and deleted.
+def generate_listings(metadata, content_dir, template_path, dest_dir, sections=LISTING_SECTIONS, manifest=None,
+                      explain=False):
+    dest_dir = os.path.abspath(dest_dir)
+    report = OutputReport()
+    template = load_template(template_path)
+    log_reasons = logger.info if explain else logger.debug
+    generated = []
+    for section in sections:
+        for rel_dir, document, mtime, posts in listing_pages(metadata, section):
+            if os.path.exists(os.path.join(content_dir, rel_dir, "index.md")):
+                continue
+            dest_path = os.path.join(dest_dir, rel_dir, "index.html")
+            generated.append(rel_dir)
+            if manifest is not None:
+                inputs = listing_inputs(manifest, content_dir, posts)
+                reasons = manifest.changes(dest_path, inputs)
+                if not reasons:
+                    report.unchanged.append(dest_path)
+                    continue
+                log_reasons("Rebuilding '%s': %s", os.path.relpath(dest_path), "; ".join(reasons))
+            context = page_context(document, document.root.iter_html(), mtime, "/" + rel_dir + "/")
+            changed, _ = write_page(dest_path, template, context)
+            (report.written if changed else report.unchanged).append(dest_path)
+            if manifest is not None:
+                manifest.record_output(dest_path, inputs)
+            profiling.count("listing_pages")
+
+    for rel_dir in metadata.listing_outputs():
+        if rel_dir in generated:
+            continue
+        dest_path = os.path.join(dest_dir, rel_dir, "index.html")
+        # Content may have taken the page over since
+        if os.path.isfile(dest_path) and not os.path.exists(os.path.join(content_dir, rel_dir, "index.md")):
+            os.remove(dest_path)
+            remove_empty_parents(os.path.dirname(dest_path), dest_dir)
+            report.deleted.append(dest_path)
+            if manifest is not None:
+                manifest.forget(dest_path)
+    metadata.set_listing_outputs(generated)
+    return report
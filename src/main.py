@@ -1,131 +1,396 @@
+import argparse
+import logging
 import os
-import shutil
-from pathlib import Path
-from src.block_markdown import markdown_to_html_node
+import sys
+from src import inline_cache, link_check, parse_cache, profiling
+from src.async_io import DEFAULT_IO_JOBS, IOPool, map_limited
+from src.page_writer import OutputReport, files_equal, prune_directory, write_page
+from src.render import generate_pages_recursive, page_context, page_url_path, parse_markdown, read_source
+from src.template import load_template, page_template_path
+from src.tree_index import DIR, scan_tree
 
-# A recursive function that copies all contents from a source directory to a destination directory
-def copy_all_contents(source_dir, destination_dir):
+# Only what rendering a page needs is imported above, so that render-one and tools
+# importing this module start quickly. Modules only a full build or the dev server
+# uses (asyncio, multiprocessing, static file syncing, the manifests) are imported
+# by the functions that use them.
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = ".cache/build-manifest.json"
+STATIC_STATE_PATH = ".cache/static-sync.json"
+PROFILE_PATH = ".cache/profile.json"
+INLINE_CACHE_PATH = ".cache/inline-cache.json"
+PARSE_CACHE_DIR = ".cache/pages"
+OUTPUT_MANIFEST_PATH = ".cache/output-manifest.jsonl"
+METADATA_INDEX_PATH = ".cache/metadata.sqlite"
+SEARCH_INDEX_PATH = ".cache/search.sqlite"
+LINK_INDEX_PATH = ".cache/links.json"
+# Where the search index is written, under public/
+SEARCH_DIR = "search"
+
+# Copies all contents from a source directory to a destination directory
+# With clean=False the destination is kept, and files are copied over whatever is already there,
+# except that files which already hold the same bytes are left untouched.
+# If a report is passed, every file is added to its written or unchanged list.
+# io_jobs > 1 copies that many files at a time.
+# index is a TreeIndex of source_dir, if one has already been scanned.
+def copy_all_contents(source_dir, destination_dir, clean=True, report=None, io_jobs=1, index=None):
     source_dir = os.path.abspath(source_dir)
     destination_dir = os.path.abspath(destination_dir)
 
     # Delete all the contents of the destination directory, to ensure the copy is clean
-    if not os.path.exists(source_dir):
+    if not os.path.isdir(source_dir):
         raise ValueError(f"source directory '{source_dir}' doesn't exist")
     
-    if not os.path.exists(destination_dir):
+    if not os.path.isdir(destination_dir):
         raise ValueError(f"destination directory '{destination_dir}' doesn't exist")
     
-    print(f"Delete all the contents of destination: '{destination_dir}'")
-    shutil.rmtree(path=destination_dir)
-    os.mkdir(destination_dir)
+    if clean:
+        import shutil
+        logger.debug("Delete all the contents of destination: '%s'", destination_dir)
+        shutil.rmtree(path=destination_dir)
+        os.mkdir(destination_dir)
 
     # Copy all files and subdirectories, nested files, etc.
-    dir_contents = os.listdir(source_dir)
-    print(f"processing dir: '{source_dir}', with contents: '{dir_contents}'")
-    for content in dir_contents:
-        content_path = os.path.join(source_dir, content)
-        print(f"processing content: '{content_path}'")
-        if os.path.isfile(content_path):
-            print(f"FILE: copying '{content_path}' to '{destination_dir}'")
-            shutil.copy(content_path, destination_dir)
-        elif os.path.isdir(content_path):
-            # make the destination subdirectory
-            dest_sub_dir = os.path.join(destination_dir, content)
-            os.mkdir(dest_sub_dir)
-            print(f"DIRECTORY: created '{dest_sub_dir}' and recursively calling function")
-            copy_all_contents(content_path, dest_sub_dir)
-
-def extract_title(markdown):
-    if markdown is None or markdown == "":
-        raise ValueError("markdown is None or empty string")
-    
-    lines = markdown.splitlines()
-    header = ""
-    for l in lines:
-        if l.startswith("# "):
-            header = l.split(" ")[1].strip()
-            break
-    if header == "":
-        raise Exception("no h1 header found")
-    return header
-
-    #generate_page("content/index.md", "template.html", "public/index.html")
-    #generate_pages_recursive("content", "template.html", "public")
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    dir_path_content = os.path.abspath(dir_path_content)
-    if not os.path.exists(dir_path_content):
-        raise ValueError(f"dir_path_content: '{dir_path_content}' doesn't exist")
-    template_path = os.path.abspath(template_path)
-    if not os.path.exists(template_path):
-        raise ValueError(f"template_path: '{template_path}' doesn't exist")
-    dest_dir_path = os.path.abspath(dest_dir_path)
-   
-    # Crawl every entry in the content directory
-    dir_contents = os.listdir(dir_path_content)
-    for c in dir_contents:
-        path = os.path.join(dir_path_content, c)
-        # For each markdown file found, generate a new .html file using the same template.html.
-        if os.path.isfile(path):
-            file_and_ext_list = os.path.splitext(path)
-            if len(file_and_ext_list) == 2 and file_and_ext_list[1] == ".md":
-                output_file = os.path.join(dest_dir_path, "index.html")
-                generate_page(path, template_path, output_file)
-        elif os.path.isdir(path):
-            print(f"{path} is a directory and needs to be processed, recursively")
-            curr_path = Path(path)
-            directory = curr_path.name
-            new_dest_dir_path = os.path.join(dest_dir_path, directory)
-            #print(f"{dest_dir_path}, directory name should be: '{directory}'")
-            #print(f"target directory should be {os.path.join(dest_dir_path, directory)}")
-            generate_pages_recursive(path, template_path, new_dest_dir_path)
-
-    # The generated pages should be written to the public directory in the same directory structure.
-
-    # Change your main function to use generate_pages_recursive instead of generate_page. You should generate a page for every markdown file in the content directory and write the results to the public directory.
-
-def generate_page(from_path, template_path, dest_path):
-    print(f"Generating page from '{from_path}' to '{dest_path}' using '{template_path}'")
-
-    from_path = os.path.abspath(from_path)
+    if index is None:
+        index = scan_tree(source_dir)
+    pairs = _static_file_pairs(index, destination_dir)
+    if io_jobs > 1:
+        import asyncio
+        results = asyncio.run(_copy_files_async(pairs, io_jobs))
+    else:
+        results = [copy_static_file(content_path, dest_path) for content_path, dest_path in pairs]
+    for (_, dest_path), result in zip(pairs, results):
+        if isinstance(result, BaseException):
+            raise result
+        if report is not None:
+            (report.written if result else report.unchanged).append(dest_path)
+
+# Copy one file unless dest_path already holds the same bytes. Returns True if it was copied.
+def copy_static_file(content_path, dest_path):
+    if files_equal(content_path, dest_path):
+        logger.debug("FILE: '%s' is unchanged", dest_path)
+        return False
+    from src.static_sync import copy_file
+    logger.debug("FILE: copying '%s' to '%s'", content_path, dest_path)
+    copy_file(content_path, dest_path)
+    profiling.count("static_bytes_copied", os.path.getsize(content_path))
+    return True
+
+# Every (source file, destination file) pair in a TreeIndex, creating the destination
+# directories on the way
+def _static_file_pairs(index, destination_dir):
+    pairs = []
+    for entry in index.entries.values():
+        dest_path = os.path.join(destination_dir, entry.rel_path)
+        if entry.kind == DIR:
+            logger.debug("DIRECTORY: creating '%s'", dest_path)
+            os.makedirs(dest_path, exist_ok=True)
+        else:
+            pairs.append((entry.path, dest_path))
+    return pairs
+
+async def _copy_files_async(pairs, io_jobs):
+    with IOPool(io_jobs) as pool:
+        return await map_limited(lambda pair: pool.run(copy_static_file, *pair), pairs, io_jobs)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the static site into public/")
+    subparsers = parser.add_subparsers(dest="command")
+
+    # Logging options shared by every command
+    log_parser = argparse.ArgumentParser(add_help=False)
+    log_parser.add_argument("--log-level", default="INFO",
+                            choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                            help="DEBUG also logs every file as it's processed")
+    log_parser.add_argument("-v", "--verbose", action="store_const", const="DEBUG", dest="log_level",
+                            help="same as --log-level DEBUG")
+
+    build_parser = subparsers.add_parser("build", parents=[log_parser],
+                                         help="build the site into public/ (the default)")
+    build_parser.add_argument("--incremental", action="store_true",
+                              help="only regenerate pages whose source, template or generator code changed")
+    build_parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N",
+                              help="render pages across N worker processes (0 uses every CPU)")
+    build_parser.add_argument("--io-jobs", type=int, default=1, metavar="N",
+                              help="read, write and copy up to N files at a time (helps on slow or network disks; "
+                                   f"try {DEFAULT_IO_JOBS})")
+    build_parser.add_argument("--static-hash", action="store_true",
+                              help="with --incremental, compare static files by content hash when their mtime differs")
+    build_parser.add_argument("--static-links", action="store_true",
+                              help="with --incremental, hardlink static files into public instead of copying them")
+    build_parser.add_argument("--profile", nargs="?", const=PROFILE_PATH, metavar="TRACE",
+                              help=f"time every stage and page, print a summary and write a Chrome trace (default {PROFILE_PATH})")
+    build_parser.add_argument("--inline-cache-size", type=int, default=inline_cache.DEFAULT_MAXSIZE, metavar="N",
+                              help="remember the parsed inline markdown of up to N paragraphs, list items and headings (0 turns it off)")
+    build_parser.add_argument("--persist-inline-cache", action="store_true",
+                              help=f"keep the inline cache in {INLINE_CACHE_PATH} between builds")
+    build_parser.add_argument("--output-manifest", default=OUTPUT_MANIFEST_PATH, metavar="PATH",
+                              help="JSON lines list of every public file with its hash, size and whether it was "
+                                   "added, changed, unchanged or removed since the previous build (default %(default)s)")
+    build_parser.add_argument("--no-parse-cache", action="store_true",
+                              help=f"don't reuse page bodies rendered by earlier builds from {PARSE_CACHE_DIR}")
+    build_parser.add_argument("--parse-cache-size", type=int, default=parse_cache.DEFAULT_MAX_BYTES // (1024 * 1024),
+                              metavar="MB", help="keep the parse cache under this many megabytes")
+    build_parser.add_argument("--no-listings", action="store_true",
+                              help="don't generate the blog listing and tag pages from the front matter index "
+                                   f"in {METADATA_INDEX_PATH}")
+    build_parser.add_argument("--no-search", action="store_true",
+                              help=f"don't write the search index into public/{SEARCH_DIR}/")
+    build_parser.add_argument("--explain", action="store_true",
+                              help="with --incremental, log which changed inputs each rebuilt page was rebuilt for")
+    build_parser.add_argument("--no-link-check", action="store_true",
+                              help="don't check that internal links and images point at a page or file of the site")
+    build_parser.add_argument("--strict-links", action="store_true",
+                              help="fail the build if any internal link or image is broken")
+
+    render_parser = subparsers.add_parser("render-one", parents=[log_parser],
+                                          help="render a single markdown page, without building the rest of the site")
+    render_parser.add_argument("source", help="the markdown file, e.g. content/blog/tom/index.md")
+    render_parser.add_argument("--output", "-o", default="-", metavar="PATH",
+                               help="write the page to PATH instead of stdout")
+    render_parser.add_argument("--template", default="template.html", metavar="PATH",
+                               help="the page template (default %(default)s)")
+
+    serve_parser = subparsers.add_parser("serve", parents=[log_parser],
+                                         help="build the site and serve public/")
+    serve_parser.add_argument("--port", type=int, default=8888)
+    serve_parser.add_argument("--watch", action="store_true",
+                              help="rebuild the affected pages and assets whenever a file changes")
+    serve_parser.add_argument("--poll", action="store_true",
+                              help="with --watch, poll for changes instead of using inotify")
+    serve_parser.add_argument("--no-live-reload", action="store_true",
+                              help="don't reload open browser tabs after a rebuild")
+
+    cache_parser = subparsers.add_parser("cache", parents=[log_parser], help="manage the build caches")
+    cache_parser.add_argument("action", choices=["clean", "reindex"],
+                              help="clean: delete the parse and inline caches, the front matter index, the search postings "
+                                   "and the page links; "
+                                   "reindex: rebuild the front matter index from content/")
+
+    if argv is None:
+        argv = sys.argv[1:]
+    # Plain "python3 -m src.main [--flags]" still means build
+    if not argv or (argv[0].startswith("-") and argv[0] not in ("-h", "--help")):
+        argv = ["build"] + list(argv)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+
+    if args.command == "render-one":
+        run_render_one(args)
+    elif args.command == "serve":
+        run_serve(args)
+    elif args.command == "cache":
+        run_cache(args)
+    else:
+        run_build(args)
+
+def run_build(args):
+    profiler = profiling.enable() if args.profile else None
+    with profiling.stage("build"):
+        build(args)
+    if profiler is not None:
+        profiler.write_trace(args.profile)
+        logger.info("%s", profiler.summary())
+        logger.info("Wrote profile trace to '%s'", args.profile)
+
+def build(args):
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    cache_path = INLINE_CACHE_PATH if args.persist_inline_cache else None
+    inline_cache.configure(args.inline_cache_size, cache_path)
+    pages_cache = None
+    if not args.no_parse_cache:
+        pages_cache = parse_cache.configure(PARSE_CACHE_DIR, args.parse_cache_size * 1024 * 1024)
+    try:
+        report = build_site(args, jobs)
+        for path in report.written:
+            logger.debug("Wrote '%s'", os.path.relpath(path))
+        for path in report.deleted:
+            logger.debug("Deleted '%s'", os.path.relpath(path))
+        logger.info("Output: %d written, %d unchanged, %d deleted",
+                    len(report.written), len(report.unchanged), len(report.deleted))
+        with profiling.stage("output_manifest"):
+            from src.output_manifest import OutputManifest
+            output_manifest = OutputManifest(args.output_manifest, "public").load()
+            output_manifest.update(report)
+            output_manifest.save()
+        counts = output_manifest.counts()
+        logger.info("Changes since the last build: %d added, %d changed, %d removed (listed in '%s')",
+                    counts["added"], counts["changed"], counts["removed"], args.output_manifest)
+    finally:
+        link_check.disable()
+        stats = inline_cache.inline_cache.stats()
+        logger.debug("Inline cache: %d hits, %d misses, %d entries", stats["hits"], stats["misses"], stats["size"])
+        # Only what this process parsed is saved; pages rendered by workers aren't in it
+        if cache_path is not None:
+            inline_cache.inline_cache.save(cache_path)
+        if pages_cache is not None:
+            evicted = pages_cache.evict()
+            if evicted:
+                logger.debug("Parse cache: evicted %d entries", evicted)
+
+# Returns an OutputReport of every file in public that was written, left unchanged or deleted
+def build_site(args, jobs):
+    from src.manifest import BuildManifest
+    from src.static_sync import save_state, sync_directory
+    os.makedirs("public", exist_ok=True)
+    report = OutputReport()
+    # One pass over each source tree, shared by everything below
+    with profiling.stage("scan"):
+        static_index = scan_tree("static")
+        content_index = scan_tree("content")
+    # Every page rendered records its links and images on the way
+    collected = None if args.no_link_check else link_check.enable()
+
+    if not args.incremental:
+        # Copy all static files from static to public, leaving files that haven't changed alone
+        with profiling.stage("copy_static"):
+            copy_all_contents("static", "public", clean=False, report=report, io_jobs=args.io_jobs,
+                              index=static_index)
+            # So an incremental build deletes these once they're gone from static/
+            save_state(STATIC_STATE_PATH, sorted((entry.rel_path for entry in static_index.files()),
+                                                 key=lambda rel: rel.split(os.sep)))
+        with profiling.stage("generate_pages"):
+            report.extend(generate_pages_recursive("content", "template.html", "public", jobs=jobs,
+                                                   io_jobs=args.io_jobs, index=content_index))
+        if not args.no_listings:
+            report.extend(generate_listing_pages(content_index))
+        if not args.no_search:
+            report.extend(update_search_index(content_index))
+        if collected is not None:
+            check_links(collected, report, content_index, args.strict_links)
+        # Anything else in public is left over from an earlier build
+        report.deleted.extend(prune_directory("public", report.written + report.unchanged))
+        return report
+
+    # Incremental builds keep public around, so unchanged pages don't need to be written again,
+    # and only new or changed static files are copied over
+    with profiling.stage("copy_static"):
+        synced = sync_directory("static", "public", STATIC_STATE_PATH,
+                                use_hash=args.static_hash, link=args.static_links, index=static_index)
+    public_dir = os.path.abspath("public")
+    report.written.extend(os.path.join(public_dir, rel) for rel in synced.copied)
+    report.unchanged.extend(os.path.join(public_dir, rel) for rel in synced.unchanged)
+    report.deleted.extend(os.path.join(public_dir, rel) for rel in synced.deleted)
+    manifest = BuildManifest(MANIFEST_PATH, "template.html").load()
+    with profiling.stage("generate_pages"):
+        report.extend(generate_pages_recursive("content", "template.html", "public", manifest, jobs,
+                                               io_jobs=args.io_jobs, index=content_index, explain=args.explain))
+    if not args.no_listings:
+        report.extend(generate_listing_pages(content_index, manifest, args.explain))
+    if not args.no_search:
+        report.extend(update_search_index(content_index))
+    if collected is not None:
+        check_links(collected, report, content_index, args.strict_links)
+    for removed in manifest.remove_stale("public"):
+        logger.info("Removed stale page '%s'", removed)
+        report.deleted.append(os.path.abspath(removed))
+    manifest.save()
+    return report
+
+# Listing pages are worked out on every build, incremental or not: they come from the
+# index, so they're only a few queries away. With a BuildManifest, only those whose
+# entries changed are rendered again.
+# The index is updated after the pages are generated, so the Documents of the pages
+# that changed are in the parse cache.
+def generate_listing_pages(content_index, manifest=None, explain=False):
+    from src.listings import generate_listings
+    from src.metadata_index import MetadataIndex
+    with profiling.stage("metadata_index"):
+        metadata = MetadataIndex(METADATA_INDEX_PATH)
+        added, changed, removed = metadata.update("content", content_index)
+    logger.debug("Front matter index: %d added, %d changed, %d removed", len(added), len(changed), len(removed))
+    with profiling.stage("listings"):
+        return generate_listings(metadata, "content", "template.html", "public", manifest=manifest, explain=explain)
+
+# Runs after the pages are generated, so the Documents of the pages that changed
+# are in the parse cache
+def update_search_index(content_index):
+    from src.search_index import SearchIndex
+    with profiling.stage("search_index"):
+        return SearchIndex(SEARCH_INDEX_PATH, os.path.join("public", SEARCH_DIR)).update("content", content_index)
+
+# Checks the links and images of every page against the files the build left in
+# public (so it has to run after everything is generated). Pages this build didn't
+# render are checked with the references they had when they last were.
+# Broken ones are logged as file:line warnings; with strict, they fail the build.
+def check_links(collected, report, content_index, strict=False):
+    with profiling.stage("check_links"):
+        links = link_check.LinkIndex(LINK_INDEX_PATH).load()
+        sources = {entry.rel_path.replace(os.sep, "/"): [entry.size, entry.mtime_ns]
+                   for entry in content_index.files() if entry.rel_path.endswith(".md")}
+        links.update(collected, sources, "content")
+        # Pages not rendered with link checking on since their source last changed
+        for source in links.stale(sources):
+            document = _source_document(os.path.join("content", source))
+            links.set(source, link_check.page_references(document), sources[source])
+        links.save()
+        paths = link_check.site_paths(report.written + report.unchanged, "public")
+        result = link_check.check_references(links.pages, paths, "content")
+    for source, line, kind, target in result.external:
+        logger.debug("%s:%d: external %s '%s' (not checked)", source, line, kind, target)
+    for source, line, kind, target in result.broken:
+        logger.warning("%s:%d: broken %s '%s'", source, line, kind, target)
+    logger.info("Links: %d checked, %d broken, %d external (not checked)",
+                result.checked, len(result.broken), len(result.external))
+    if strict and result.broken:
+        raise RuntimeError(f"{len(result.broken)} broken link(s) or image(s)")
+
+# The Document of a source, from the parse cache if it's there
+def _source_document(path):
+    with open(path) as f:
+        return parse_cache.cached_document(f.read(), path)
+
+# Renders one page the way a build would, including its {{ Path }} if it's under
+# content/, but with nothing else loaded: no caches on disk, no other pages, no static files
+def run_render_one(args):
+    from_path = os.path.abspath(args.source)
     if not os.path.exists(from_path):
-        raise ValueError(f"from_path: '{from_path}' doesn't exist")
-    template_path = os.path.abspath(template_path)
-    if not os.path.exists(template_path):
-        raise ValueError(f"template_path: '{template_path}' doesn't exist")
-    dest_path = os.path.abspath(dest_path)
-
-    # Read the markdown file at from_path and store the contents in a variable
-    markdown_file = ""
-    with open(from_path) as f:
-        markdown_file = f.read()
-
-    # Read the template file at template_path and store the contents in a variable
-    template_file = ""
-    with open(template_path) as f:
-        template_file = f.read()
-
-    # Use markdown_to_html_node function and .to_html() method to convert the markdown file to an HTML string
-    html = markdown_to_html_node(markdown_file).to_html()
-
-    # Use the extract title function to grab the title on the page
-    title = extract_title(markdown_file)
-
-    # Replace the {{ Title }} and {{ Content }} placeholders in the template with the HTML and title you generated
-    template_file = template_file.replace("{{ Title }}", title)
-    template_file = template_file.replace("{{ Content }}", html)
-
-    # Write the new full HTML page to a file at dest_path, creating any necessary directories if they don't exist
-    path = Path(dest_path)
-    os.makedirs(path.parent, exist_ok=True)
-    with open(dest_path, 'w') as f:
-        f.write(template_file)
+        raise ValueError(f"source: '{from_path}' doesn't exist")
+    url_path = None
+    content_dir = os.path.abspath("content")
+    if os.path.commonpath([from_path, content_dir]) == content_dir:
+        rel_dir = os.path.dirname(os.path.relpath(from_path, content_dir))
+        url_path = page_url_path(os.path.join("public", rel_dir, "index.html"), "public")
 
-    
+    markdown_file, mtime = read_source(from_path)
+    document = parse_markdown(markdown_file)
+    template = load_template(page_template_path(args.template, document.meta))
+    context = page_context(document, document.root.iter_html(), mtime, url_path)
+    if args.output == "-":
+        template.render_to(sys.stdout.write, context)
+        sys.stdout.flush()
+        return
+    output_path = os.path.abspath(args.output)
+    changed, _ = write_page(output_path, template, context)
+    logger.info("%s '%s'", "Wrote" if changed else "Unchanged", args.output)
+
+def run_serve(args):
+    # Only needed for serving
+    from src.devserver import SiteBuilder, serve
+    parse_cache.configure(PARSE_CACHE_DIR)
+    builder = SiteBuilder("content", "static", "template.html", "public", STATIC_STATE_PATH, METADATA_INDEX_PATH,
+                          SEARCH_INDEX_PATH)
+    serve(builder, args.port, watch=args.watch, live_reload=not args.no_live_reload, polling=args.poll)
 
-def main():
-    # Delete anything in public and copy all static files from static to public
-    copy_all_contents("static", "public")
-    #generate_page("content/index.md", "template.html", "public/index.html")
-    generate_pages_recursive("content", "template.html", "public")
+def run_cache(args):
+    from src.metadata_index import MetadataIndex
+    from src.search_index import SearchIndex
+    metadata = MetadataIndex(METADATA_INDEX_PATH)
+    if args.action == "clean":
+        parse_cache.ParseCache(PARSE_CACHE_DIR).clean()
+        if os.path.exists(INLINE_CACHE_PATH):
+            os.remove(INLINE_CACHE_PATH)
+        metadata.clean()
+        SearchIndex(SEARCH_INDEX_PATH, os.path.join("public", SEARCH_DIR)).clean()
+        if os.path.exists(LINK_INDEX_PATH):
+            os.remove(LINK_INDEX_PATH)
+        logger.info("Deleted the parse cache '%s', the inline cache '%s', the front matter index '%s', "
+                    "the search postings '%s' and the page links '%s'", PARSE_CACHE_DIR, INLINE_CACHE_PATH,
+                    METADATA_INDEX_PATH, SEARCH_INDEX_PATH, LINK_INDEX_PATH)
+    elif args.action == "reindex":
+        added, _, _ = metadata.rebuild("content")
+        logger.info("Indexed the front matter of %d pages in '%s'", len(added), METADATA_INDEX_PATH)
 
-main()
+if __name__ == "__main__":
+    main()
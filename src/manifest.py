@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+
+from src.front_matter import split_front_matter
+from src.page_writer import atomic_open
+from src.template import page_template_path
+
+# Bump this whenever the manifest layout changes in an incompatible way
+MANIFEST_FORMAT = 2
+
+# The input standing for the code that renders pages (see code_version)
+CODE_INPUT = "generator code"
+
+# The modules whose source decides what a page renders to. If any of them
+# change, every previously generated page is considered out of date.
+_RENDER_MODULES = [
+    "block_markdown.py",
+    "document.py",
+    "front_matter.py",
+    "inline_markdown.py",
+    "inline_cache.py",
+    "parse_cache.py",
+    "textnode.py",
+    "htmlnode.py",
+    "leafnode.py",
+    "parentnode.py",
+    "template.py",
+    "render.py",
+]
+
+_code_version = None
+
+
+# Hash a file in chunks so large sources don't have to be loaded all at once
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# A single hash over the source of every rendering module, computed once per process
+def code_version():
+    global _code_version
+    if _code_version is None:
+        _code_version = hash_modules(_RENDER_MODULES)
+    return _code_version
+
+
+# A hash over the source of the named modules in src/
+def hash_modules(names):
+    h = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in names:
+        h.update(name.encode())
+        with open(os.path.join(src_dir, name), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+# The dependency graph of incremental builds: every output, with an edge to each
+# input it was built from and a fingerprint of that input as it was then. An
+# output is built again exactly when one of its inputs changed (or appeared or
+# went away), and changes() says which.
+#
+# Inputs are files, keyed by path and fingerprinted by their hash, or values an
+# output was built from that aren't a file of their own, keyed by a description:
+# CODE_INPUT, or a listing page's entry for another page. A page's inputs are its
+# markdown source, its template (the one its front matter names, or the default)
+# and the generator code.
+#
+# Each output is keyed by its path and records:
+# - inputs: {input: fingerprint}
+# - source: for pages, the markdown source; the page is removed when it goes
+# - output_hash: hash of what was written, so an output edited by hand is noticed
+class BuildManifest():
+    def __init__(self, manifest_path, template_path):
+        self.manifest_path = os.path.abspath(manifest_path)
+        self.code_version = code_version()
+        self.template_path = _key(template_path)
+        self.template_hash = hash_file(template_path)
+        # Fingerprints of every template pages have picked so far, by path
+        self.template_hashes = {self.template_path: self.template_hash}
+        self.outputs = {}
+        # Sources seen during this build; pages of any other source are stale
+        self.seen = set()
+
+    def load(self):
+        if not os.path.exists(self.manifest_path):
+            return self
+        with open(self.manifest_path) as f:
+            data = json.load(f)
+        if data.get("format") != MANIFEST_FORMAT:
+            return self
+        self.outputs = data.get("outputs", {})
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        data = {
+            "format": MANIFEST_FORMAT,
+            "outputs": self.outputs,
+        }
+        with atomic_open(self.manifest_path) as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+    # The inputs of the page generated from source_path, as they are now
+    def page_inputs(self, source_path):
+        template_path = _key(self._page_template(source_path))
+        if template_path not in self.template_hashes:
+            # A missing template is an input too: the page is built again once it's there
+            exists = os.path.isfile(template_path)
+            self.template_hashes[template_path] = hash_file(template_path) if exists else "missing"
+        return {
+            _key(source_path): hash_file(source_path),
+            template_path: self.template_hashes[template_path],
+            CODE_INPUT: self.code_version,
+        }
+
+    # Only the front matter is read, and only if the source starts with it
+    def _page_template(self, source_path):
+        with open(source_path) as f:
+            try:
+                meta, _, _ = split_front_matter(f)
+            except ValueError:
+                # Rendering the page reports it, naming the file
+                meta = {}
+        return page_template_path(self.template_path, meta)
+
+    # Why output_path has to be built again, given what its inputs are now: a list
+    # of reasons, such as "content/index.md changed", or [] if it's up to date
+    def changes(self, output_path, inputs):
+        record = self.outputs.get(_key(output_path))
+        if record is None:
+            return ["it wasn't built before"]
+        reasons = []
+        built_from = record["inputs"]
+        for name, fingerprint in inputs.items():
+            if name not in built_from:
+                reasons.append(f"{name} is new")
+            elif built_from[name] != fingerprint:
+                reasons.append(f"{name} changed")
+        reasons.extend(f"{name} is gone" for name in built_from if name not in inputs)
+        if reasons:
+            return reasons
+        # The output may have been deleted or edited by hand since the last build
+        if not os.path.isfile(output_path):
+            return ["it was deleted"]
+        if record["output_hash"] != hash_file(output_path):
+            return ["it was edited"]
+        return []
+
+    # The inputs of the page generated from source_path as they are now, and changes()
+    # for them. Pass the inputs on to record() once the page is written, so they
+    # describe what it was rendered from even if the source is saved meanwhile.
+    def page_changes(self, source_path, dest_path):
+        self.seen.add(_key(source_path))
+        inputs = self.page_inputs(source_path)
+        return inputs, self.changes(dest_path, inputs)
+
+    # changes() for the page generated from source_path
+    def explain(self, source_path, dest_path):
+        return self.page_changes(source_path, dest_path)[1]
+
+    # Returns True if the page for source can be skipped
+    def is_up_to_date(self, source_path, dest_path):
+        return not self.explain(source_path, dest_path)
+
+    # Call after output_path was written from inputs
+    def record_output(self, output_path, inputs, source_path=None):
+        record = {"inputs": inputs, "output_hash": hash_file(output_path)}
+        if source_path is not None:
+            record["source"] = _key(source_path)
+        self.outputs[_key(output_path)] = record
+
+    # Call after generate_page has written dest_path for source_path, with the inputs
+    # page_changes() gave before it was rendered (or they're worked out again now)
+    def record(self, source_path, dest_path, inputs=None):
+        self.seen.add(_key(source_path))
+        if inputs is None:
+            inputs = self.page_inputs(source_path)
+        self.record_output(dest_path, inputs, source_path)
+
+    # Call when an output that isn't a page is deleted
+    def forget(self, output_path):
+        self.outputs.pop(_key(output_path), None)
+
+    # Delete the outputs of every page whose source wasn't seen in this build.
+    # Empty directories left behind are removed, up to (not including) dest_root.
+    # Returns the list of removed output paths.
+    def remove_stale(self, dest_root):
+        dest_root = _key(dest_root)
+        removed = []
+        for dest in sorted(self.outputs):
+            source = self.outputs[dest].get("source")
+            if source is None or source in self.seen:
+                continue
+            del self.outputs[dest]
+            if os.path.isfile(dest):
+                os.remove(dest)
+                removed.append(dest)
+                remove_empty_parents(os.path.dirname(dest), dest_root)
+        return removed
+
+
+# Paths are stored relative to the working directory so the manifest
+# survives the project being moved around
+def _key(path):
+    return os.path.relpath(os.path.abspath(path))
+
+
+# Remove directories left empty by deleting a page, stopping at the first
+# non-empty one or at stop_dir
+def remove_empty_parents(dir_path, stop_dir):
+    while dir_path and dir_path != stop_dir and os.path.isdir(dir_path) and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
@@ -0,0 +1,177 @@
+import json
+
+from src import parse_cache
+from src.manifest import hash_modules
+from src.sqlite_index import SqliteIndex, changed_sources, markdown_sources, removed_sources
+
+# Bump this whenever the tables change in an incompatible way
+SCHEMA_VERSION = 1
+
+# The modules that decide what ends up in the index, besides the parser. If any
+# of them change, the index is rebuilt from scratch.
+_INDEX_MODULES = ["metadata_index.py", "sqlite_index.py"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS pages (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    date TEXT,
+    draft INTEGER NOT NULL,
+    meta TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_date ON pages (date);
+CREATE TABLE IF NOT EXISTS tags (
+    tag TEXT NOT NULL,
+    path TEXT NOT NULL,
+    PRIMARY KEY (tag, path)
+);
+CREATE INDEX IF NOT EXISTS tags_path ON tags (path);
+CREATE TABLE IF NOT EXISTS listing_outputs (path TEXT PRIMARY KEY);
+"""
+
+_index_version = None
+
+
+def index_version():
+    global _index_version
+    if _index_version is None:
+        _index_version = f"{SCHEMA_VERSION}:{parse_cache.parser_version()}:{hash_modules(_INDEX_MODULES)}"
+    return _index_version
+
+
+# One indexed page, as returned by MetadataIndex queries. Its front matter is only
+# decoded if it's asked for, since listings mostly don't need it.
+class PageInfo():
+    __slots__ = ("path", "url", "title", "date", "mtime_ns", "_meta_json", "_meta")
+
+    def __init__(self, path, url, title, date, mtime_ns, meta_json):
+        self.path = path
+        self.url = url
+        self.title = title
+        self.date = date
+        self.mtime_ns = mtime_ns
+        self._meta_json = meta_json
+        self._meta = None
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            self._meta = json.loads(self._meta_json)
+        return self._meta
+
+    @property
+    def tags(self):
+        return _tags(self.meta)
+
+    def __repr__(self):
+        return f"PageInfo({self.path!r}, title={self.title!r}, date={self.date!r})"
+
+
+# The front matter, title and URL of every markdown page under a content directory,
+# in a SQLite database, so listing pages can be built from queries instead of by
+# reading every page.
+#
+# update() only reads files whose size or mtime changed, and only parses those
+# whose hash changed too (see SqliteIndex). Titles are Document titles, so a page's
+# Document comes from the parse cache when it's there, which it is for any page
+# the build just rendered.
+class MetadataIndex(SqliteIndex):
+    schema = _SCHEMA
+
+    def _version(self):
+        return index_version()
+
+    # listing_outputs is kept: those files still have to be cleaned up
+    def _clear(self, conn):
+        for table in ("pages", "tags"):
+            conn.execute(f"DELETE FROM {table}")
+
+    # Bring the index up to date with content_dir. index is a TreeIndex of
+    # content_dir, if one has already been scanned.
+    # Returns the (added, changed, removed) paths, relative to content_dir.
+    def update(self, content_dir, index=None):
+        sources = markdown_sources(content_dir, index)
+        added = []
+        changed = []
+        with self._transaction() as conn:
+            for path, entry, data, sha256, known in changed_sources(conn, sources):
+                document = parse_cache.cached_document(data.decode(), entry.path)
+                self._store(conn, path, sha256, entry.size, entry.mtime_ns, document)
+                (changed if known else added).append(path)
+
+            removed = removed_sources(conn, sources)
+            for path in removed:
+                conn.execute("DELETE FROM pages WHERE path = ?", (path,))
+                conn.execute("DELETE FROM tags WHERE path = ?", (path,))
+        return sorted(added), sorted(changed), removed
+
+    # Throw the index away and read every page again
+    def rebuild(self, content_dir, index=None):
+        self.clean()
+        return self.update(content_dir, index)
+
+    def _store(self, conn, path, sha256, size, mtime_ns, document):
+        meta = document.meta
+        date = str(meta["date"]) if "date" in meta else None
+        conn.execute("INSERT OR REPLACE INTO pages (path, sha256, size, mtime_ns, url, title, date, draft, meta) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (path, sha256, size, mtime_ns, page_url(path), document.title, date, bool(meta.get("draft")),
+                      json.dumps(meta, sort_keys=True, default=str)))
+        conn.execute("DELETE FROM tags WHERE path = ?", (path,))
+        conn.executemany("INSERT OR IGNORE INTO tags (tag, path) VALUES (?, ?)",
+                         [(tag, path) for tag in _tags(meta)])
+
+    # Pages under the directory prefix (e.g. "blog"), not counting the directory's own
+    # index.md, newest first. Drafts are left out. With a tag, only pages tagged with it.
+    def pages(self, prefix, tag=None, limit=None):
+        query = ("SELECT pages.path, url, title, date, mtime_ns, meta FROM pages"
+                 + (" JOIN tags ON tags.path = pages.path AND tags.tag = :tag" if tag is not None else "")
+                 + " WHERE pages.path LIKE :pattern ESCAPE '\\' AND pages.path != :own AND draft = 0"
+                 " ORDER BY COALESCE(date, '') DESC, title, pages.path")
+        if limit is not None:
+            query += " LIMIT :limit"
+        params = {"tag": tag, "pattern": _like_prefix(prefix), "own": f"{prefix}/index.md", "limit": limit}
+        rows = self._query(query, params)
+        return [PageInfo(*row) for row in rows]
+
+    # Every tag used by pages under prefix, with how many pages use it, by tag
+    def tags(self, prefix):
+        return self._query("SELECT tag, COUNT(*) FROM tags JOIN pages ON pages.path = tags.path"
+                           " WHERE pages.path LIKE ? ESCAPE '\\' AND pages.path != ? AND draft = 0"
+                           " GROUP BY tag ORDER BY tag", (_like_prefix(prefix), f"{prefix}/index.md"))
+
+    # The files generated from the index by the last build, so the next one can
+    # remove those it no longer generates
+    def listing_outputs(self):
+        return [row[0] for row in self._query("SELECT path FROM listing_outputs ORDER BY path")]
+
+    def set_listing_outputs(self, paths):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM listing_outputs")
+            conn.executemany("INSERT OR IGNORE INTO listing_outputs (path) VALUES (?)", [(p,) for p in paths])
+
+
+# The URL a page is served at, e.g. blog/tom/index.md -> /blog/tom/
+def page_url(path):
+    directory = path.rpartition("/")[0]
+    return "/" + directory + "/" if directory else "/"
+
+
+# Tags can be given as a list or a comma separated string
+def _tags(meta):
+    tags = meta.get("tags", [])
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    elif not isinstance(tags, list):
+        tags = [tags]
+    return sorted(set(str(tag).strip() for tag in tags if str(tag).strip()))
+
+
+def _like_prefix(prefix):
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "/%"
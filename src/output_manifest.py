@@ -0,0 +1,89 @@
+import json
+import os
+
+from src.manifest import hash_file
+from src.page_writer import atomic_open
+
+ADDED = "added"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+REMOVED = "removed"
+
+
+# A JSON lines record of every file in the output directory after a build, for
+# deploy tooling to upload and purge only what changed. Each line holds:
+# - path: the file's path relative to the output directory, with / separators
+# - status: added, changed, unchanged or removed, compared with the previous build
+# - sha256 and size: of the file's content (for removed files, as they were)
+# - mtime_ns: so the next build can reuse the hash of a file it didn't touch
+#
+# The file from the previous build is what the next build compares against, so it
+# should be kept between builds.
+class OutputManifest():
+    def __init__(self, manifest_path, output_dir):
+        self.manifest_path = os.path.abspath(manifest_path)
+        self.output_dir = os.path.abspath(output_dir)
+        # path -> record, from the previous build
+        self.previous = {}
+        self.entries = []
+
+    def load(self):
+        if not os.path.exists(self.manifest_path):
+            return self
+        with open(self.manifest_path) as f:
+            for line in f:
+                record = json.loads(line)
+                if record["status"] != REMOVED:
+                    self.previous[record["path"]] = record
+        return self
+
+    # Work out the status of every file from an OutputReport of the build
+    def update(self, report):
+        current = {}
+        for path in report.unchanged:
+            current[self._key(path)] = self._record(path, reuse=True)
+        for path in report.written:
+            current[self._key(path)] = self._record(path, reuse=False)
+
+        self.entries = []
+        for key, record in current.items():
+            before = self.previous.get(key)
+            if before is None:
+                record["status"] = ADDED
+            elif before["sha256"] != record["sha256"]:
+                record["status"] = CHANGED
+            else:
+                record["status"] = UNCHANGED
+            self.entries.append(record)
+        for key, before in self.previous.items():
+            if key not in current:
+                self.entries.append(dict(before, status=REMOVED))
+        self.entries.sort(key=lambda record: record["path"])
+        return self.entries
+
+    def _key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.output_dir).replace(os.sep, "/")
+
+    # A file the build didn't touch keeps its previous hash, as long as its size
+    # and mtime still match
+    def _record(self, path, reuse):
+        key = self._key(path)
+        st = os.stat(path)
+        before = self.previous.get(key)
+        if reuse and before is not None and before["size"] == st.st_size and before["mtime_ns"] == st.st_mtime_ns:
+            sha256 = before["sha256"]
+        else:
+            sha256 = hash_file(path)
+        return {"path": key, "sha256": sha256, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def counts(self):
+        counts = {ADDED: 0, CHANGED: 0, UNCHANGED: 0, REMOVED: 0}
+        for record in self.entries:
+            counts[record["status"]] += 1
+        return counts
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        with atomic_open(self.manifest_path) as f:
+            for record in self.entries:
+                f.write(json.dumps(record, sort_keys=True) + "\n")
@@ -0,0 +1,125 @@
+import os
+import threading
+
+# Pages are written through a buffer this big, however large they are
+BUFFER_SIZE = 1 << 16
+
+
+# What a build did to the output directory, as lists of absolute paths
+class OutputReport():
+    def __init__(self):
+        self.written = []
+        self.unchanged = []
+        self.deleted = []
+
+    def extend(self, other):
+        self.written.extend(other.written)
+        self.unchanged.extend(other.unchanged)
+        self.deleted.extend(other.deleted)
+
+    def __repr__(self):
+        return (f"OutputReport(written={len(self.written)}, unchanged={len(self.unchanged)}, deleted={len(self.deleted)})")
+
+
+# Writes to a temp file next to path, and renames it over path once the with block
+# is done:
+#   with AtomicFile(path) as f:
+#       f.write(...)
+# If the block raises, the temp file is removed and path is left as it was, so a
+# crashed build never leaves a half-written file behind.
+#
+# With skip_unchanged=True, a file that comes out byte for byte the same as the one
+# already at path isn't moved into place, so path keeps its mtime. Afterwards,
+# changed says whether path was replaced and size is the size of what was written.
+class AtomicFile():
+    def __init__(self, path, mode="w", skip_unchanged=False):
+        self.path = path
+        self.mode = mode
+        self.skip_unchanged = skip_unchanged
+        self.tmp_path = temp_path(path)
+        self.changed = None
+        self.size = None
+
+    def __enter__(self):
+        self.file = open(self.tmp_path, self.mode, buffering=BUFFER_SIZE)
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.file.close()
+            if exc_type is None:
+                self.size = os.path.getsize(self.tmp_path)
+                self.changed = not (self.skip_unchanged and files_equal(self.tmp_path, self.path))
+                if self.changed:
+                    os.replace(self.tmp_path, self.path)
+                    return False
+        except BaseException:
+            _remove(self.tmp_path)
+            raise
+        _remove(self.tmp_path)
+        return False
+
+
+def atomic_open(path, mode="w"):
+    return AtomicFile(path, mode)
+
+
+# Unique for every process and thread, so parallel builds writing the same file
+# don't write into each other's temp files
+def temp_path(path):
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Delete every file under root that isn't in keep (a collection of absolute paths),
+# along with any directories that leaves empty. Returns the deleted files.
+def prune_directory(root, keep):
+    root = os.path.abspath(root)
+    keep = set(keep)
+    deleted = []
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if path not in keep:
+                os.remove(path)
+                deleted.append(path)
+        if dirpath != root and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+    return sorted(deleted)
+
+
+# True if both files exist and hold the same bytes. Sizes are compared first, so
+# files that differ in length are never read.
+def files_equal(path_a, path_b):
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+    except FileNotFoundError:
+        return False
+    with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+        while True:
+            a = fa.read(BUFFER_SIZE)
+            if a != fb.read(BUFFER_SIZE):
+                return False
+            if not a:
+                return True
+
+
+# Writes the template filled in with context to dest_path, piece by piece: the
+# template text before {{ Content }}, the body fragments as they're rendered, then
+# the rest of the template. The whole page is never held in memory at once.
+# If dest_path already holds exactly this page it's left untouched.
+# Returns (changed, size): whether dest_path was written, and the page's size.
+def write_page(dest_path, template, context):
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    writer = AtomicFile(dest_path, skip_unchanged=True)
+    with writer as f:
+        template.render_to(f.write, context)
+    return writer.changed, writer.size
@@ -5,6 +5,8 @@ from src.htmlnode import HTMLNode
 # Any node that is not a leaf node (e.g. it has children) is a parent node
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     # tag and children arguments aren't optional
     # it doesn't take a value argument
     # props is optional
@@ -27,16 +29,39 @@ class ParentNode(HTMLNode):
     # should convert to 
     # <p><b>Bold text</b>Normal text<i>italic text</i>Normal text</p>
     def to_html(self):
+        # Collect every fragment and join them once, rather than concatenating
+        # the output of each level into its parent's string
+        return "".join(self.iter_html())
+
+    # Walks the tree with an explicit stack instead of recursing, so deeply nested
+    # trees don't hit the recursion limit. Fragments are collected into a list and
+    # handed out joined, roughly chunk_size fragments at a time.
+    def iter_html(self, chunk_size=4096):
+        self._check_renderable()
+        parts = [f"<{self.tag}{self.props_to_html()}>"]
+        stack = [(self.tag, iter(self.children))]
+        while stack:
+            # Carry on with the innermost unfinished node until it either runs out of
+            # children, or we step down into a child parent node
+            for child in stack[-1][1]:
+                if isinstance(child, ParentNode):
+                    child._check_renderable()
+                    parts.append(f"<{child.tag}{child.props_to_html()}>")
+                    stack.append((child.tag, iter(child.children)))
+                    break
+                parts.append(child.to_html())
+            else:
+                parts.append(f"</{stack.pop()[0]}>")
+                if len(parts) >= chunk_size:
+                    yield "".join(parts)
+                    parts = []
+        yield "".join(parts)
+
+    def _check_renderable(self):
         if self.tag is None:
             raise ValueError("All parent nodes must have a tag")
-        if self.children is None or self.children is []:
+        if self.children is None:
             raise ValueError("All parent nodes must have children")
-        else:            
-            child_results = ""
-            for c in self.children:
-                child_results += c.to_html()
-            
-            return f"<{self.tag}{self.props_to_html()}>{child_results}</{self.tag}>"
-        
+
     def __repr__(self):
         return (f"ParentNode(tag={self.tag!r}, children={self.children!r}, props={self.props!r})")
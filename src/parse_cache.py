@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+from src.document import Document, parse_document
+from src.manifest import hash_modules
+from src.page_writer import BUFFER_SIZE, atomic_open
+
+# The modules that decide what a markdown source renders to (body and Document).
+# The template isn't one of them: a template change keeps every cached body.
+_PARSER_MODULES = [
+    "block_markdown.py",
+    "document.py",
+    "front_matter.py",
+    "inline_markdown.py",
+    "inline_cache.py",
+    "textnode.py",
+    "htmlnode.py",
+    "leafnode.py",
+    "parentnode.py",
+    "parse_cache.py",
+]
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_parser_version = None
+
+
+# A single hash over the source of every parsing module, computed once per process
+def parser_version():
+    global _parser_version
+    if _parser_version is None:
+        _parser_version = hash_modules(_PARSER_MODULES)
+    return _parser_version
+
+
+# Rendered page bodies and their Documents, stored in cache_dir under a hash of the markdown
+# source and the parser version, so a page whose markdown hasn't changed doesn't
+# need parsing again, even if the template did.
+#
+# Each entry is a file holding the Document (everything but its tree) as JSON on the
+# first line, then the body HTML, so bodies can be written and read back a piece at a time.
+# Entries are written to a temp file and renamed into place, so any number of
+# build processes can share the directory: the same key always holds the same
+# content, and readers only ever see whole files.
+class ParseCache():
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown):
+        h = hashlib.sha256(parser_version().encode())
+        h.update(markdown.encode())
+        return h.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".page")
+
+    # Returns (Document, body chunks) for markdown, or None if it isn't cached. The
+    # Document has no root. The chunks are read from the cache file as they're
+    # iterated over.
+    def open(self, markdown):
+        entry = self._open_entry(markdown)
+        if entry is None:
+            return None
+        document, f = entry
+        return document, _read_chunks(f)
+
+    # Returns just the Document for markdown, or None if it isn't cached. The body
+    # isn't read.
+    def document(self, markdown):
+        entry = self._open_entry(markdown)
+        if entry is None:
+            return None
+        document, f = entry
+        f.close()
+        return document
+
+    # Returns (Document, the entry's file positioned at the body), or None
+    def _open_entry(self, markdown):
+        path = self._entry_path(self.key(markdown))
+        try:
+            f = open(path)
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            document = Document.from_dict(json.loads(f.readline()))
+        except (ValueError, KeyError, TypeError):
+            f.close()
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Eviction goes by mtime, so keep entries that are still used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return document, f
+
+    # Returns (Document, body_html) for markdown, or None if it isn't cached
+    def get(self, markdown):
+        entry = self.open(markdown)
+        if entry is None:
+            return None
+        document, chunks = entry
+        return document, "".join(chunks)
+
+    # Stores the body a piece at a time:
+    #   with cache.writer(markdown, document) as write:
+    #       for chunk in document.root.iter_html():
+    #           write(chunk)
+    # The entry is only stored if the with block finishes without raising.
+    @contextmanager
+    def writer(self, markdown, document):
+        path = self._entry_path(self.key(markdown))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_open(path) as f:
+            f.write(json.dumps(document.to_dict()) + "\n")
+            yield f.write
+
+    def put(self, markdown, document, body_html):
+        with self.writer(markdown, document) as write:
+            write(body_html)
+
+    # Delete the least recently used entries until the cache is no bigger than
+    # max_bytes. Returns the number of entries deleted.
+    def evict(self):
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return 0
+        deleted = 0
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            deleted += 1
+            if total <= self.max_bytes:
+                break
+        return deleted
+
+    def clean(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def _read_chunks(f):
+    with f:
+        for chunk in iter(lambda: f.read(BUFFER_SIZE), ""):
+            yield chunk
+
+
+# The cache used by generate_page, or None when there isn't one
+parse_cache = None
+
+
+# Use a parse cache in cache_dir, or none if cache_dir is None. Also used to set up
+# build worker processes.
+def configure(cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+    global parse_cache
+    parse_cache = None if cache_dir is None else ParseCache(cache_dir, max_bytes)
+    return parse_cache
+
+
+# The Document for markdown: from the parse cache, if there is one and it has the
+# page, or else parsed. Parse errors name path, if it's given.
+def cached_document(markdown, path=None):
+    document = parse_cache.document(markdown) if parse_cache is not None else None
+    if document is None:
+        try:
+            document = parse_document(markdown)
+        except ValueError as e:
+            if path is None:
+                raise
+            raise ValueError(f"'{path}': {e}") from None
+    return document
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# The profiler for this process, or None when profiling is off
+_active = None
+
+# Handed out by stage() when profiling is off, so instrumented code costs next to nothing
+_NO_PROFILING = nullcontext()
+
+
+# Records how long each stage of a build takes, in wall clock and CPU time, along with
+# counters such as nodes created and bytes written.
+#
+# Every stage becomes one event; events recorded for a page carry its path, so the
+# slowest pages can be picked out. The events can be written as a Chrome trace
+# (load it in chrome://tracing or https://ui.perfetto.dev).
+class BuildProfiler():
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events = []
+        self.counters = {}
+        # Pages are written on I/O threads, which count what they write
+        self._counters_lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, page=None):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.events.append({
+                "name": name,
+                "page": page,
+                "start": wall_start - self.started,
+                "wall": time.perf_counter() - wall_start,
+                "cpu": time.process_time() - cpu_start,
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+            })
+
+    def count(self, name, n=1):
+        with self._counters_lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    # Fold in what a worker process recorded
+    def merge(self, events, counters):
+        self.events.extend(events)
+        for name, n in counters.items():
+            self.count(name, n)
+
+    # Total wall and CPU seconds, and number of events, for each stage name
+    def stage_totals(self):
+        totals = {}
+        for event in self.events:
+            total = totals.setdefault(event["name"], {"wall": 0.0, "cpu": 0.0, "count": 0})
+            total["wall"] += event["wall"]
+            total["cpu"] += event["cpu"]
+            total["count"] += 1
+        return totals
+
+    # The n slowest pages as a list of (path, wall seconds, cpu seconds)
+    def slowest_pages(self, n=20):
+        pages = [(e["page"], e["wall"], e["cpu"]) for e in self.events if e["name"] == "page"]
+        pages.sort(key=lambda p: p[1], reverse=True)
+        return pages[:n]
+
+    def chrome_trace(self):
+        trace_events = []
+        for event in self.events:
+            args = {"cpu_ms": round(event["cpu"] * 1000, 3)}
+            if event["page"] is not None:
+                args["page"] = event["page"]
+            trace_events.append({
+                "name": event["name"],
+                "cat": "build",
+                "ph": "X",
+                "ts": round(event["start"] * 1e6, 1),
+                "dur": round(event["wall"] * 1e6, 1),
+                "pid": event["pid"],
+                "tid": event["tid"],
+                "args": args,
+            })
+        return {
+            "traceEvents": trace_events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "counters": self.counters,
+                "stages": self.stage_totals(),
+                "slowest_pages": [
+                    {"page": page, "wall": wall, "cpu": cpu} for page, wall, cpu in self.slowest_pages()
+                ],
+            },
+        }
+
+    def write_trace(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self, top=20):
+        lines = [f"{'stage':<16} {'count':>7} {'wall s':>9} {'cpu s':>9}"]
+        for name, total in sorted(self.stage_totals().items(), key=lambda t: t[1]["wall"], reverse=True):
+            lines.append(f"{name:<16} {total['count']:>7} {total['wall']:>9.4f} {total['cpu']:>9.4f}")
+        for name, n in sorted(self.counters.items()):
+            lines.append(f"{name}: {n}")
+        slowest = self.slowest_pages(top)
+        if slowest:
+            lines.append(f"Top {len(slowest)} slowest pages:")
+            for page, wall, cpu in slowest:
+                lines.append(f"  {wall * 1000:>9.2f} ms wall {cpu * 1000:>9.2f} ms cpu  {os.path.relpath(page)}")
+        return "\n".join(lines)
+
+
+# Turn profiling on for this process and return the profiler
+def enable():
+    global _active
+    _active = BuildProfiler()
+    return _active
+
+
+def disable():
+    global _active
+    _active = None
+
+
+def active():
+    return _active
+
+
+# Time a stage if profiling is on:
+#   with profiling.stage("parse", page=path):
+#       ...
+def stage(name, page=None):
+    if _active is None:
+        return _NO_PROFILING
+    return _active.stage(name, page)
+
+
+def count(name, n=1):
+    if _active is not None:
+        _active.count(name, n)
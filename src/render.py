@@ -0,0 +1,322 @@
+import logging
+import os
+from datetime import date
+from src import inline_cache, link_check, parse_cache, profiling
+from src.async_io import IOPool, map_limited
+from src.document import parse_document
+from src.page_writer import OutputReport, write_page
+from src.template import load_template, page_template_path
+from src.tree_index import scan_tree
+
+# Turning markdown sources into pages: everything a build, the dev server and listing
+# pages share. Kept apart from main, the command line entry point, so importing it
+# doesn't load main a second time under `python3 -m src.main`, and worker processes
+# find generate_page here.
+
+logger = logging.getLogger(__name__)
+
+# Walk the content directory and return every (markdown source, html destination) pair,
+# in the same order generate_pages_recursive has always visited them
+# index is a TreeIndex of dir_path_content, if one has already been scanned.
+def collect_pages(dir_path_content, dest_dir_path, index=None):
+    if index is None:
+        # Only paths are needed here
+        index = scan_tree(dir_path_content, stat=False)
+    pages = []
+    for entry in index.files():
+        # For each markdown file found, generate a new .html file using the same template.html.
+        if os.path.splitext(entry.rel_path)[1] == ".md":
+            output_file = os.path.join(dest_dir_path, os.path.dirname(entry.rel_path), "index.html")
+            pages.append((entry.path, os.path.normpath(output_file)))
+    return pages
+
+# If a BuildManifest is passed, pages whose inputs haven't changed since the last build are skipped,
+# and why each of the others is rebuilt is logged (at INFO with explain, DEBUG otherwise)
+# jobs > 1 renders the pages across that many worker processes
+# Returns an OutputReport of the pages written and the pages left unchanged
+# index is a TreeIndex of dir_path_content, if one has already been scanned.
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest=None, jobs=1, io_jobs=1,
+                             index=None, explain=False):
+    dir_path_content = os.path.abspath(dir_path_content)
+    if not os.path.exists(dir_path_content):
+        raise ValueError(f"dir_path_content: '{dir_path_content}' doesn't exist")
+    template_path = os.path.abspath(template_path)
+    if not os.path.exists(template_path):
+        raise ValueError(f"template_path: '{template_path}' doesn't exist")
+    dest_dir_path = os.path.abspath(dest_dir_path)
+
+    # The generated pages should be written to the public directory in the same directory structure.
+    pages = []
+    skipped = []
+    # The inputs of every page to render, by output, to record once it's written
+    page_inputs = {}
+    log_reasons = logger.info if explain else logger.debug
+    for path, output_file in collect_pages(dir_path_content, dest_dir_path, index):
+        if manifest is not None:
+            page_inputs[output_file], reasons = manifest.page_changes(path, output_file)
+            if not reasons:
+                logger.debug("Skipping unchanged page '%s'", path)
+                skipped.append(output_file)
+                continue
+            log_reasons("Rebuilding '%s': %s", os.path.relpath(output_file), "; ".join(reasons))
+        pages.append((path, output_file))
+
+    report = generate_pages(pages, template_path, jobs, site_root=dest_dir_path, io_jobs=io_jobs)
+    report.unchanged.extend(skipped)
+
+    if manifest is not None:
+        for path, output_file in pages:
+            manifest.record(path, output_file, page_inputs[output_file])
+    return report
+
+# Render a list of (source, destination) pages, either one after the other or across a process pool.
+# Every page is rendered by generate_page either way, so the output is identical.
+# With jobs <= 1 and io_jobs > 1, pages are parsed one at a time while up to io_jobs
+# files are read and written in the background.
+# Returns an OutputReport of the pages written and the pages that came out unchanged.
+def generate_pages(pages, template_path, jobs=1, site_root=None, io_jobs=1):
+    report = OutputReport()
+    if jobs <= 1 and io_jobs > 1 and len(pages) > 1:
+        import asyncio
+        results = asyncio.run(_generate_pages_async(pages, template_path, site_root, io_jobs))
+        _report_results(report, pages, results)
+        return report
+    if jobs <= 1 or len(pages) <= 1:
+        results = [generate_page(path, template_path, output_file, site_root) for path, output_file in pages]
+        _report_results(report, pages, results)
+        return report
+
+    # With profiling or link checking on, each worker profiles its own pages or records
+    # their links, and sends the results back
+    profiler = profiling.active()
+    collected = link_check.active()
+    worker = generate_page
+    extra_args = ()
+    if profiler is not None or collected is not None:
+        worker = _generate_page_in_worker
+        extra_args = (profiler is not None, collected is not None)
+
+    # Only imported when there's a pool to start: it pulls in most of multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    results = []
+    # Workers get the same cache settings as this process
+    cache = inline_cache.inline_cache
+    pages_cache = parse_cache.parse_cache
+    initargs = (cache.maxsize, cache.path,
+                None if pages_cache is None else pages_cache.cache_dir,
+                parse_cache.DEFAULT_MAX_BYTES if pages_cache is None else pages_cache.max_bytes)
+    with ProcessPoolExecutor(max_workers=min(jobs, len(pages)), initializer=_init_worker,
+                             initargs=initargs) as executor:
+        futures = [executor.submit(worker, path, template_path, output_file, site_root, *extra_args)
+                   for path, output_file in pages]
+        # Wait for every page so one bad file reports alongside all the others
+        for future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                results.append(e)
+                continue
+            if extra_args:
+                result, profile, references = result
+                if profile is not None:
+                    profiler.merge(*profile)
+                if references is not None:
+                    collected.update(references)
+            results.append(result)
+    _report_results(report, pages, results)
+    return report
+
+# Add every page to the report by its result: True if it was written, False if it was
+# unchanged, or the exception it failed with
+def _report_results(report, pages, results):
+    errors = []
+    for (path, output_file), result in zip(pages, results):
+        if isinstance(result, Exception):
+            errors.append(f"'{path}': {type(result).__name__}: {result}")
+        elif isinstance(result, BaseException):
+            raise result
+        elif result:
+            report.written.append(os.path.abspath(output_file))
+        else:
+            report.unchanged.append(os.path.abspath(output_file))
+    if errors:
+        raise RuntimeError(f"failed to generate {len(errors)} page(s):\n" + "\n".join(errors))
+
+# Sources are read and pages written on a pool of I/O threads, while parsing stays on
+# this thread, so the next page can be parsed while earlier ones are still on their way
+async def _generate_pages_async(pages, template_path, site_root, io_jobs):
+    with IOPool(io_jobs) as pool:
+        async def generate(page):
+            from_path, dest_path = (os.path.abspath(p) for p in page)
+            logger.debug("Generating page from '%s' to '%s' using '%s'", from_path, dest_path, template_path)
+            # Wall time only: the pool's threads share this process's CPU time
+            with profiling.stage("page", page=from_path):
+                markdown_file, mtime = await pool.run(read_source, from_path)
+                write = prepare_page(from_path, markdown_file, mtime, template_path, dest_path, site_root)
+                return await pool.run(write)
+
+        # Only a couple of pages per I/O thread are in memory at a time
+        return await map_limited(generate, pages, io_jobs * 2)
+
+def _init_worker(inline_cache_size, inline_cache_path, parse_cache_dir, parse_cache_max_bytes):
+    inline_cache.configure(inline_cache_size, inline_cache_path)
+    parse_cache.configure(parse_cache_dir, parse_cache_max_bytes)
+
+# Runs generate_page in a worker process with a profiler and a link recorder of its own,
+# as asked for, and returns its result along with what they recorded, so the parent
+# can merge it: (result, (events, counters) or None, references or None)
+def _generate_page_in_worker(from_path, template_path, dest_path, site_root=None, profile=False,
+                             collect_links=False):
+    profiler = profiling.enable() if profile else None
+    references = link_check.enable() if collect_links else None
+    try:
+        changed = generate_page(from_path, template_path, dest_path, site_root)
+    finally:
+        if profile:
+            profiling.disable()
+        if collect_links:
+            link_check.disable()
+    return changed, None if profiler is None else (profiler.events, profiler.counters), references
+
+# site_root is the directory the site is served from; when given, the page's URL path
+# is available to the template as {{ Path }}
+# Returns True if dest_path was written, or False if it already held exactly this page.
+def generate_page(from_path, template_path, dest_path, site_root=None):
+    logger.debug("Generating page from '%s' to '%s' using '%s'", from_path, dest_path, template_path)
+
+    from_path = os.path.abspath(from_path)
+    if not os.path.exists(from_path):
+        raise ValueError(f"from_path: '{from_path}' doesn't exist")
+    dest_path = os.path.abspath(dest_path)
+
+    with profiling.stage("page", page=from_path):
+        markdown_file, mtime = read_source(from_path)
+        write = prepare_page(from_path, markdown_file, mtime, template_path, dest_path, site_root)
+        return write()
+
+# Returns the text of a markdown source and its mtime
+def read_source(from_path):
+    # Read the markdown file at from_path and store the contents in a variable
+    with profiling.stage("read"):
+        with open(from_path) as f:
+            markdown_file = f.read()
+            mtime = os.fstat(f.fileno()).st_mtime
+    return markdown_file, mtime
+
+# Does everything generate_page does short of writing the page: parsing (or a parse cache
+# lookup) and filling in the context. Returns a function that writes the page, rendering
+# the body as it goes, and returns True if dest_path was written.
+def prepare_page(from_path, markdown_file, mtime, template_path, dest_path, site_root=None):
+    # A page whose markdown was rendered before (by this build or an earlier one)
+    # only needs its template filled in
+    pages_cache = parse_cache.parse_cache
+    cached = None
+    if pages_cache is not None:
+        with profiling.stage("parse_cache"):
+            cached = pages_cache.open(markdown_file)
+    if cached is not None:
+        document, body = cached
+        profiling.count("parse_cache_hits")
+    else:
+        document = parse_markdown(markdown_file)
+        # The body is rendered a piece at a time as the page is written
+        body = document.root.iter_html()
+        if pages_cache is not None:
+            profiling.count("parse_cache_misses")
+    link_check.record(from_path, document)
+    # The template is only read and compiled again if it changed since it was last
+    # used, so pages picking their own don't cost a read each
+    with profiling.stage("load_template"):
+        template = load_template(page_template_path(template_path, document.meta))
+    # The body can only be streamed into a single {{ Content }}
+    if template.slots.count("Content") != 1:
+        body = "".join(body)
+
+    url_path = page_url_path(dest_path, site_root) if site_root is not None else None
+    context = page_context(document, body, mtime, url_path)
+    profiling.count("pages")
+
+    def write():
+        # Write the new full HTML page to a file at dest_path, creating any necessary directories if they don't exist
+        with profiling.stage("render_write"):
+            if cached is not None or pages_cache is None:
+                changed, size = write_page(dest_path, template, context)
+            elif isinstance(body, str):
+                pages_cache.put(markdown_file, document, body)
+                changed, size = write_page(dest_path, template, context)
+            else:
+                # Store the body in the cache as it goes by; if the page fails, so does the entry
+                with pages_cache.writer(markdown_file, document) as cache_write:
+                    context["Content"] = _tee(body, cache_write)
+                    changed, size = write_page(dest_path, template, context)
+        if changed:
+            profiling.count("bytes_written", size)
+        return changed
+    return write
+
+# Values for the placeholders in the template, e.g. {{ Title }} and {{ Content }}
+# body is the document's HTML, as a string or an iterable of strings
+# Front matter fields are there by their own names too, e.g. {{ author }}, except
+# where one is named the same as a placeholder above.
+def page_context(document, body, mtime, url_path=None):
+    context = {
+        "Title": document.title,
+        "Content": body,
+        # A date in the front matter wins over when the file was last modified
+        "Date": str(document.meta["date"]) if "date" in document.meta else date.fromtimestamp(mtime).isoformat(),
+        "TOC": document.toc_html(),
+        "WordCount": str(document.word_count),
+        "ReadingTime": str(document.reading_time()),
+    }
+    if url_path is not None:
+        context["Path"] = url_path
+    for key, value in document.meta.items():
+        context.setdefault(key, _meta_text(value))
+    return context
+
+# Front matter values as they're shown in a page: lists as "a, b" and booleans as
+# true or false, the way they're written
+def _meta_text(value):
+    if isinstance(value, list):
+        return ", ".join(_meta_text(item) for item in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+# Yields every chunk, after passing it to write
+def _tee(chunks, write):
+    for chunk in chunks:
+        write(chunk)
+        yield chunk
+
+# Returns the Document for a page's markdown; its title comes from the first h1
+def parse_markdown(markdown):
+    cache = inline_cache.inline_cache
+    hits, misses = cache.hits, cache.misses
+    with profiling.stage("parse"):
+        document = parse_document(markdown)
+    if profiling.active() is not None:
+        profiling.count("nodes", count_nodes(document.root))
+        profiling.count("inline_cache_hits", cache.hits - hits)
+        profiling.count("inline_cache_misses", cache.misses - misses)
+    if document.title is None:
+        raise Exception("no h1 header found")
+    return document
+
+# Number of nodes in a tree, counted without recursion
+def count_nodes(root):
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+# The URL a page is served at, e.g. public/blog/tom/index.html -> /blog/tom/
+def page_url_path(dest_path, site_root):
+    rel_dir = os.path.relpath(os.path.dirname(os.path.abspath(dest_path)), os.path.abspath(site_root))
+    if rel_dir == ".":
+        return "/"
+    return "/" + rel_dir.replace(os.sep, "/") + "/"
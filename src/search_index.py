@@ -0,0 +1,210 @@
+import json
+import os
+import re
+
+from src import parse_cache
+from src.manifest import hash_modules
+from src.metadata_index import page_url
+from src.page_writer import AtomicFile, OutputReport
+from src.sqlite_index import SqliteIndex, changed_sources, markdown_sources, removed_sources
+
+# Bump this whenever the files written for the browser change in an incompatible way
+SEARCH_FORMAT = 1
+
+# Terms are sharded by their first PREFIX_LENGTH characters
+PREFIX_LENGTH = 2
+MANIFEST_NAME = "index.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    terms TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (shard TEXT PRIMARY KEY, postings TEXT NOT NULL);
+"""
+
+_SAFE_SHARD_RE = re.compile(r"[a-z0-9]+")
+
+
+def index_version():
+    return f"{SEARCH_FORMAT}:{parse_cache.parser_version()}:{hash_modules(['search_index.py', 'sqlite_index.py'])}"
+
+
+# An inverted index of every page under a content directory, for searching in the
+# browser without a server. It's written to output_dir as:
+# - index.json: {"format", "prefix_length", "pages": {id: [url, title]},
+#   "shards": {prefix: file name}}
+# - one JSON file per term prefix (the first PREFIX_LENGTH characters of a term):
+#   {term: [page id, weight, page id, weight, ...]}, heaviest first
+# so a search for a word only needs index.json and the one shard its prefix is in.
+#
+# Terms and weights come from Document.terms, which is worked out from the text the
+# inline parser produced. A SQLite database at db_path keeps, between builds, the
+# terms of every page and the contents of every shard, so only the pages whose
+# source changed are looked at again, and only the shards holding terms those
+# pages added, lost or now count differently are written again. A page's Document
+# comes from the parse cache when it's there, which it is for any page the build
+# just rendered.
+#
+# Shards are stored whole, the way they're written, rather than a row per term
+# and page: a cold index of 10000 pages has most of a million postings, and
+# inserting them one at a time took longer than parsing the pages.
+class SearchIndex(SqliteIndex):
+    schema = _SCHEMA
+
+    def __init__(self, db_path, output_dir):
+        super().__init__(db_path)
+        self.output_dir = os.path.abspath(output_dir)
+
+    def _version(self):
+        return index_version()
+
+    def _clear(self, conn):
+        conn.execute("DELETE FROM shards")
+        conn.execute("DELETE FROM pages")
+
+    # Bring the index up to date with content_dir and write the shards that
+    # changed. index is a TreeIndex of content_dir, if one has already been scanned.
+    # Returns an OutputReport of the files in output_dir.
+    def update(self, content_dir, index=None):
+        sources = markdown_sources(content_dir, index)
+        with self._transaction() as conn:
+            shards = _Shards(conn)
+            for path, entry, data, sha256, known in changed_sources(conn, sources):
+                document = parse_cache.cached_document(data.decode(), entry.path)
+                terms = json.dumps(document.terms)
+                if known:
+                    page_id, old_terms = self._page(conn, path)
+                    conn.execute("UPDATE pages SET sha256 = ?, size = ?, mtime_ns = ?, title = ?, terms = ? WHERE id = ?",
+                                 (sha256, entry.size, entry.mtime_ns, document.title, terms, page_id))
+                else:
+                    page_id = conn.execute(
+                        "INSERT INTO pages (path, sha256, size, mtime_ns, url, title, terms) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (path, sha256, entry.size, entry.mtime_ns, page_url(path), document.title, terms)).lastrowid
+                    old_terms = {}
+                shards.replace(page_id, old_terms, document.terms)
+
+            for path in removed_sources(conn, sources):
+                page_id, old_terms = self._page(conn, path)
+                shards.replace(page_id, old_terms, {})
+                conn.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+
+            shards.save()
+            pages = conn.execute("SELECT id, url, title FROM pages ORDER BY id").fetchall()
+            names = [row[0] for row in conn.execute("SELECT shard FROM shards ORDER BY shard")]
+            # Shards missing from output_dir (e.g. it was cleaned) are written again too
+            missing = [shard for shard in names
+                       if shard not in shards.dirty and not os.path.exists(self._shard_path(shard))]
+            to_write = {shard: shards.encoded[shard] for shard in names if shard in shards.dirty}
+            for shard in missing:
+                to_write[shard] = conn.execute("SELECT postings FROM shards WHERE shard = ?", (shard,)).fetchone()[0]
+
+        return self._write(pages, names, to_write)
+
+    # The id and terms of the indexed page at path
+    def _page(self, conn, path):
+        page_id, terms = conn.execute("SELECT id, terms FROM pages WHERE path = ?", (path,)).fetchone()
+        return page_id, json.loads(terms)
+
+    def _shard_path(self, shard):
+        return os.path.join(self.output_dir, shard_file_name(shard))
+
+    # to_write maps shards to their JSON
+    def _write(self, pages, shards, to_write):
+        os.makedirs(self.output_dir, exist_ok=True)
+        report = OutputReport()
+        manifest = {
+            "format": SEARCH_FORMAT,
+            "prefix_length": PREFIX_LENGTH,
+            "pages": {str(page_id): [url, title] for page_id, url, title in pages},
+            "shards": {shard: shard_file_name(shard) for shard in shards},
+        }
+        outputs = [(os.path.join(self.output_dir, MANIFEST_NAME), _encode(manifest))]
+        outputs.extend((self._shard_path(shard), text) for shard, text in to_write.items())
+        for path, text in outputs:
+            writer = AtomicFile(path, skip_unchanged=True)
+            with writer as f:
+                f.write(text)
+            (report.written if writer.changed else report.unchanged).append(path)
+        report.unchanged.extend(self._shard_path(shard) for shard in shards if shard not in to_write)
+
+        # Shards no term is in anymore
+        keep = set(report.written + report.unchanged)
+        for name in sorted(os.listdir(self.output_dir)):
+            path = os.path.join(self.output_dir, name)
+            if path not in keep and name.endswith(".json") and os.path.isfile(path):
+                os.remove(path)
+                report.deleted.append(path)
+        return report
+
+
+# The shards one update changes, read from the database the first time they're
+# needed and kept as {term: {page id: weight}} until they're saved
+class _Shards():
+    def __init__(self, conn):
+        self.conn = conn
+        self.loaded = {}
+        self.dirty = set()
+        # The JSON of every saved dirty shard
+        self.encoded = {}
+
+    def _get(self, shard):
+        postings = self.loaded.get(shard)
+        if postings is None:
+            row = self.conn.execute("SELECT postings FROM shards WHERE shard = ?", (shard,)).fetchone()
+            postings = {}
+            if row is not None:
+                for term, flat in json.loads(row[0]).items():
+                    postings[term] = dict(zip(flat[::2], flat[1::2]))
+            self.loaded[shard] = postings
+        return postings
+
+    # Only the terms whose weight changed are touched, so editing a page only dirties
+    # the shards of the words that were added, removed or counted differently
+    def replace(self, page_id, old_terms, new_terms):
+        for term in old_terms:
+            if term not in new_terms:
+                shard = term[:PREFIX_LENGTH]
+                postings = self._get(shard)
+                pages = postings.get(term, {})
+                pages.pop(page_id, None)
+                if not pages:
+                    postings.pop(term, None)
+                self.dirty.add(shard)
+        for term, weight in new_terms.items():
+            if old_terms.get(term) != weight:
+                shard = term[:PREFIX_LENGTH]
+                self._get(shard).setdefault(term, {})[page_id] = weight
+                self.dirty.add(shard)
+
+    def save(self):
+        for shard in sorted(self.dirty):
+            postings = self.loaded[shard]
+            if not postings:
+                self.conn.execute("DELETE FROM shards WHERE shard = ?", (shard,))
+                continue
+            # Heaviest first, so a browser can stop reading a long list early
+            encoded = _encode({term: [value for page in sorted(pages, key=lambda page: (-pages[page], page))
+                                      for value in (page, pages[page])]
+                               for term, pages in postings.items()})
+            self.conn.execute("INSERT OR REPLACE INTO shards (shard, postings) VALUES (?, ?)", (shard, encoded))
+            self.encoded[shard] = encoded
+
+
+def _encode(data):
+    return json.dumps(data, separators=(",", ":"), sort_keys=True)
+
+
+# Prefixes of plain lowercase letters and digits are their own file names; anything
+# else is spelled out in hex, so every prefix gets a name that's safe everywhere
+def shard_file_name(shard):
+    if _SAFE_SHARD_RE.fullmatch(shard):
+        return shard + ".json"
+    return "_" + shard.encode("utf-8").hex() + ".json"
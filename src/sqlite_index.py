@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from src.tree_index import scan_tree
+
+
+# What MetadataIndex and SearchIndex have in common: a SQLite database at db_path
+# with an info table holding the version of the code that wrote it, and a pages
+# table keyed by path (relative to the content directory, with / separators) that
+# records the sha256, size and mtime of the source each page was read from.
+#
+# The database is in WAL mode and every update is one transaction, so any number
+# of builds can read it while another updates it, and they never see a half
+# finished update. Updates from parallel builds take turns.
+#
+# Subclasses set schema, and define _version() and _clear(conn), which empties
+# whatever an index written by other code can't be trusted for.
+class SqliteIndex():
+    schema = ""
+
+    def __init__(self, db_path):
+        self.db_path = os.path.abspath(db_path)
+
+    def _connect(self, readonly=False):
+        if readonly:
+            return sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=30)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Outside any transaction, so the tables are there for readers even if the
+        # first update fails
+        conn.executescript(self.schema)
+        return conn
+
+    # A connection inside a write transaction, committed if the with block finishes.
+    # The write lock is taken straight away, so two builds can't both decide what
+    # to update from the same starting point.
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._check_version(conn)
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # An index written by other code, or by an older schema, is emptied
+    def _check_version(self, conn):
+        row = conn.execute("SELECT value FROM info WHERE key = 'version'").fetchone()
+        if row is not None and row[0] == self._version():
+            return
+        self._clear(conn)
+        conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('version', ?)", (self._version(),))
+
+    def _query(self, query, params=()):
+        if not os.path.exists(self.db_path):
+            return []
+        conn = self._connect(readonly=True)
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+    def clean(self):
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.db_path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+# The markdown pages under content_dir, by path relative to it (with / separators).
+# index is a TreeIndex of content_dir, if one has already been scanned.
+def markdown_sources(content_dir, index=None):
+    if index is None:
+        index = scan_tree(content_dir)
+    sources = {}
+    for entry in index.files():
+        if entry.rel_path.endswith(".md"):
+            sources[entry.rel_path.replace(os.sep, "/")] = entry
+    return sources
+
+
+# The sources whose contents changed since they were last indexed (or that were
+# never indexed), as (path, entry, data, sha256, known) where known says whether
+# the page was in the index before. Only files whose size or mtime changed are
+# read; a file that was only touched gets its new size and mtime recorded and
+# isn't yielded.
+def changed_sources(conn, sources):
+    known = {row[0]: row[1:] for row in conn.execute("SELECT path, size, mtime_ns, sha256 FROM pages")}
+    for path, entry in sources.items():
+        row = known.get(path)
+        if row is not None and row[0] == entry.size and row[1] == entry.mtime_ns:
+            continue
+        with open(entry.path, "rb") as f:
+            data = f.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        if row is not None and row[2] == sha256:
+            conn.execute("UPDATE pages SET size = ?, mtime_ns = ? WHERE path = ?", (entry.size, entry.mtime_ns, path))
+            continue
+        yield path, entry, data, sha256, row is not None
+
+
+# The indexed pages that aren't among sources anymore, by path
+def removed_sources(conn, sources):
+    return sorted(row[0] for row in conn.execute("SELECT path FROM pages") if row[0] not in sources)
@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+
+from src.manifest import hash_file, remove_empty_parents
+from src.page_writer import AtomicFile, atomic_open, temp_path
+from src.tree_index import DIR, scan_tree
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; reflinks are skipped there
+    fcntl = None
+
+# ioctl request number for FICLONE (from linux/fs.h). Asks filesystems such as
+# btrfs or XFS to share the source's extents instead of copying the data.
+_FICLONE = 0x40049409
+
+
+# What a sync did, as lists of paths relative to the destination directory
+class SyncResult():
+    def __init__(self):
+        self.copied = []
+        self.unchanged = []
+        self.deleted = []
+
+    def __repr__(self):
+        return (f"SyncResult(copied={len(self.copied)}, unchanged={len(self.unchanged)}, deleted={len(self.deleted)})")
+
+
+# Make destination_dir hold the same files as source_dir without starting from scratch.
+#
+# - Files whose size and mtime match are left alone. With use_hash=True, a file whose
+#   mtime differs but whose content hash matches is also left alone.
+# - New or changed files are copied (or hardlinked with link=True).
+# - Only files this function copied on a previous run, and which have since
+#   disappeared from source_dir, are deleted. The list of those files is kept at
+#   state_path, so anything else in destination_dir (e.g. generated pages) is never touched.
+#
+# index is a TreeIndex of source_dir, if one has already been scanned.
+def sync_directory(source_dir, destination_dir, state_path, use_hash=False, link=False, index=None):
+    source_dir = os.path.abspath(source_dir)
+    destination_dir = os.path.abspath(destination_dir)
+    if not os.path.isdir(source_dir):
+        raise ValueError(f"source directory '{source_dir}' doesn't exist")
+    if index is None:
+        index = scan_tree(source_dir)
+
+    previous = _load_state(state_path)
+    result = SyncResult()
+    synced = []
+
+    os.makedirs(destination_dir, exist_ok=True)
+    for entry in sorted(index.entries.values(), key=lambda e: e.rel_path.split(os.sep)):
+        dst = os.path.join(destination_dir, entry.rel_path)
+        if entry.kind == DIR:
+            os.makedirs(dst, exist_ok=True)
+            continue
+        rel = entry.rel_path
+        synced.append(rel)
+        if _is_unchanged(entry, dst, use_hash):
+            result.unchanged.append(rel)
+            continue
+        copy_file(entry.path, dst, link)
+        result.copied.append(rel)
+
+    current = set(synced)
+    for rel in sorted(previous - current):
+        path = os.path.join(destination_dir, rel)
+        if os.path.isfile(path):
+            os.remove(path)
+            result.deleted.append(rel)
+            remove_empty_parents(os.path.dirname(path), destination_dir)
+
+    save_state(state_path, synced)
+    return result
+
+
+# entry is the source file's TreeEntry, so only the destination needs a stat
+def _is_unchanged(entry, dst, use_hash):
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    if entry.size != dst_stat.st_size:
+        return False
+    if entry.mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(entry.path) == hash_file(dst):
+        # Same bytes, so just bring the mtime in line for the next cheap comparison
+        shutil.copystat(entry.path, dst)
+        return True
+    return False
+
+
+# Copy src to dst as cheaply as the filesystem allows: a hardlink (if asked for),
+# then a reflink, then an in-kernel copy_file_range, then a plain copy.
+# The new file is written under a temporary name and moved into place, so dst is
+# never half-written and an existing hardlink to the source is never written through.
+def copy_file(src, dst, link=False):
+    if link:
+        tmp = temp_path(dst)
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dst)
+            return
+        except OSError:
+            # Different filesystems, or links not supported: fall back to copying
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+
+    writer = AtomicFile(dst, "wb")
+    with open(src, "rb") as fsrc, writer as fdst:
+        if not _reflink(fsrc, fdst) and not _copy_file_range(fsrc, fdst):
+            shutil.copyfileobj(fsrc, fdst, 1 << 20)
+        # Before the rename, and after the last write, so the mtime sticks
+        fdst.flush()
+        shutil.copystat(src, writer.tmp_path)
+
+
+def _reflink(fsrc, fdst):
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def _copy_file_range(fsrc, fdst):
+    if not hasattr(os, "copy_file_range"):
+        return False
+    size = os.fstat(fsrc.fileno()).st_size
+    remaining = size
+    try:
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+    except OSError:
+        # Nothing has been written if the very first call fails, e.g. across filesystems
+        # on older kernels, so the caller can still fall back to a plain copy
+        if remaining == size:
+            return False
+        raise
+    if remaining > 0:
+        # Both file offsets have moved along with the copy, so finish the rest by hand
+        shutil.copyfileobj(fsrc, fdst, 1 << 20)
+    return True
+
+
+def _load_state(state_path):
+    if not os.path.exists(state_path):
+        return set()
+    with open(state_path) as f:
+        return set(json.load(f))
+
+
+# Records synced, the files (relative to the destination) now copied from the
+# source, as the ones a later sync_directory deletes once they leave the source.
+# For anything else that copies the source over, such as a full build.
+def save_state(state_path, synced):
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    with atomic_open(state_path) as f:
+        json.dump(synced, f, indent=1)
+
@@ -0,0 +1,78 @@
+import os
+import re
+
+# {{ Name }} placeholders. The spaces inside the braces are optional.
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_.-]*)\s*\}\}")
+
+# Compiled templates by absolute path, along with the mtime and size they were read at
+_cache = {}
+
+
+# A template split once into literal text and named slots, e.g.
+#   "<title>{{ Title }}</title>" -> literals ["<title>", "</title>"], slots ["Title"]
+# There is always one more literal than there are slots.
+class Template():
+    def __init__(self, text, path=None):
+        self.path = path
+        self.literals = []
+        self.slots = []
+        # The placeholder text as written, used for slots with no value
+        self.raw_slots = []
+        pos = 0
+        for match in _PLACEHOLDER_RE.finditer(text):
+            self.literals.append(text[pos:match.start()])
+            self.slots.append(match.group(1))
+            self.raw_slots.append(match.group(0))
+            pos = match.end()
+        self.literals.append(text[pos:])
+
+    # Calls write() with each piece of the page in order, so the page can go straight
+    # to a file without being assembled in memory first.
+    # A value can be a string, or an iterable of strings (e.g. HTMLNode.iter_html()).
+    # Placeholders missing from context are written out unchanged.
+    def render_to(self, write, context):
+        literals = self.literals
+        write(literals[0])
+        for i, name in enumerate(self.slots):
+            value = context.get(name)
+            if value is None:
+                write(self.raw_slots[i])
+            elif isinstance(value, str):
+                write(value)
+            else:
+                for chunk in value:
+                    write(chunk)
+            write(literals[i + 1])
+
+    def render(self, context):
+        parts = []
+        self.render_to(parts.append, context)
+        return "".join(parts)
+
+    def __repr__(self):
+        return f"Template(path={self.path!r}, slots={self.slots!r})"
+
+
+# A page can pick a template of its own in its front matter, e.g. "template: post.html",
+# named relative to the directory the default template at template_path is in
+def page_template_path(template_path, meta):
+    name = meta.get("template")
+    if not name:
+        return template_path
+    return os.path.join(os.path.dirname(os.path.abspath(template_path)), str(name))
+
+
+# Returns the compiled template at path, only reading and compiling it again if
+# the file has changed since it was last loaded
+def load_template(path):
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        raise ValueError(f"template_path: '{path}' doesn't exist")
+    stat = os.stat(path)
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+    with open(path) as f:
+        template = Template(f.read(), path)
+    _cache[path] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
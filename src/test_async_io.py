@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import unittest
+
+from src.async_io import IOPool, map_limited
+
+
+class TestAsyncIO(unittest.TestCase):
+    def test_results_in_order_with_exceptions(self):
+        async def handle(item):
+            await asyncio.sleep(0.001 * (5 - item))
+            if item == 2:
+                raise ValueError("two")
+            return item * 10
+
+        results = asyncio.run(map_limited(handle, range(5), 2))
+        self.assertEqual(results[:2] + results[3:], [0, 10, 30, 40])
+        self.assertIsInstance(results[2], ValueError)
+
+    def test_limit(self):
+        running = 0
+        most = 0
+
+        async def handle(item):
+            nonlocal running, most
+            running += 1
+            most = max(most, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+
+        asyncio.run(map_limited(handle, range(20), 3))
+        self.assertEqual(most, 3)
+
+    # Every call blocks until all 8 are in flight at once, which only happens if the
+    # pool runs them side by side; if it doesn't, they give up waiting and peak stays low
+    def test_pool_overlaps_blocking_calls(self):
+        lock = threading.Lock()
+        all_started = threading.Event()
+        in_flight = 0
+        peak = 0
+
+        def blocking(n):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                if in_flight == 8:
+                    all_started.set()
+            all_started.wait(timeout=5)
+            with lock:
+                in_flight -= 1
+            return n
+
+        async def run():
+            with IOPool(8) as pool:
+                return await map_limited(lambda n: pool.run(blocking, n), range(8), 8)
+
+        self.assertEqual(asyncio.run(run()), list(range(8)))
+        self.assertEqual(peak, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
+import io
 import unittest
 
 from src.block_markdown import (
     markdown_to_blocks,
     block_to_block_type,
     BlockType,
+    iter_block_lines,
     markdown_to_html_node
 )
 
@@ -212,6 +214,18 @@ This is a paragraph with  trailing spaces.
         block = "1. first\n3. third"
         assert block_to_block_type(block) != BlockType.ORDERED_LIST
 
+    def test_ordered_list_not_starting_at_one(self):
+        block = "2. second\n3. third"
+        assert block_to_block_type(block) == BlockType.PARAGRAPH
+
+    def test_ordered_list_long(self):
+        block = "\n".join(f"{i}. item" for i in range(1, 151))
+        assert block_to_block_type(block) == BlockType.ORDERED_LIST
+
+    def test_mixed_list_markers(self):
+        assert block_to_block_type("- one\n1. two") == BlockType.PARAGRAPH
+        assert block_to_block_type("> one\n- two") == BlockType.PARAGRAPH
+
     # Corner cases
     def test_empty_block(self):
         block = ""
@@ -306,4 +320,74 @@ line2
         self.assertEqual(
             html,
             "<div><ol><li>first</li>\n<li>second <i>italic</i></li>\n<li>third <b>bold</b></li>\n</ol></div>",
-        )
\ No newline at end of file
+        )
+
+    # Blank lines inside a fenced code block don't split it
+    def test_markdown_to_blocks_code_fence_with_blank_lines(self):
+        md = """
+```
+first
+
+second
+```
+
+After the code
+"""
+        blocks = markdown_to_blocks(md)
+        self.assertEqual(blocks, ["```\nfirst\n\nsecond\n```", "After the code"])
+
+    def test_markdown_to_blocks_unclosed_code_fence(self):
+        md = "```\ncode\n\nparagraph"
+        blocks = markdown_to_blocks(md)
+        self.assertEqual(blocks, ["```\ncode", "paragraph"])
+
+    def test_code_block_with_blank_lines(self):
+        md = """
+```
+def f():
+
+    return 1
+```
+"""
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>def f():\n\n    return 1\n</code></pre></div>",
+        )
+
+    # A file object (or any iterable of lines) is read line by line
+    def test_markdown_to_html_node_from_lines(self):
+        md = "# Title\n\nSome **bold** text\n\n- one\n- two\n"
+        from_lines = markdown_to_html_node(io.StringIO(md)).to_html()
+        self.assertEqual(from_lines, markdown_to_html_node(md).to_html())
+        self.assertEqual(
+            from_lines,
+            "<div><h1>Title</h1><p>Some <b>bold</b> text</p><ul><li>one</li>\n<li>two</li>\n</ul></div>",
+        )
+
+    # Every list shares the one newline leaf between items
+    def test_lists_share_newline_leaf(self):
+        node = markdown_to_html_node("- one\n- two\n\n1. first\n2. second")
+        newlines = [c for lst in node.children for c in lst.children if c.tag is None]
+        self.assertEqual(len(newlines), 4)
+        self.assertTrue(all(n is newlines[0] for n in newlines))
+
+    def test_block_start_lines(self):
+        starts = []
+        md = "# Title\n\n\n  para\nmore\n\n```\ncode\n\nstill code\n```\n\n- item"
+        blocks = list(iter_block_lines(md, starts=starts))
+        self.assertEqual(len(blocks), 4)
+        self.assertEqual(starts, [1, 4, 7, 13])
+        # An unclosed fence is split on blank lines, still numbered from the file
+        starts = []
+        list(iter_block_lines("text\n\n```\ncode\n\nmore", starts=starts))
+        self.assertEqual(starts, [1, 3, 6])
+
+    # Only a line of nothing but ``` and an info string opens a fence
+    def test_inline_code_line_is_not_a_fence(self):
+        md = "```inline``` text\n\npara\n\n```\nx\n```"
+        self.assertEqual(markdown_to_html_node(md).to_html(),
+                         "<div><p><code>inline</code> text</p><p>para</p><pre><code>x\n</code></pre></div>")
+        md = "```python\nx\n\ny\n```"
+        self.assertEqual(len(list(iter_block_lines(md))), 1)
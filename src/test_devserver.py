@@ -0,0 +1,95 @@
+import os
+import tempfile
+import time
+import unittest
+
+from src.devserver import SiteBuilder, PollingWatcher
+from src.fixtures import TempTreeMixin
+
+
+class TestSiteBuilder(TempTreeMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home\n\nWelcome")
+        self.write("content/blog/post/index.md", "# Post\n\nFirst draft")
+        self.write("static/index.css", "body {}")
+        self.builder = SiteBuilder(
+            self.path("content"), self.path("static"), self.path("template.html"),
+            self.path("public"), self.path("cache/static.json"),
+        )
+        self.builder.build_all()
+
+    def test_page_change_rebuilds_only_that_page(self):
+        home_mtime = os.stat(self.path("public/index.html")).st_mtime_ns
+        source = self.write("content/blog/post/index.md", "# Post\n\nSecond draft")
+        touched = self.builder.rebuild({source})
+        self.assertEqual(touched, [self.path("public/blog/post/index.html")])
+        self.assertIn("Second draft", self.read("public/blog/post/index.html"))
+        self.assertEqual(os.stat(self.path("public/index.html")).st_mtime_ns, home_mtime)
+
+    def test_deleted_page_is_removed(self):
+        source = self.path("content/blog/post/index.md")
+        os.remove(source)
+        self.builder.rebuild({source})
+        self.assertFalse(os.path.exists(self.path("public/blog")))
+
+    def test_template_change_rebuilds_everything(self):
+        template = self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        self.builder.rebuild({template})
+        self.assertTrue(self.read("public/index.html").startswith("<h1>Home</h1>"))
+        self.assertTrue(self.read("public/blog/post/index.html").startswith("<h1>Post</h1>"))
+
+    def test_static_change_is_copied(self):
+        asset = self.write("static/images/new.png", "png")
+        touched = self.builder.rebuild({asset})
+        self.assertEqual(touched, [self.path("public/images/new.png")])
+        self.assertEqual(self.read("public/images/new.png"), "png")
+
+    def test_listings_follow_front_matter(self):
+        builder = SiteBuilder(
+            self.path("content"), self.path("static"), self.path("template.html"),
+            self.path("public"), self.path("cache/static.json"), self.path("cache/metadata.sqlite"),
+        )
+        builder.build_all()
+        self.assertIn('<a href="/blog/post/">Post</a>', self.read("public/blog/index.html"))
+        # Only the tags change, so the post's own page doesn't
+        source = self.write("content/blog/post/index.md", "---\ntags: [news]\n---\n# Post\n\nFirst draft")
+        touched = builder.rebuild({source})
+        self.assertIn(self.path("public/blog/tags/news/index.html"), touched)
+        self.assertNotIn(self.path("public/blog/post/index.html"), touched)
+
+    def test_search_index_follows_pages(self):
+        builder = SiteBuilder(
+            self.path("content"), self.path("static"), self.path("template.html"),
+            self.path("public"), self.path("cache/static.json"), search_index_path=self.path("cache/search.sqlite"),
+        )
+        builder.build_all()
+        self.assertTrue(os.path.isfile(self.path("public/search/index.json")))
+        source = self.write("content/blog/post/index.md", "# Post\n\nZebras")
+        touched = builder.rebuild({source})
+        self.assertIn(self.path("public/search/ze.json"), touched)
+
+
+class TestPollingWatcher(unittest.TestCase):
+    def test_reports_added_changed_and_removed_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            existing = os.path.join(root, "a.md")
+            with open(existing, "w") as f:
+                f.write("a")
+            watcher = PollingWatcher([root], interval=0.01)
+
+            added = os.path.join(root, "b.md")
+            with open(added, "w") as f:
+                f.write("b")
+            later = time.time() + 10
+            os.utime(existing, (later, later))
+            self.assertEqual(watcher.wait(timeout=1), {existing, added})
+
+            os.remove(added)
+            self.assertEqual(watcher.wait(timeout=1), {added})
+            self.assertEqual(watcher.wait(timeout=0.05), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+from src.block_markdown import markdown_to_html_node
+from src.document import Document, Heading, parse_document
+
+MARKDOWN = """# The Lord of the **Rings**
+
+Some text with a [link](/blog/tom) and ![an image](/images/ring.png).
+
+## Chapters
+
+### The Shire
+
+- Bag End
+- [Bree](https://example.com/bree)
+
+### The Shire
+
+## Appendix
+
+```
+code words count too
+```
+"""
+
+
+class TestDocument(unittest.TestCase):
+    def test_title_is_whole_first_h1(self):
+        document = parse_document(MARKDOWN)
+        self.assertEqual(document.title, "The Lord of the Rings")
+
+    def test_no_title(self):
+        self.assertIsNone(parse_document("Just a paragraph\n\n## Not a title").title)
+
+    def test_headings_and_anchors(self):
+        document = parse_document(MARKDOWN)
+        self.assertEqual(document.headings, [
+            Heading(1, "The Lord of the Rings", "the-lord-of-the-rings"),
+            Heading(2, "Chapters", "chapters"),
+            Heading(3, "The Shire", "the-shire"),
+            Heading(3, "The Shire", "the-shire-1"),
+            Heading(2, "Appendix", "appendix"),
+        ])
+        html = document.root.to_html()
+        self.assertIn('<h3 id="the-shire">The Shire</h3>', html)
+        self.assertIn('<h3 id="the-shire-1">The Shire</h3>', html)
+
+    def test_body_matches_markdown_to_html_node_apart_from_ids(self):
+        html = parse_document(MARKDOWN).root.to_html()
+        for heading in parse_document(MARKDOWN).headings:
+            html = html.replace(f' id="{heading.anchor}"', "", 1)
+        self.assertEqual(html, markdown_to_html_node(MARKDOWN).to_html())
+
+    def test_links_images_and_words(self):
+        document = parse_document(MARKDOWN)
+        self.assertEqual(document.links, [("/blog/tom", "link", 3), ("https://example.com/bree", "Bree", 10)])
+        self.assertEqual(document.images, [("/images/ring.png", "an image", 3)])
+        self.assertEqual(document.word_count, 25)
+        self.assertEqual(document.reading_time(), 1)
+
+    def test_terms(self):
+        terms = parse_document(MARKDOWN).terms
+        # Once in the h1, once in a link to it
+        self.assertEqual(terms["rings"], 3)
+        self.assertEqual(terms["shire"], 6)
+        self.assertEqual(terms["bree"], 1)
+        self.assertEqual(terms["code"], 1)
+        self.assertNotIn("a", terms)
+
+    def test_reference_lines_count_front_matter(self):
+        document = parse_document("---\ntitle: T\n---\n# T\n\nSee [a](/a) and\n[b](/b) ![i](/i.png) [again](/a)")
+        self.assertEqual(document.links, [("/a", "a", 6), ("/b", "b", 7), ("/a", "again", 7)])
+        self.assertEqual(document.images, [("/i.png", "i", 7)])
+
+    def test_toc_html(self):
+        self.assertEqual(parse_document(MARKDOWN).toc_html(),
+                         '<ul><li><a href="#chapters">Chapters</a>'
+                         '<ul><li><a href="#the-shire">The Shire</a></li><li><a href="#the-shire-1">The Shire</a></li></ul>'
+                         '</li><li><a href="#appendix">Appendix</a></li></ul>')
+        self.assertEqual(parse_document("# Only a title").toc_html(), "")
+
+    def test_to_dict_round_trip(self):
+        document = parse_document(MARKDOWN)
+        restored = Document.from_dict(document.to_dict())
+        self.assertEqual(restored.to_dict(), document.to_dict())
+        self.assertEqual(restored.headings, document.headings)
+        self.assertIsNone(restored.root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from src.document import parse_document
+from src.front_matter import parse_front_matter, split_front_matter
+
+PAGE = """---
+title: "Why Tom Bombadil: A Mistake"
+date: 2024-03-01
+tags: [tolkien, opinion]
+authors:
+  - Tom
+  - 'Goldberry''s friend'
+draft: false
+# a comment
+weight: 3
+---
+# Heading
+
+Body
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split(self):
+        meta, body, lines = split_front_matter(PAGE)
+        self.assertEqual(meta, {
+            "title": "Why Tom Bombadil: A Mistake",
+            "date": "2024-03-01",
+            "tags": ["tolkien", "opinion"],
+            "authors": ["Tom", "Goldberry's friend"],
+            "draft": False,
+            "weight": 3,
+        })
+        self.assertEqual(body, "# Heading\n\nBody\n")
+        self.assertEqual(lines, 11)
+
+    def test_split_lines(self):
+        meta, body, lines = split_front_matter(iter(PAGE.splitlines(keepends=True)))
+        self.assertEqual(meta["tags"], ["tolkien", "opinion"])
+        self.assertEqual("".join(body), "# Heading\n\nBody\n")
+        self.assertEqual(lines, 11)
+
+    def test_no_front_matter(self):
+        self.assertEqual(split_front_matter("# Title\n\n---\n"), ({}, "# Title\n\n---\n", 0))
+        # Never closed, so it's just markdown
+        self.assertEqual(split_front_matter("---\ntitle: x\n"), ({}, "---\ntitle: x\n", 0))
+        self.assertEqual(split_front_matter(iter(["---\n", "a: b\n"]))[0], {})
+
+    def test_bad_line(self):
+        with self.assertRaisesRegex(ValueError, "line 3"):
+            parse_front_matter(["title: x", "not a pair"])
+        with self.assertRaisesRegex(ValueError, "list item without a key"):
+            parse_front_matter(["- item"])
+
+    def test_document_uses_front_matter(self):
+        document = parse_document(PAGE)
+        self.assertEqual(document.title, "Why Tom Bombadil: A Mistake")
+        self.assertEqual(document.meta["date"], "2024-03-01")
+        self.assertEqual(document.root.to_html(), '<div><h1 id="heading">Heading</h1><p>Body</p></div>')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from src import inline_cache
+from src.block_markdown import markdown_to_html_node, text_to_children
+from src.inline_cache import InlineCache
+from src.leafnode import LeafNode
+
+
+class TestInlineCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = InlineCache(maxsize=4)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", [LeafNode(None, "a")])
+        self.assertEqual(cache.get("a")[0].value, "a")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = InlineCache(maxsize=2)
+        cache.put("a", [])
+        cache.put("b", [])
+        cache.get("a")
+        cache.put("c", [])
+        self.assertEqual(list(cache.entries), ["a", "c"])
+
+    def test_resize_evicts(self):
+        cache = InlineCache(maxsize=3)
+        for text in "abc":
+            cache.put(text, [])
+        cache.resize(1)
+        self.assertEqual(list(cache.entries), ["c"])
+
+    def test_zero_size_is_off(self):
+        cache = InlineCache(maxsize=0)
+        cache.put("a", [])
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["misses"], 0)
+
+    def test_hit_returns_new_list(self):
+        cache = InlineCache()
+        cache.put("a", [LeafNode(None, "a")])
+        cache.get("a").append(LeafNode(None, "b"))
+        self.assertEqual(len(cache.get("a")), 1)
+
+    def test_save_and_load(self):
+        cache = InlineCache()
+        cache.put("[link](/x) and **b**", [
+            LeafNode("a", "link", {"href": "/x"}), LeafNode(None, " and "), LeafNode("b", "b"),
+        ])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "inline.json")
+            cache.save(path)
+            loaded = InlineCache().load(path)
+        nodes = loaded.get("[link](/x) and **b**")
+        self.assertEqual("".join(n.to_html() for n in nodes), '<a href="/x">link</a> and <b>b</b>')
+
+    def test_load_ignores_other_code_version(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "inline.json")
+            with open(path, "w") as f:
+                f.write('{"format": 1, "code_version": "old", "entries": [["a", [[null, "a", null]]]]}')
+            self.assertIsNone(InlineCache().load(path).get("a"))
+
+
+class TestTextToChildrenCache(unittest.TestCase):
+    def setUp(self):
+        inline_cache.inline_cache.clear()
+
+    def tearDown(self):
+        inline_cache.configure(inline_cache.DEFAULT_MAXSIZE)
+        inline_cache.inline_cache.clear()
+
+    def test_hit_renders_the_same_as_miss(self):
+        md = "Shared **footer** with a [link](/about)\n\n- item _one_\n\nShared **footer** with a [link](/about)\n\n- item _one_"
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(inline_cache.inline_cache.hits, 2)
+        inline_cache.configure(0)
+        self.assertEqual(markdown_to_html_node(md).to_html(), html)
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                text_to_children("**not closed")
+        self.assertEqual(inline_cache.inline_cache.stats()["size"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
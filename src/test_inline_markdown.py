@@ -243,5 +243,67 @@ class TestInlineMarkdown(unittest.TestCase):
                 TextNode("link", TextType.LINK, "https://boot.dev"),
             ],
             nodes,
-        )        
+        )
+
+
+# The five-pass pipeline text_to_textnodes used to run. The single-pass
+# scanner has to give exactly the same nodes, and fail on the same input.
+def multi_pass_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    return nodes
+
+
+class TestTextToTextNodesMatchesMultiPass(unittest.TestCase):
+    def assertSameAsMultiPass(self, text):
+        try:
+            expected = multi_pass_textnodes(text)
+        except ValueError as e:
+            with self.assertRaises(ValueError) as cm:
+                text_to_textnodes(text)
+            self.assertEqual(str(cm.exception), str(e))
+            return
+        self.assertListEqual(expected, text_to_textnodes(text))
+
+    def test_well_formed_paragraphs(self):
+        for text in [
+            "",
+            "plain text",
+            "This is **text** with an _italic_ word and a `code block` and an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](https://boot.dev)",
+            "**bold** at the start and _italic_ at the end_",
+            "**bold with _underscores_ inside**",
+            "`code with **bold** and [link](u) inside`",
+            "[link_with_underscores](https://example.com/a_b_c) and _italic_",
+            "![img](/a.png)![img2](/b.png)[l](/c)",
+            "a****b and a__b and ``",
+            "***three stars***",
+            "snake_case_name and an email@x_y",
+            "line one\nline **two**\n_line three_",
+        ]:
+            with self.subTest(text=text):
+                self.assertSameAsMultiPass(text)
+
+    def test_malformed_paragraphs(self):
+        for text in [
+            "unclosed **bold",
+            "unclosed _italic",
+            "unclosed `code",
+            "**bold with [link](u) inside**",
+            "_italic with `code` inside_",
+            "_italic with **bold** inside_",
+            "**bold** and ![img](u)_",
+        ]:
+            with self.subTest(text=text):
+                self.assertSameAsMultiPass(text)
+
+    def test_link_heavy_paragraph(self):
+        text = " ".join(f"[link {i}](/page/{i}) and ![img {i}](/img/{i}.png)" for i in range(500))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 2000 - 1)
+        self.assertEqual(nodes[-1], TextNode("img 499", TextType.IMAGE, "/img/499.png"))
+        self.assertListEqual(multi_pass_textnodes(text), nodes)
 
@@ -28,4 +28,12 @@ class TestLeafNode(unittest.TestCase):
     # tag with props
     def test_leaf_tag_with_props(self):
         node = LeafNode("a", "Click me!", {"href": "https://www.google.com"})
-        self.assertEqual(node.to_html(), '<a href="https://www.google.com">Click me!</a>')
\ No newline at end of file
+        self.assertEqual(node.to_html(), '<a href="https://www.google.com">Click me!</a>')
+
+    # Leaf nodes are slotted, so they don't carry a __dict__
+    def test_leaf_has_no_dict(self):
+        node = LeafNode("p", "Hello, world!")
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = "not allowed"
+
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from src.document import parse_document
+from src.link_check import LinkIndex, check_references, page_references, resolve, site_paths
+
+
+class TestLinkCheck(unittest.TestCase):
+    def test_resolve(self):
+        self.assertEqual(resolve("/blog/tom/", "/images/tom.png"), "/images/tom.png")
+        self.assertEqual(resolve("/blog/tom/", "../majesty/"), "/blog/majesty/")
+        self.assertEqual(resolve("/blog/tom/", "./ring.png?v=2#top"), "/blog/tom/ring.png")
+        self.assertEqual(resolve("/", "/a%20b.png"), "/a b.png")
+        self.assertEqual(resolve("/", "../../.."), "/")
+        self.assertEqual(resolve("/blog/tom/", "#section"), "")
+        for external in ("https://example.com/a", "mailto:me@example.com", "//cdn.example.com/x.js"):
+            self.assertIsNone(resolve("/", external))
+
+    def test_site_paths(self):
+        paths = site_paths(["public/index.html", "public/blog/tom/index.html", "public/images/tom.png"], "public")
+        self.assertEqual(paths, {"/index.html", "/", "/blog/tom/index.html", "/blog/tom/", "/images/tom.png"})
+
+    def test_check_references(self):
+        document = parse_document("---\ntitle: Tom\n---\n# Tom\n\n![Tom](/images/tom.png) and [home](/)\n\n"
+                                  "- [majesty](/blog/majesty)\n- [gone](../gone/)\n- [out](https://example.com)")
+        paths = {"/", "/index.html", "/blog/majesty/", "/blog/majesty/index.html"}
+        report = check_references({"blog/tom/index.md": page_references(document)}, paths)
+        self.assertEqual(report.broken, [
+            ("content/blog/tom/index.md", 6, "image", "/images/tom.png"),
+            ("content/blog/tom/index.md", 9, "link", "../gone/"),
+        ])
+        self.assertEqual(report.external, [("content/blog/tom/index.md", 10, "link", "https://example.com")])
+        self.assertEqual(report.checked, 4)
+
+    def test_link_index_keeps_unrendered_pages(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            path = os.path.join(root, "cache", "links.json")
+            links = LinkIndex(path).load()
+            links.update({os.path.join(content, "a", "index.md"): [["link", "/b/", 3]],
+                          os.path.join(content, "b", "index.md"): []},
+                         {"a/index.md": [10, 1], "b/index.md": [20, 1]}, content)
+            links.save()
+
+            # b/ wasn't rendered again, a/ is gone
+            links = LinkIndex(path).load()
+            links.update({}, {"b/index.md": [20, 1]}, content)
+            self.assertEqual(links.pages, {"b/index.md": []})
+            self.assertEqual(links.stale({"b/index.md": [20, 1]}), [])
+
+    # A page that changed without its references being recorded has to be read again
+    def test_link_index_stale_pages(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            links = LinkIndex(os.path.join(root, "links.json"))
+            links.update({os.path.join(content, "a", "index.md"): [["link", "/gone/", 3]]}, {"a/index.md": [10, 1]},
+                         content)
+            self.assertEqual(links.stale({"a/index.md": [10, 1], "b/index.md": [5, 1]}), ["b/index.md"])
+            self.assertEqual(links.stale({"a/index.md": [12, 2]}), ["a/index.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
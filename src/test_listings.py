@@ -0,0 +1,102 @@
+import os
+import unittest
+
+from src.fixtures import TempTreeMixin
+from src.listings import generate_listings
+from src.manifest import BuildManifest
+from src.metadata_index import MetadataIndex
+
+
+class TestListings(TempTreeMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.index = MetadataIndex(os.path.join(self.root, "metadata.sqlite"))
+        self.write("content/blog/a/index.md", "---\ndate: 2024-01-01\ntags: [Big News]\n---\n# Post A")
+        self.write("content/blog/b/index.md", "---\ndate: 2024-02-01\n---\n# Post B")
+
+    def read(self, rel_path):
+        with open(os.path.join(self.public, rel_path)) as f:
+            return f.read()
+
+    def generate(self):
+        self.index.update(self.content)
+        return generate_listings(self.index, self.content, self.template, self.public)
+
+    def test_listing_and_tag_pages(self):
+        report = self.generate()
+        self.assertEqual(len(report.written), 3)
+        self.assertEqual(self.read("blog/index.html"),
+                         '<title>Blog</title><div><h1 id="blog">Blog</h1><ul>'
+                         '<li><a href="/blog/b/">Post B</a> (2024-02-01)</li>\n'
+                         '<li><a href="/blog/a/">Post A</a> (2024-01-01)</li>\n</ul></div>')
+        self.assertIn('<a href="/blog/tags/big-news/">Big News</a> (1)', self.read("blog/tags/index.html"))
+        self.assertIn('<a href="/blog/a/">Post A</a>', self.read("blog/tags/big-news/index.html"))
+
+        report = self.generate()
+        self.assertEqual((len(report.written), len(report.unchanged)), (0, 3))
+
+    # Titles and tags are text, not markdown
+    def test_markdown_characters_are_shown_as_they_are(self):
+        self.write("content/blog/c/index.md", "---\ndate: 2024-03-01\ntags: [c_sharp, `code`, \"[x\"]\n"
+                                               "title: \"[draft] snake_case `ticks`\"\n---\n# C")
+        self.write("content/blog/d/index.md", "---\ndate: 2024-04-01\ntags: [c_sharp]\n---\n# `my_var` is **[bold]**")
+        self.generate()
+        tag_page = self.read("blog/tags/c_sharp/index.html")
+        self.assertIn("<title>Posts tagged c_sharp</title>", tag_page)
+        self.assertIn('<a href="/blog/c/">[draft] snake_case `ticks`</a> (2024-03-01)', tag_page)
+        self.assertIn('<a href="/blog/d/">my_var is [bold]</a> (2024-04-01)', tag_page)
+        tags = self.read("blog/tags/index.html")
+        self.assertIn('<a href="/blog/tags/code/">`code`</a> (1)', tags)
+        self.assertIn('<a href="/blog/tags/x/">[x</a> (1)', tags)
+
+    # Tags that slugify the same still get pages of their own
+    def test_tags_with_the_same_slug(self):
+        self.write("content/blog/a/index.md", "---\ndate: 2024-01-01\ntags: [C#, C++]\n---\n# Post A")
+        report = self.generate()
+        tags = self.read("blog/tags/index.html")
+        self.assertIn('<a href="/blog/tags/c/">C#</a> (1)', tags)
+        self.assertIn('<a href="/blog/tags/c-1/">C++</a> (1)', tags)
+        self.assertIn("<title>Posts tagged C#</title>", self.read("blog/tags/c/index.html"))
+        self.assertIn("<title>Posts tagged C++</title>", self.read("blog/tags/c-1/index.html"))
+        self.assertEqual(len(report.written), 4)
+        self.assertEqual(sorted(self.index.listing_outputs()), ["blog", "blog/tags", "blog/tags/c", "blog/tags/c-1"])
+
+    # Only the listings that list a changed page are rendered again
+    def test_manifest_skips_listings_whose_entries_are_unchanged(self):
+        manifest = BuildManifest(os.path.join(self.root, "manifest.json"), self.template)
+        self.index.update(self.content)
+        report = generate_listings(self.index, self.content, self.template, self.public, manifest=manifest)
+        self.assertEqual(len(report.written), 3)
+
+        self.write("content/blog/b/index.md", "---\ndate: 2024-02-01\n---\n# Post B, renamed")
+        self.index.update(self.content)
+        with self.assertLogs("src.listings", "INFO") as logs:
+            report = generate_listings(self.index, self.content, self.template, self.public, manifest=manifest,
+                                       explain=True)
+        # The tags page lists B too, though what it shows of it didn't change
+        self.assertEqual(len(logs.output), 2)
+        self.assertIn(os.path.join("blog", "tags", "index.html"), logs.output[1])
+        self.assertEqual([os.path.relpath(p, self.public) for p in report.written], [os.path.join("blog", "index.html")])
+        self.assertIn("listing entry of", logs.output[0])
+        self.assertIn(os.path.join("blog", "b", "index.md") + " changed", logs.output[0])
+
+    def test_stale_tag_pages_are_removed(self):
+        self.generate()
+        self.write("content/blog/a/index.md", "---\ndate: 2024-01-01\n---\n# Post A")
+        report = self.generate()
+        self.assertEqual(sorted(os.path.relpath(p, self.public) for p in report.deleted),
+                         [os.path.join("blog", "tags", "big-news", "index.html"),
+                          os.path.join("blog", "tags", "index.html")])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "tags")))
+
+    def test_content_page_wins(self):
+        self.write("content/blog/index.md", "# My own blog page")
+        self.generate()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
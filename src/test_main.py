@@ -0,0 +1,156 @@
+import argparse
+import os
+import unittest
+
+from src import link_check
+from src.fixtures import TempTreeMixin
+from src.main import copy_all_contents, run_render_one
+from src.page_writer import OutputReport
+from src.render import collect_pages, generate_pages
+
+
+class TestGeneratePages(TempTreeMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write("template.html", "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.write("content/index.md", "# Home\n\nWelcome **home**")
+        for i in range(6):
+            self.write(f"content/blog/post{i}/index.md", f"# Post {i}\n\n- item _{i}_\n- [link](/blog/post{i})")
+
+    def read_tree(self, dir_path):
+        files = {}
+        for dirpath, _, filenames in os.walk(dir_path):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                with open(path, "rb") as f:
+                    files[os.path.relpath(path, dir_path)] = f.read()
+        return files
+
+    def test_collect_pages(self):
+        pages = collect_pages(os.path.join(self.root, "content"), os.path.join(self.root, "public"))
+        dests = sorted(os.path.relpath(dest, self.root) for _, dest in pages)
+        self.assertEqual(len(dests), 7)
+        self.assertEqual(dests[0], os.path.join("public", "blog", "post0", "index.html"))
+        self.assertEqual(dests[-1], os.path.join("public", "index.html"))
+
+    def test_render_one_matches_build(self):
+        content = os.path.join(self.root, "content")
+        built = collect_pages(content, os.path.join(self.root, "public"))
+        generate_pages(built, self.template)
+        output = os.path.join(self.root, "preview", "index.html")
+        # Not through main(), which would set up logging for the whole test run
+        run_render_one(argparse.Namespace(source=os.path.join(content, "index.md"), output=output,
+                                          template=self.template))
+        with open(output) as f, open(os.path.join(self.root, "public", "index.html")) as expected:
+            self.assertEqual(f.read(), expected.read())
+
+    # Front matter fields are placeholders too, but never in place of the built-in ones
+    def test_front_matter_placeholders(self):
+        template = self.write("fields.html", "{{ Title }}|{{ author }}|{{ tags }}|{{ draft }}|{{ Path }}|{{ missing }}")
+        self.write("content/about/index.md", "---\nauthor: Tom\ntags: [a, b]\ndraft: false\nPath: /elsewhere/\n---\n# About")
+        content = os.path.join(self.root, "content")
+        public = os.path.join(self.root, "public")
+        generate_pages([(os.path.join(content, "about", "index.md"), os.path.join(public, "about", "index.html"))],
+                       template, site_root=public)
+        with open(os.path.join(public, "about", "index.html")) as f:
+            self.assertEqual(f.read(), "About|Tom|a, b|false|/about/|{{ missing }}")
+
+    def test_page_picks_its_template(self):
+        self.write("post.html", "<main>{{ Content }}</main>")
+        self.write("content/post/index.md", "---\ntemplate: post.html\n---\n# Post")
+        content = os.path.join(self.root, "content")
+        public = os.path.join(self.root, "public")
+        generate_pages(collect_pages(content, public), self.template)
+        with open(os.path.join(public, "post", "index.html")) as f:
+            self.assertEqual(f.read(), '<main><div><h1 id="post">Post</h1></div></main>')
+        with open(os.path.join(public, "index.html")) as f:
+            self.assertTrue(f.read().startswith("<title>Home</title>"))
+
+    def test_parallel_output_matches_serial(self):
+        content = os.path.join(self.root, "content")
+        serial = collect_pages(content, os.path.join(self.root, "serial"))
+        parallel = collect_pages(content, os.path.join(self.root, "parallel"))
+
+        generate_pages(serial, self.template, jobs=1)
+        generate_pages(parallel, self.template, jobs=3)
+
+        serial_files = self.read_tree(os.path.join(self.root, "serial"))
+        self.assertEqual(len(serial_files), 7)
+        self.assertEqual(serial_files, self.read_tree(os.path.join(self.root, "parallel")))
+
+    # Pages rendered in worker processes send their links back
+    def test_links_recorded_in_every_mode(self):
+        content = os.path.join(self.root, "content")
+        pages = collect_pages(content, os.path.join(self.root, "public"))
+        for jobs, io_jobs in ((1, 1), (1, 4), (3, 1)):
+            collected = link_check.enable()
+            try:
+                generate_pages(pages, self.template, jobs=jobs, io_jobs=io_jobs)
+            finally:
+                link_check.disable()
+            self.assertEqual(len(collected), 7)
+            self.assertEqual(collected[os.path.join(content, "blog", "post2", "index.md")],
+                             [["link", "/blog/post2", 4]])
+
+    def test_overlapped_io_matches_serial(self):
+        content = os.path.join(self.root, "content")
+        serial = collect_pages(content, os.path.join(self.root, "serial"))
+        overlapped = collect_pages(content, os.path.join(self.root, "overlapped"))
+
+        generate_pages(serial, self.template)
+        report = generate_pages(overlapped, self.template, io_jobs=4)
+
+        self.assertEqual(len(report.written), 7)
+        self.assertEqual(self.read_tree(os.path.join(self.root, "serial")),
+                         self.read_tree(os.path.join(self.root, "overlapped")))
+
+    def test_overlapped_io_errors_name_the_page(self):
+        bad = self.write("content/broken/index.md", "# Broken\n\nThis **never closes")
+        pages = collect_pages(os.path.join(self.root, "content"), os.path.join(self.root, "public"))
+        with self.assertRaises(RuntimeError) as e:
+            generate_pages(pages, self.template, io_jobs=4)
+        self.assertIn(bad, str(e.exception))
+        # Every other page is still written
+        self.assertEqual(len(self.read_tree(os.path.join(self.root, "public"))), 7)
+
+    def test_parallel_errors_name_the_page(self):
+        bad = self.write("content/broken/index.md", "# Broken\n\nThis **never closes")
+        pages = collect_pages(os.path.join(self.root, "content"), os.path.join(self.root, "public"))
+        with self.assertRaises(RuntimeError) as e:
+            generate_pages(pages, self.template, jobs=2)
+        self.assertIn(bad, str(e.exception))
+        self.assertIn("formatted section not closed", str(e.exception))
+
+    def test_report_written_then_unchanged(self):
+        pages = collect_pages(os.path.join(self.root, "content"), os.path.join(self.root, "public"))
+        for jobs in (1, 3):
+            report = generate_pages(pages, self.template, jobs=jobs)
+            self.assertEqual(len(report.written) + len(report.unchanged), 7)
+        self.assertEqual((len(report.written), len(report.unchanged)), (0, 7))
+
+        self.write("content/blog/post2/index.md", "# Post 2\n\nEdited")
+        report = generate_pages(pages, self.template)
+        self.assertEqual(report.written, [os.path.join(self.root, "public", "blog", "post2", "index.html")])
+
+    def test_copy_all_contents_skips_unchanged(self):
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png")
+        public = os.path.join(self.root, "public")
+        os.makedirs(public)
+        copy_all_contents(os.path.join(self.root, "static"), public, clean=False)
+        css = os.path.join(public, "index.css")
+        os.utime(css, ns=(1000, 1000))
+
+        for io_jobs, png in ((1, "PNG"), (4, "png!")):
+            self.write("static/images/a.png", png)
+            report = OutputReport()
+            copy_all_contents(os.path.join(self.root, "static"), public, clean=False, report=report,
+                              io_jobs=io_jobs)
+            self.assertEqual(report.written, [os.path.join(public, "images", "a.png")])
+            self.assertEqual(report.unchanged, [css])
+            self.assertEqual(os.stat(css).st_mtime_ns, 1000)
+            with open(os.path.join(public, "images", "a.png")) as f:
+                self.assertEqual(f.read(), png)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import unittest
+
+from src.fixtures import TempTreeMixin
+from src.manifest import BuildManifest
+
+
+class TestBuildManifest(TempTreeMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.template = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.source = self.write("content/index.md", "# Hello")
+        self.dest = self.write("public/index.html", "<p>Hello</p>")
+        self.manifest_path = os.path.join(self.root, "cache", "manifest.json")
+
+    def saved_manifest(self):
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        manifest.record(self.source, self.dest)
+        manifest.save()
+        return BuildManifest(self.manifest_path, self.template).load()
+
+    def test_new_page_is_not_up_to_date(self):
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        self.assertFalse(manifest.is_up_to_date(self.source, self.dest))
+
+    def test_unchanged_page_is_up_to_date(self):
+        manifest = self.saved_manifest()
+        self.assertTrue(manifest.is_up_to_date(self.source, self.dest))
+
+    def test_source_change_invalidates(self):
+        manifest = self.saved_manifest()
+        self.write("content/index.md", "# Hello again")
+        self.assertFalse(manifest.is_up_to_date(self.source, self.dest))
+
+    def test_template_change_invalidates(self):
+        self.saved_manifest()
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        self.assertFalse(manifest.is_up_to_date(self.source, self.dest))
+
+    # A page built with a template of its own depends on that one, not the default
+    def test_page_template_change_invalidates(self):
+        self.write("post.html", "<article>{{ Content }}</article>")
+        self.write("content/index.md", "---\ntemplate: post.html\n---\n# Hello")
+        self.saved_manifest()
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        self.assertTrue(manifest.is_up_to_date(self.source, self.dest))
+        self.write("post.html", "<main>{{ Content }}</main>")
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        self.assertEqual(manifest.explain(self.source, self.dest), [os.path.relpath(self.path("post.html")) + " changed"])
+
+    def test_edited_output_invalidates(self):
+        manifest = self.saved_manifest()
+        self.write("public/index.html", "<p>edited by hand</p>")
+        self.assertFalse(manifest.is_up_to_date(self.source, self.dest))
+
+    def test_missing_output_invalidates(self):
+        manifest = self.saved_manifest()
+        os.remove(self.dest)
+        self.assertFalse(manifest.is_up_to_date(self.source, self.dest))
+
+    def test_code_version_change_invalidates(self):
+        manifest = self.saved_manifest()
+        manifest.code_version = "something newer"
+        self.assertFalse(manifest.is_up_to_date(self.source, self.dest))
+
+    def test_explain_names_the_changed_inputs(self):
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        self.assertEqual(manifest.explain(self.source, self.dest), ["it wasn't built before"])
+        manifest = self.saved_manifest()
+        self.assertEqual(manifest.explain(self.source, self.dest), [])
+        self.write("content/index.md", "# Hello again")
+        self.write("template.html", "<h1>{{ Title }}</h1>{{ Content }}")
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        self.assertEqual(manifest.explain(self.source, self.dest),
+                         [f"{os.path.relpath(self.source)} changed", f"{os.path.relpath(self.template)} changed"])
+
+    def test_outputs_with_other_inputs(self):
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        listing = self.write("public/blog/index.html", "<p>listing</p>")
+        manifest.record_output(listing, {"entry a": "1", "entry b": "2"})
+        self.assertEqual(manifest.changes(listing, {"entry a": "1", "entry b": "2"}), [])
+        self.assertEqual(manifest.changes(listing, {"entry a": "3", "entry c": "4"}),
+                         ["entry a changed", "entry c is new", "entry b is gone"])
+        # Only pages go when their source does
+        self.assertEqual(manifest.remove_stale(os.path.join(self.root, "public")), [])
+        self.assertTrue(os.path.exists(listing))
+
+    # A source saved while its page was being rendered is rendered again next time
+    def test_record_keeps_the_inputs_the_page_was_rendered_from(self):
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        inputs, reasons = manifest.page_changes(self.source, self.dest)
+        self.assertEqual(reasons, ["it wasn't built before"])
+        self.write("content/index.md", "# Saved mid-build")
+        manifest.record(self.source, self.dest, inputs)
+        self.assertEqual(manifest.explain(self.source, self.dest), [os.path.relpath(self.source) + " changed"])
+
+    def test_remove_stale_deletes_output_of_deleted_source(self):
+        dest = self.write("public/blog/post/index.html", "<p>post</p>")
+        source = self.write("content/blog/post/index.md", "# Post")
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        manifest.record(self.source, self.dest)
+        manifest.record(source, dest)
+        manifest.save()
+
+        os.remove(source)
+        manifest = BuildManifest(self.manifest_path, self.template).load()
+        manifest.is_up_to_date(self.source, self.dest)
+        removed = manifest.remove_stale(os.path.join(self.root, "public"))
+
+        self.assertEqual(len(removed), 1)
+        self.assertFalse(os.path.exists(dest))
+        # Empty directories are cleaned up, but not the output root
+        self.assertFalse(os.path.exists(os.path.join(self.root, "public", "blog")))
+        self.assertTrue(os.path.exists(self.dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
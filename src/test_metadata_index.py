@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import unittest
+
+from src.fixtures import TempTreeMixin
+from src.metadata_index import MetadataIndex, page_url
+
+
+class TestMetadataIndex(TempTreeMixin, unittest.TestCase):
+    base_dir = "content"
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.index = MetadataIndex(os.path.join(self.root, "cache", "metadata.sqlite"))
+        self.write("index.md", "# Home")
+        self.write("blog/index.md", "# My blog")
+        self.write("blog/old/index.md", "---\ndate: 2023-01-01\ntags: [tolkien]\n---\n# Old post")
+        self.write("blog/new/index.md", "---\ndate: 2024-05-01\ntags: tolkien, news\n---\n# New post")
+        self.write("blog/draft/index.md", "---\ndate: 2025-01-01\ndraft: true\n---\n# Draft")
+
+    def test_pages_newest_first(self):
+        self.index.update(self.content)
+        pages = self.index.pages("blog")
+        self.assertEqual([(p.path, p.url, p.title, p.date) for p in pages], [
+            ("blog/new/index.md", "/blog/new/", "New post", "2024-05-01"),
+            ("blog/old/index.md", "/blog/old/", "Old post", "2023-01-01"),
+        ])
+        self.assertEqual([p.path for p in self.index.pages("blog", limit=1)], ["blog/new/index.md"])
+
+    def test_tags(self):
+        self.index.update(self.content)
+        self.assertEqual(self.index.tags("blog"), [("news", 1), ("tolkien", 2)])
+        self.assertEqual([p.title for p in self.index.pages("blog", tag="news")], ["New post"])
+        self.assertEqual(self.index.pages("blog", tag="missing"), [])
+
+    def test_update_is_incremental(self):
+        self.assertEqual(self.index.update(self.content),
+                         (["blog/draft/index.md", "blog/index.md", "blog/new/index.md", "blog/old/index.md",
+                           "index.md"], [], []))
+        self.assertEqual(self.index.update(self.content), ([], [], []))
+
+        # Touched without changing: only the mtime is updated
+        path = os.path.join(self.content, "index.md")
+        os.utime(path, ns=(10**9, 10**9))
+        self.assertEqual(self.index.update(self.content), ([], [], []))
+
+        self.write("blog/old/index.md", "---\ndate: 2023-01-01\ntags: [news]\n---\n# Old post")
+        os.remove(os.path.join(self.content, "blog/draft/index.md"))
+        self.write("about/index.md", "# About")
+        self.assertEqual(self.index.update(self.content),
+                         (["about/index.md"], ["blog/old/index.md"], ["blog/draft/index.md"]))
+        self.assertEqual(self.index.tags("blog"), [("news", 2), ("tolkien", 1)])
+
+    # The same title the page's Document has: the text of the first h1, not its markdown
+    def test_title_is_heading_text(self):
+        self.write("blog/new/index.md", "---\ndate: 2024-05-01\n---\n```\n# not this\n```\n\n# New **bold** `post`")
+        self.index.update(self.content)
+        self.assertEqual(self.index.pages("blog")[0].title, "New bold post")
+
+    def test_bad_front_matter_names_the_file(self):
+        self.write("blog/bad/index.md", "---\nnot a pair\n---\n# Bad")
+        with self.assertRaisesRegex(ValueError, "bad/index.md"):
+            self.index.update(self.content)
+        # Nothing from the failed update was kept
+        self.assertEqual(self.index.pages("blog"), [])
+
+    def test_rebuild_and_version_change(self):
+        self.index.update(self.content)
+        conn = sqlite3.connect(self.index.db_path)
+        with conn:
+            conn.execute("UPDATE info SET value = 'old' WHERE key = 'version'")
+        conn.close()
+        # Written by other code, so read again from scratch
+        self.assertEqual(len(self.index.update(self.content)[0]), 5)
+        self.assertEqual(len(self.index.rebuild(self.content)[0]), 5)
+
+    def test_empty_index(self):
+        self.assertEqual(self.index.pages("blog"), [])
+        self.assertEqual(self.index.tags("blog"), [])
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.md"), "/")
+        self.assertEqual(page_url("blog/tom/index.md"), "/blog/tom/")
+
+
+if __name__ == "__main__":
+    unittest.main()
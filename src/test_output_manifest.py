@@ -0,0 +1,66 @@
+import json
+import os
+import unittest
+
+from src.fixtures import TempTreeMixin
+from src.output_manifest import OutputManifest
+from src.page_writer import OutputReport
+
+
+class TestOutputManifest(TempTreeMixin, unittest.TestCase):
+    base_dir = "public"
+
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.root, "public")
+        self.manifest_path = os.path.join(self.root, "cache", "output.jsonl")
+
+    def build(self, written=(), unchanged=()):
+        report = OutputReport()
+        report.written.extend(written)
+        report.unchanged.extend(unchanged)
+        manifest = OutputManifest(self.manifest_path, self.public).load()
+        manifest.update(report)
+        manifest.save()
+        with open(self.manifest_path) as f:
+            return {r["path"]: r for r in map(json.loads, f)}
+
+    def test_statuses(self):
+        index = self.write("index.html", "home")
+        css = self.write("index.css", "body {}")
+        old = self.write("blog/old/index.html", "old")
+        records = self.build(written=[index, css, old])
+        self.assertEqual({r["status"] for r in records.values()}, {"added"})
+        self.assertEqual(records["index.html"]["size"], 4)
+        self.assertEqual(records["blog/old/index.html"]["path"], "blog/old/index.html")
+
+        self.write("index.html", "new home")
+        os.remove(old)
+        records = self.build(written=[index], unchanged=[css])
+        self.assertEqual(records["index.html"]["status"], "changed")
+        self.assertEqual(records["index.css"]["status"], "unchanged")
+        self.assertEqual(records["blog/old/index.html"]["status"], "removed")
+
+        # Removed files are only reported once
+        records = self.build(unchanged=[index, css])
+        self.assertEqual(sorted(records), ["index.css", "index.html"])
+        self.assertEqual({r["status"] for r in records.values()}, {"unchanged"})
+
+    def test_rewritten_with_same_bytes_is_unchanged(self):
+        index = self.write("index.html", "home")
+        self.build(written=[index])
+        self.write("index.html", "home")
+        self.assertEqual(self.build(written=[index])["index.html"]["status"], "unchanged")
+
+    def test_untouched_file_reuses_hash(self):
+        index = self.write("index.html", "home")
+        first = self.build(written=[index])["index.html"]
+        # Pretend the previous hash was something else: it's reused while size and mtime match
+        lines = [dict(first, sha256="previous")]
+        with open(self.manifest_path, "w") as f:
+            f.write(json.dumps(lines[0]) + "\n")
+        self.assertEqual(self.build(unchanged=[index])["index.html"]["sha256"], "previous")
+
+
+if __name__ == "__main__":
+    unittest.main()
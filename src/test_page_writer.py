@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+
+from src import parse_cache
+from src.page_writer import atomic_open, files_equal, prune_directory, write_page
+from src.render import generate_page
+from src.template import Template
+
+
+class TestPageWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        parse_cache.configure(None)
+        self.tmp.cleanup()
+
+    def test_atomic_open_replaces(self):
+        path = os.path.join(self.root, "index.html")
+        with atomic_open(path) as f:
+            f.write("new")
+        with open(path) as f:
+            self.assertEqual(f.read(), "new")
+        self.assertEqual(os.listdir(self.root), ["index.html"])
+
+    def test_failed_write_keeps_old_file(self):
+        path = os.path.join(self.root, "index.html")
+        with open(path, "w") as f:
+            f.write("old")
+        with self.assertRaises(RuntimeError):
+            with atomic_open(path) as f:
+                f.write("half a page")
+                raise RuntimeError("crash")
+        with open(path) as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(self.root), ["index.html"])
+
+    def test_write_page_streams_body(self):
+        path = os.path.join(self.root, "blog", "index.html")
+        template = Template("<head>{{ Title }}</head><body>{{ Content }}</body>")
+        changed, size = write_page(path, template, {"Title": "T", "Content": iter(["<p>", "a", "</p>"])})
+        with open(path) as f:
+            page = f.read()
+        self.assertEqual(page, "<head>T</head><body><p>a</p></body>")
+        self.assertTrue(changed)
+        self.assertEqual(size, len(page))
+
+    def test_write_page_skips_unchanged(self):
+        path = os.path.join(self.root, "index.html")
+        template = Template("<body>{{ Content }}</body>")
+        write_page(path, template, {"Content": "same"})
+        os.utime(path, ns=(1000, 1000))
+        changed, _ = write_page(path, template, {"Content": "same"})
+        self.assertFalse(changed)
+        self.assertEqual(os.stat(path).st_mtime_ns, 1000)
+        self.assertEqual(os.listdir(self.root), ["index.html"])
+
+        # Same size, different bytes
+        changed, _ = write_page(path, template, {"Content": "diff"})
+        self.assertTrue(changed)
+        with open(path) as f:
+            self.assertEqual(f.read(), "<body>diff</body>")
+
+    def test_files_equal(self):
+        paths = []
+        for name, text in (("a", "x" * 100000), ("b", "x" * 100000), ("c", "x" * 99999 + "y"), ("d", "x")):
+            paths.append(os.path.join(self.root, name))
+            with open(paths[-1], "w") as f:
+                f.write(text)
+        a, b, c, d = paths
+        self.assertTrue(files_equal(a, b))
+        self.assertFalse(files_equal(a, c))
+        self.assertFalse(files_equal(a, d))
+        self.assertFalse(files_equal(a, os.path.join(self.root, "missing")))
+
+    def test_prune_directory(self):
+        keep = []
+        for rel in ("index.html", "blog/index.html", "old/post/index.html", "old.css"):
+            path = os.path.join(self.root, "public", rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+            if not rel.startswith("old"):
+                keep.append(path)
+        deleted = prune_directory(os.path.join(self.root, "public"), keep)
+        self.assertEqual([os.path.relpath(p, self.root) for p in deleted],
+                         [os.path.join("public", "old.css"), os.path.join("public", "old", "post", "index.html")])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.root, "public"))), ["blog", "index.html"])
+
+    def test_body_error_keeps_old_page(self):
+        path = os.path.join(self.root, "index.html")
+        with open(path, "w") as f:
+            f.write("old")
+
+        def body():
+            yield "<p>"
+            raise ValueError("bad node")
+
+        with self.assertRaises(ValueError):
+            write_page(path, Template("{{ Content }}"), {"Content": body()})
+        with open(path) as f:
+            self.assertEqual(f.read(), "old")
+
+    def write_source(self, template_text):
+        source = os.path.join(self.root, "index.md")
+        with open(source, "w") as f:
+            f.write("# Home\n\nSome **bold** text")
+        template = os.path.join(self.root, "template.html")
+        with open(template, "w") as f:
+            f.write(template_text)
+        return source, template
+
+    def test_template_with_content_twice(self):
+        source, template = self.write_source("{{ Content }}|{{ Content }}")
+        dest = os.path.join(self.root, "public", "index.html")
+        for cache_dir in (None, os.path.join(self.root, "cache"), os.path.join(self.root, "cache")):
+            parse_cache.configure(cache_dir)
+            generate_page(source, template, dest)
+            with open(dest) as f:
+                body = '<div><h1 id="home">Home</h1><p>Some <b>bold</b> text</p></div>'
+                self.assertEqual(f.read(), body + "|" + body)
+
+    def test_template_without_content_still_caches_body(self):
+        source, template = self.write_source("<title>{{ Title }}</title>")
+        cache = parse_cache.configure(os.path.join(self.root, "cache"))
+        generate_page(source, template, os.path.join(self.root, "public", "index.html"))
+        with open(source) as f:
+            document, body = cache.get(f.read())
+        self.assertEqual(document.title, "Home")
+        self.assertEqual(body, '<div><h1 id="home">Home</h1><p>Some <b>bold</b> text</p></div>')
+
+
+if __name__ == "__main__":
+    unittest.main()
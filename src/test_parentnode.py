@@ -108,3 +108,32 @@ class TestParentNode(unittest.TestCase):
             node.to_html(),
             "<p><b>Bold text</b>Normal text<i>italic text</i>Normal text</p>"
         )
+
+    # iter_html streams the same output to_html returns
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold text"), LeafNode(None, "Normal text")]),
+                ParentNode("ul", [ParentNode("li", [LeafNode("a", "link", {"href": "/x"})])]),
+            ],
+        )
+        fragments = list(node.iter_html(chunk_size=1))
+        self.assertGreater(len(fragments), 1)
+        self.assertEqual("".join(fragments), node.to_html())
+
+    # Nesting deeper than the recursion limit still renders
+    def test_to_html_deeply_nested(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "<b>deep</b></span>"))
+        self.assertEqual(len(html), 5000 * len("<span></span>") + len("<b>deep</b>"))
+
+    # A nested parent with no tag is still reported
+    def test_to_html_nested_parent_without_tag(self):
+        node = ParentNode("div", [ParentNode(None, [LeafNode(None, "text")])])
+        with self.assertRaises(ValueError) as e:
+            node.to_html()
+        self.assertEqual(str(e.exception), "All parent nodes must have a tag")
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from src import parse_cache
+from src.document import Document, Heading
+from src.parse_cache import ParseCache
+from src.render import generate_page, generate_pages
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp.name, "pages")
+
+    def tearDown(self):
+        parse_cache.configure(None)
+        self.tmp.cleanup()
+
+    def test_put_and_get(self):
+        cache = ParseCache(self.cache_dir)
+        self.assertIsNone(cache.get("# Title"))
+        document = Document(title="Title", headings=[Heading(1, "Title", "title")], word_count=1,
+                            links=[("/a", "A")], images=[("/a.png", "alt")])
+        cache.put("# Title", document, "<div><h1>Title</h1></div>")
+        cached, body = cache.get("# Title")
+        self.assertEqual(body, "<div><h1>Title</h1></div>")
+        self.assertEqual(cached.to_dict(), document.to_dict())
+        self.assertIsNone(cached.root)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertIsNone(cache.get("# Other"))
+
+    def test_no_temp_files_left(self):
+        cache = ParseCache(self.cache_dir)
+        cache.put("# A", Document(title="A"), "<div></div>")
+        cache.put("# A", Document(title="A"), "<div></div>")
+        names = [name for _, _, files in os.walk(self.cache_dir) for name in files]
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].endswith(".page"))
+
+    def test_evict_removes_least_recently_used(self):
+        cache = ParseCache(self.cache_dir)
+        for i in range(4):
+            cache.put(f"# {i}", Document(title=str(i)), "x" * 1000)
+        # Make "# 0" the oldest and "# 1" the most recently used
+        for i in range(4):
+            path = cache._entry_path(cache.key(f"# {i}"))
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        os.utime(cache._entry_path(cache.key("# 1")), ns=(10 * 10**9, 10 * 10**9))
+        size = os.path.getsize(cache._entry_path(cache.key("# 0")))
+        cache.max_bytes = size * 2
+        self.assertEqual(cache.evict(), 2)
+        self.assertIsNone(cache.get("# 0"))
+        self.assertIsNone(cache.get("# 2"))
+        self.assertIsNotNone(cache.get("# 1"))
+        self.assertIsNotNone(cache.get("# 3"))
+
+    def test_clean(self):
+        cache = ParseCache(self.cache_dir)
+        cache.put("# A", Document(title="A"), "<div></div>")
+        cache.clean()
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_template_change_reuses_bodies(self):
+        root = self.tmp.name
+        template = os.path.join(root, "template.html")
+        pages = []
+        for i in range(3):
+            source = os.path.join(root, "content", f"p{i}", "index.md")
+            os.makedirs(os.path.dirname(source))
+            with open(source, "w") as f:
+                f.write(f"# Page{i}\n\nSome **bold** text")
+            pages.append((source, os.path.join(root, "public", f"p{i}", "index.html")))
+
+        with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        generate_pages(pages, template)
+        with open(pages[0][1]) as f:
+            uncached = f.read()
+
+        cache = parse_cache.configure(self.cache_dir)
+        generate_pages(pages, template)
+        self.assertEqual(cache.misses, 3)
+        with open(pages[0][1]) as f:
+            self.assertEqual(f.read(), uncached)
+
+        with open(template, "w") as f:
+            f.write("<h1>{{ Title }}</h1>{{ Content }}")
+        generate_page(pages[0][0], template, pages[0][1])
+        self.assertEqual(cache.hits, 1)
+        with open(pages[0][1]) as f:
+            self.assertEqual(f.read(), '<h1>Page0</h1><div><h1 id="page0">Page0</h1><p>Some <b>bold</b> text</p></div>')
+
+
+if __name__ == "__main__":
+    unittest.main()
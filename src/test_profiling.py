@@ -0,0 +1,121 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from src import profiling
+from src.render import generate_pages
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_stage_records_wall_and_cpu(self):
+        profiler = profiling.BuildProfiler()
+        with profiler.stage("parse", page="a.md"):
+            sum(range(1000))
+        event, = profiler.events
+        self.assertEqual(event["name"], "parse")
+        self.assertEqual(event["page"], "a.md")
+        self.assertGreaterEqual(event["wall"], 0)
+        self.assertGreaterEqual(event["cpu"], 0)
+
+    def test_stage_is_recorded_when_it_raises(self):
+        profiler = profiling.BuildProfiler()
+        with self.assertRaises(ValueError):
+            with profiler.stage("parse"):
+                raise ValueError("bad")
+        self.assertEqual(len(profiler.events), 1)
+
+    def test_merge_adds_counters(self):
+        profiler = profiling.BuildProfiler()
+        profiler.count("nodes", 3)
+        profiler.merge([{"name": "page", "page": "b.md", "start": 0, "wall": 2.0, "cpu": 1.0,
+                         "pid": 1, "tid": 1}], {"nodes": 4, "pages": 1})
+        self.assertEqual(profiler.counters, {"nodes": 7, "pages": 1})
+        self.assertEqual(profiler.slowest_pages(), [("b.md", 2.0, 1.0)])
+
+    def test_count_from_several_threads(self):
+        profiler = profiling.BuildProfiler()
+
+        def count():
+            for _ in range(10000):
+                profiler.count("bytes_written", 2)
+        threads = [threading.Thread(target=count) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(profiler.counters, {"bytes_written": 80000})
+
+    def test_slowest_pages_sorted_and_limited(self):
+        profiler = profiling.BuildProfiler()
+        for i, wall in enumerate([0.1, 0.3, 0.2]):
+            profiler.events.append({"name": "page", "page": f"{i}.md", "start": 0, "wall": wall,
+                                    "cpu": wall, "pid": 1, "tid": 1})
+        self.assertEqual([p[0] for p in profiler.slowest_pages(2)], ["1.md", "2.md"])
+
+    def test_chrome_trace(self):
+        profiler = profiling.BuildProfiler()
+        with profiler.stage("read", page="a.md"):
+            pass
+        trace = profiler.chrome_trace()
+        event, = trace["traceEvents"]
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"]["page"], "a.md")
+        self.assertIn("read", trace["otherData"]["stages"])
+
+    def test_module_stage_is_noop_when_disabled(self):
+        profiling.disable()
+        self.assertIsNone(profiling.active())
+        with profiling.stage("parse"):
+            pass
+        profiling.count("nodes")
+
+
+class TestProfiledBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        self.pages = []
+        for i in range(3):
+            source = os.path.join(self.root, "content", f"p{i}", "index.md")
+            os.makedirs(os.path.dirname(source))
+            with open(source, "w") as f:
+                f.write(f"# Page {i}\n\nSome **bold** text")
+            self.pages.append((source, os.path.join(self.root, "public", f"p{i}", "index.html")))
+
+    def tearDown(self):
+        profiling.disable()
+        self.tmp.cleanup()
+
+    def check_profile(self, profiler):
+        totals = profiler.stage_totals()
+        for name in ("page", "read", "parse", "render_write"):
+            self.assertEqual(totals[name]["count"], 3, name)
+        self.assertEqual(profiler.counters["pages"], 3)
+        self.assertGreater(profiler.counters["nodes"], 0)
+        self.assertGreater(profiler.counters["bytes_written"], 0)
+        self.assertEqual(sorted(p[0] for p in profiler.slowest_pages()),
+                         sorted(os.path.abspath(source) for source, _ in self.pages))
+
+    def test_serial(self):
+        self.check_profile_for_jobs(1)
+
+    def test_parallel_merges_worker_profiles(self):
+        self.check_profile_for_jobs(2)
+
+    def check_profile_for_jobs(self, jobs):
+        profiler = profiling.enable()
+        generate_pages(self.pages, self.template, jobs)
+        self.check_profile(profiler)
+        trace_path = os.path.join(self.root, "trace.json")
+        profiler.write_trace(trace_path)
+        with open(trace_path) as f:
+            self.assertIn("traceEvents", json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
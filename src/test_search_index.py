@@ -0,0 +1,77 @@
+import json
+import os
+import unittest
+
+from src.fixtures import TempTreeMixin
+from src.search_index import SearchIndex, shard_file_name
+
+
+class TestSearchIndex(TempTreeMixin, unittest.TestCase):
+    base_dir = "content"
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.out = os.path.join(self.root, "public", "search")
+        self.index = SearchIndex(os.path.join(self.root, "cache", "search.sqlite"), self.out)
+        self.write("index.md", "# Home\n\nWelcome to the shire")
+        self.write("blog/tom/index.md", "# Tom Bombadil\n\nTom lives near the Shire. Tom sings.")
+        self.write("blog/ring/index.md", "---\ntitle: The Ring\n---\n# One ring\n\nÉowyn and the ring")
+
+    def load(self, name):
+        with open(os.path.join(self.out, name)) as f:
+            return json.load(f)
+
+    # {url: weight} of the pages with term, looked up the way a browser would
+    def lookup(self, term):
+        manifest = self.load("index.json")
+        prefix = term[:manifest["prefix_length"]]
+        if prefix not in manifest["shards"]:
+            return {}
+        postings = self.load(manifest["shards"][prefix]).get(term, [])
+        return {manifest["pages"][str(page)][0]: weight for page, weight in zip(postings[::2], postings[1::2])}
+
+    def test_postings(self):
+        self.index.update(self.content)
+        manifest = self.load("index.json")
+        self.assertIn(["/blog/ring/", "The Ring"], manifest["pages"].values())
+        self.assertEqual(self.lookup("shire"), {"/": 1, "/blog/tom/": 1})
+        # Heaviest first, headings counting extra
+        self.assertEqual(list(self.lookup("tom").items()), [("/blog/tom/", 5)])
+        self.assertEqual(self.lookup("éowyn"), {"/blog/ring/": 1})
+        self.assertEqual(manifest["shards"]["éo"], "_c3a96f.json")
+
+    def test_only_affected_shards_are_written(self):
+        self.index.update(self.content)
+        report = self.index.update(self.content)
+        self.assertEqual(report.written, [])
+        self.assertIn(os.path.join(self.out, "sh.json"), report.unchanged)
+
+        self.write("blog/tom/index.md", "# Tom Bombadil\n\nTom lives near the Shire. Tom dances.")
+        report = self.index.update(self.content)
+        # "sings" was the only si term, so its shard goes and the manifest changes
+        self.assertEqual(sorted(os.path.basename(p) for p in report.written), ["da.json", "index.json"])
+        self.assertEqual(report.deleted, [os.path.join(self.out, "si.json")])
+        self.assertEqual(self.lookup("dances"), {"/blog/tom/": 1})
+
+    def test_removed_page_and_empty_shards(self):
+        self.index.update(self.content)
+        os.remove(os.path.join(self.content, "blog", "ring", "index.md"))
+        report = self.index.update(self.content)
+        self.assertIn(os.path.join(self.out, shard_file_name("éo")), report.deleted)
+        self.assertNotIn("/blog/ring/", [url for url, _ in self.load("index.json")["pages"].values()])
+        self.assertEqual(self.lookup("ring"), {})
+
+    def test_missing_shards_are_written_again(self):
+        self.index.update(self.content)
+        os.remove(os.path.join(self.out, "to.json"))
+        report = self.index.update(self.content)
+        self.assertEqual(report.written, [os.path.join(self.out, "to.json")])
+
+    def test_shard_file_name(self):
+        self.assertEqual(shard_file_name("ab"), "ab.json")
+        self.assertEqual(shard_file_name("a_"), "_615f.json")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import time
+import unittest
+
+from src.fixtures import TempTreeMixin
+from src.static_sync import copy_file, save_state, sync_directory
+
+
+class TestStaticSync(TempTreeMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.public = os.path.join(self.root, "public")
+        self.state = os.path.join(self.root, "cache", "static.json")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "aaaa")
+        self.write("static/images/b.png", "bbbb")
+
+    def test_first_sync_copies_everything(self):
+        result = sync_directory(self.static, self.public, self.state)
+        self.assertEqual(sorted(result.copied), ["images/a.png", "images/b.png", "index.css"])
+        self.assertEqual(self.read("public/images/a.png"), "aaaa")
+
+    def test_second_sync_copies_nothing(self):
+        sync_directory(self.static, self.public, self.state)
+        result = sync_directory(self.static, self.public, self.state)
+        self.assertEqual(result.copied, [])
+        self.assertEqual(len(result.unchanged), 3)
+
+    def test_changed_file_is_copied(self):
+        sync_directory(self.static, self.public, self.state)
+        self.write("static/images/a.png", "changed")
+        result = sync_directory(self.static, self.public, self.state)
+        self.assertEqual(result.copied, ["images/a.png"])
+        self.assertEqual(self.read("public/images/a.png"), "changed")
+
+    def test_hash_skips_touched_but_identical_file(self):
+        sync_directory(self.static, self.public, self.state)
+        later = time.time() + 10
+        os.utime(os.path.join(self.static, "index.css"), (later, later))
+        result = sync_directory(self.static, self.public, self.state, use_hash=True)
+        self.assertEqual(result.copied, [])
+        result = sync_directory(self.static, self.public, self.state)
+        self.assertEqual(result.copied, [])
+
+    def test_orphans_deleted_but_generated_pages_kept(self):
+        sync_directory(self.static, self.public, self.state)
+        self.write("public/index.html", "<p>generated</p>")
+        self.write("public/images/gallery/index.html", "<p>generated</p>")
+        os.remove(os.path.join(self.static, "images", "b.png"))
+
+        result = sync_directory(self.static, self.public, self.state)
+
+        self.assertEqual(result.deleted, ["images/b.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "b.png")))
+        self.assertEqual(self.read("public/index.html"), "<p>generated</p>")
+        self.assertEqual(self.read("public/images/gallery/index.html"), "<p>generated</p>")
+
+    # Files a full build copied over are deleted by the next sync once they're gone
+    def test_saved_state_covers_files_copied_without_syncing(self):
+        for rel in ("index.css", "images/a.png", "images/b.png"):
+            os.makedirs(os.path.dirname(os.path.join(self.public, rel)), exist_ok=True)
+            copy_file(os.path.join(self.static, rel), os.path.join(self.public, rel))
+        save_state(self.state, ["images/a.png", "images/b.png", "index.css"])
+        os.remove(os.path.join(self.static, "index.css"))
+
+        result = sync_directory(self.static, self.public, self.state)
+
+        self.assertEqual(result.deleted, ["index.css"])
+        self.assertEqual(sorted(result.unchanged), ["images/a.png", "images/b.png"])
+
+    def test_hardlinks(self):
+        sync_directory(self.static, self.public, self.state, link=True)
+        src = os.stat(os.path.join(self.static, "index.css"))
+        dst = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(src.st_ino, dst.st_ino)
+
+    def test_copy_file_replaces_hardlink_without_writing_through(self):
+        src = os.path.join(self.static, "index.css")
+        dst = os.path.join(self.public, "index.css")
+        os.makedirs(self.public)
+        os.link(src, dst)
+        other = self.write("static/other.css", "p {}")
+        copy_file(other, dst)
+        self.assertEqual(self.read("static/index.css"), "body {}")
+        self.assertEqual(self.read("public/index.css"), "p {}")
+
+
+if __name__ == "__main__":
+    unittest.main()
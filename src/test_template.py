@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from src.template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_splits_literals_and_slots(self):
+        template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.assertEqual(template.literals, ["<title>", "</title><article>", "</article>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{Content}}")
+        html = template.render({"Title": "Hello", "Content": "<p>hi</p>"})
+        self.assertEqual(html, "<title>Hello</title><p>hi</p>")
+
+    def test_render_repeated_and_extra_placeholders(self):
+        template = Template("{{ Title }} | {{ Date }} | {{ Path }} | {{ Title }}")
+        html = template.render({"Title": "T", "Date": "2024-01-02", "Path": "/blog/"})
+        self.assertEqual(html, "T | 2024-01-02 | /blog/ | T")
+
+    def test_missing_values_are_left_alone(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Unknown }}")
+        self.assertEqual(template.render({"Title": "T"}), "<h1>T</h1>{{ Unknown }}")
+
+    # Values aren't searched for placeholders again
+    def test_values_are_not_substituted(self):
+        template = Template("{{ Title }}{{ Content }}")
+        html = template.render({"Title": "{{ Content }}", "Content": "body"})
+        self.assertEqual(html, "{{ Content }}body")
+
+    def test_render_to_streams_iterable_values(self):
+        template = Template("<article>{{ Content }}</article>")
+        pieces = []
+        template.render_to(pieces.append, {"Content": iter(["<p>", "hi", "</p>"])})
+        self.assertEqual(pieces, ["<article>", "<p>", "hi", "</p>", "</article>"])
+
+    def test_no_placeholders(self):
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render({"Title": "T"}), "<p>static</p>")
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "template.html")
+        self.write("<h1>{{ Title }}</h1>", 1_000_000_000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text, mtime):
+        with open(self.path, "w") as f:
+            f.write(text)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_cached_until_changed(self):
+        first = load_template(self.path)
+        self.assertIs(load_template(self.path), first)
+
+        self.write("<h2>{{ Title }}</h2>", 1_000_000_100)
+        second = load_template(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.render({"Title": "T"}), "<h2>T</h2>")
+
+    def test_missing_template(self):
+        with self.assertRaises(ValueError):
+            load_template(os.path.join(self.tmp.name, "nope.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -68,6 +68,10 @@ class TestTextNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             text_node_to_html_node(bad)
 
+    # Text nodes are slotted, so they don't carry a __dict__
+    def test_textnode_has_no_dict(self):
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
 
 if __name__ == "__main__":
     unittest.main()
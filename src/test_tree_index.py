@@ -0,0 +1,50 @@
+import os
+import unittest
+
+from src.fixtures import TempTreeMixin
+from src.tree_index import DIR, FILE, scan_tree
+
+
+class TestTreeIndex(TempTreeMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        for rel_path, text in (("index.md", "# Home"), ("blog/post/index.md", "# Post"), ("blog/a.css", "a{}")):
+            self.write(rel_path, text)
+        os.makedirs(os.path.join(self.root, "empty"))
+
+    def test_scan(self):
+        index = scan_tree(self.root)
+        self.assertEqual(sorted(e.rel_path for e in index.files()),
+                         [os.path.join("blog", "a.css"), os.path.join("blog", "post", "index.md"), "index.md"])
+        self.assertEqual(sorted(e.rel_path for e in index.dirs()),
+                         ["blog", os.path.join("blog", "post"), "empty"])
+        entry = index.get("index.md")
+        self.assertEqual((entry.kind, entry.size), (FILE, 6))
+        self.assertEqual(entry.path, os.path.join(self.root, "index.md"))
+        self.assertEqual(entry.mtime_ns, os.stat(entry.path).st_mtime_ns)
+        self.assertEqual(index.get("blog").kind, DIR)
+
+    def test_directories_come_before_their_contents(self):
+        order = list(scan_tree(self.root).entries)
+        self.assertLess(order.index("blog"), order.index(os.path.join("blog", "post")))
+        self.assertLess(order.index(os.path.join("blog", "post")), order.index(os.path.join("blog", "post", "index.md")))
+
+    def test_diff(self):
+        before = scan_tree(self.root)
+        self.write("index.md", "# Home page")
+        self.write("blog/new.md", "# New")
+        os.remove(os.path.join(self.root, "blog", "a.css"))
+        added, changed, removed = scan_tree(self.root).diff(before)
+        self.assertEqual(added, [os.path.join("blog", "new.md")])
+        self.assertEqual(changed, ["index.md"])
+        self.assertEqual(removed, [os.path.join("blog", "a.css")])
+
+    def test_without_stat(self):
+        index = scan_tree(self.root, stat=False)
+        self.write("index.md", "# Home page")
+        # Stat'ed when first asked for
+        self.assertEqual(index.get("index.md").size, 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 from enum import Enum
+from src.leafnode import LeafNode
 
 class TextType(Enum):
     TEXT="text"
@@ -9,6 +10,8 @@ class TextType(Enum):
     IMAGE="image"
 
 class TextNode():
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url = None):
         self.text = text
         self.text_type = text_type
@@ -22,9 +25,6 @@ class TextNode():
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 def text_node_to_html_node(text_node):
-    from src.leafnode import LeafNode
-    from src.textnode import TextNode, TextType  # safe import; already loaded
-
     # Check to see that text_node is actually of type textnode
     if not isinstance(text_node, TextNode):
         raise TypeError("text_node must be a TextNode")
@@ -0,0 +1,111 @@
+import os
+
+FILE = "file"
+DIR = "dir"
+
+
+# One file or directory in a TreeIndex. rel_path is relative to the index's root.
+# A file's size and mtime come from a stat made when the tree is scanned, or with
+# stat=False, the first time either is asked for.
+class TreeEntry():
+    __slots__ = ("path", "rel_path", "kind", "_dir_entry", "_stat")
+
+    def __init__(self, path, rel_path, kind, dir_entry=None):
+        self.path = path
+        self.rel_path = rel_path
+        self.kind = kind
+        self._dir_entry = dir_entry
+        self._stat = None
+
+    def _get_stat(self):
+        if self._stat is None:
+            # DirEntry caches its stat result, so this is one syscall at most
+            self._stat = self._dir_entry.stat() if self._dir_entry is not None else os.stat(self.path)
+        return self._stat
+
+    @property
+    def size(self):
+        return 0 if self.kind == DIR else self._get_stat().st_size
+
+    @property
+    def mtime_ns(self):
+        return 0 if self.kind == DIR else self._get_stat().st_mtime_ns
+
+    def __eq__(self, other):
+        return (self.rel_path, self.kind, self.size, self.mtime_ns) == \
+            (other.rel_path, other.kind, other.size, other.mtime_ns)
+
+    def __repr__(self):
+        return f"TreeEntry({self.rel_path!r}, {self.kind})"
+
+
+# Everything under a directory, read with a single os.scandir pass: each entry's kind
+# comes from the directory listing itself, and its size and mtime from at most one stat.
+# With stat=False nothing is stat'ed up front, for walks that only need paths and kinds;
+# an index meant to be diffed against later needs the default, so it records the
+# sizes and mtimes as they were when it was scanned.
+#
+# Entries are kept in the order a depth-first walk visits them (a directory comes
+# before what's in it, and siblings are in directory listing order), and can also be
+# looked up by their path relative to root.
+class TreeIndex():
+    def __init__(self, root, stat=True):
+        self.root = os.path.abspath(root)
+        self.stat = stat
+        self.entries = {}
+
+    def scan(self):
+        self.entries = {}
+        self._scan(self.root, "")
+        return self
+
+    def _scan(self, dir_path, rel_dir):
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+        for entry in entries:
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            if entry.is_dir():
+                self.entries[rel_path] = TreeEntry(entry.path, rel_path, DIR)
+                self._scan(entry.path, rel_path)
+            elif entry.is_file():
+                tree_entry = TreeEntry(entry.path, rel_path, FILE, entry)
+                if self.stat:
+                    try:
+                        tree_entry._get_stat()
+                    except FileNotFoundError:
+                        # Removed while we were looking
+                        continue
+                self.entries[rel_path] = tree_entry
+
+    def files(self):
+        return [e for e in self.entries.values() if e.kind == FILE]
+
+    def dirs(self):
+        return [e for e in self.entries.values() if e.kind == DIR]
+
+    def get(self, rel_path):
+        return self.entries.get(rel_path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Compare with an index of the same tree taken earlier. Returns the relative
+    # paths of files that were added, changed (size or mtime) and removed since then.
+    def diff(self, previous):
+        added = []
+        changed = []
+        for rel_path, entry in self.entries.items():
+            if entry.kind != FILE:
+                continue
+            before = previous.entries.get(rel_path)
+            if before is None or before.kind != FILE:
+                added.append(rel_path)
+            elif before != entry:
+                changed.append(rel_path)
+        removed = [rel_path for rel_path, entry in previous.entries.items()
+                   if entry.kind == FILE and (rel_path not in self.entries or self.entries[rel_path].kind != FILE)]
+        return added, changed, removed
+
+
+def scan_tree(root, stat=True):
+    return TreeIndex(root, stat).scan()